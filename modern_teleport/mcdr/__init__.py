@@ -1,14 +1,15 @@
+import threading
 import modern_teleport.runtime as runtime
 
+from typing import Any
 from mcdreforged.api.all import (
     PluginServerInterface,
     ServerInterface,
     Info,
-    event_listener
-    # new_thread,
+    event_listener,
+    new_thread,
     # spam_proof,
 )
-from location_api import MCPosition
 from modern_teleport.mcdr.config import (
     CommandNodes,
     get_command_nodes,
@@ -16,17 +17,25 @@ from modern_teleport.mcdr.config import (
     MainConfig,
 )
 from modern_teleport.mcdr.commands import load_command_nodes, register_commands
-from modern_teleport.modules import init_modules, GetInfo
+from modern_teleport.modules import (
+    init_modules,
+    init_online_players,
+    discard_state,
+    export_state,
+    import_state,
+)
 from modern_teleport.utils import execute_if, tr
+from modern_teleport.utils.identity import identity_cache
 
 psi: PluginServerInterface | None = None
+handoff_state: dict[str, Any] | None = None
 try:
     psi = ServerInterface.psi()
 except RuntimeError:
     psi = None
 
 
-def on_load(s: PluginServerInterface, _):
+def on_load(s: PluginServerInterface, prev_module: Any):
     s.logger.info(tr(s, "on_load"))
     config: MainConfig = get_config(s)
     runtime.load_config(config)
@@ -35,10 +44,28 @@ def on_load(s: PluginServerInterface, _):
     load_command_nodes(command_nodes)
     register_commands(s)
     init_modules()
+    state: dict[str, Any] | None = getattr(prev_module, "handoff_state", None)
+    if state:
+        import_state(state)
+    elif s.is_server_startup():
+        init_online_players(s)
+
+
+def on_server_startup(server: PluginServerInterface):
+    if runtime.online_players is not None:
+        runtime.online_players.seed([])
+
+
+def on_server_stop(server: PluginServerInterface, return_code: int):
+    if runtime.online_players is not None:
+        runtime.online_players.clear()
 
 
 def on_player_joined(server: PluginServerInterface, player: str, info: Info):
-    pass
+    identity_cache.invalidate(player)
+    if runtime.online_players is not None:
+        runtime.online_players.add(player)
+    preload_player_data(player)
 
 
 def on_user_info(server: PluginServerInterface, info: Info):
@@ -56,19 +83,45 @@ def on_player_death(
     event: str,
     content: list
 ):
-    death_position: MCPosition | None = GetInfo.get_player_position(player)
-    if death_position:
-        runtime.latest_death_positions.update({player: death_position})
+    if runtime.death_mgr:
+        runtime.death_mgr.capture(player)
 
 
-@execute_if(lambda: runtime.async_tp_mgr is not None)
 def on_player_left(server: PluginServerInterface, player: str):
+    if runtime.online_players is not None:
+        runtime.online_players.remove(player)
+    if runtime.data_mgr:
+        runtime.data_mgr.release(player)
+    cancel_requests_of_player(player)
+
+
+@new_thread("MTPData: preload")
+def preload_player_data(player: str):
+    if runtime.data_mgr:
+        runtime.data_mgr.preload(player)
+
+
+@execute_if(lambda: runtime.async_tp_mgr is not None)
+def cancel_requests_of_player(player: str):
     assert runtime.async_tp_mgr is not None
-    for i in runtime.async_tp_mgr.tp_tasks:
-        if i.target_player == player or i.selected_player == player:
-            i.cancel()
+    runtime.async_tp_mgr.cancel_requests_of(player)
 
 
 def on_unload(server: PluginServerInterface):
-    if runtime.async_tp_mgr:
-        runtime.async_tp_mgr.cancel_all_requests()
+    global handoff_state
+    timeout: float = runtime.config.timeout.unload if runtime.config else 5
+    handoff_state = export_state(timeout)
+    # a reload picks the requests up right away in on_load, otherwise the
+    # plugin was unloaded or disabled and they are cancelled
+    timer = threading.Timer(timeout, discard_state, (handoff_state,))
+    timer.name = "MTPUnload: discard"
+    timer.daemon = True
+    timer.start()
+    if runtime.dispatcher:
+        runtime.dispatcher.stop()
+    if runtime.data_mgr:
+        runtime.data_mgr.close()
+    if runtime.rcon:
+        runtime.rcon.close()
+    if runtime.online_players is not None:
+        runtime.online_players.stop()
@@ -1,5 +1,6 @@
 # pyright: reportCallIssue=false
 import os
+import re
 import modern_teleport.runtime as runtime
 
 from mcdreforged.api.all import (
@@ -9,13 +10,23 @@ from mcdreforged.api.all import (
     CommandSource,
     SimpleCommandBuilder,
     Text,
+    GreedyText,
     Boolean,
     CommandSyntaxError,
+    new_thread,
 )
 from location_api import MCPosition, Point3D
 from modern_teleport.modules import GetInfo
+from modern_teleport.modules.back import BackEntry
+from modern_teleport.modules.home import HomeUnavailableError
+from modern_teleport.modules.storage_backend import (
+    STORAGE_ERRORS,
+    is_backend_type,
+    is_layout,
+)
 from modern_teleport.modules.tpmanager_async import (
     TeleportRequest,
+    GroupTeleportRequest,
     TeleportPosition,
 )
 from modern_teleport.utils import Player, tr
@@ -23,8 +34,12 @@ from modern_teleport.mcdr.config import CommandNodes, __config_path
 from modern_teleport.mcdr.commands.utils import (
     build_exec_with_multiple_commands as build_commands,
     auto_get_player_from_src as get_player,
+    get_typed_prefix,
 )
 
+HOME_NAME_PATTERN: re.Pattern = re.compile(r"[\w-]{1,32}")
+# sub-commands of the home command, homes named so could not be reached
+HOME_RESERVED_NAMES: frozenset[str] = frozenset({"set", "del", "list"})
 builder: SimpleCommandBuilder | None = SimpleCommandBuilder()
 psi: PluginServerInterface | None = None
 try:
@@ -58,15 +73,22 @@ def register_commands(s: PluginServerInterface):
     _plg: str = command_nodes.plugin
     _tpa: str = command_nodes.teleport_ask
     _tpr: str = command_nodes.teleport
+    _tph: str = command_nodes.teleport_invite
+    _back: str = command_nodes.back
+    _home: str = command_nodes.home
     _cmd: str = _pfx + _plg
     s.logger.info("register_commands")
     builder.arg("player", Text).suggests(
-        lambda: GetInfo.get_online_list() or []
+        lambda src, ctx: suggest_online_players(src, ctx, "player")
     )
     builder.arg("target", Text).suggests(
-        lambda: GetInfo.get_online_list() or []
+        lambda src, ctx: suggest_online_players(src, ctx, "target")
     )
+    builder.arg("players", GreedyText)
     builder.arg("to_pos", Boolean)
+    builder.arg("backend", Text).suggests(lambda: ["json", "sqlite"])
+    builder.arg("layout", Text).suggests(lambda: ["flat", "sharded"])
+    builder.arg("home", Text).suggests(suggest_homes)
     build_commands(
         builder,
         [
@@ -83,6 +105,11 @@ def register_commands(s: PluginServerInterface):
         lambda src: GetInfo.list_online_players(src),
     )
     builder.command(f"{_cmd} debug locate <player>", _debug_on_locate_player)
+    builder.command(f"{_cmd} debug rcon", _debug_on_rcon_stats)
+    builder.command(f"{_cmd} debug dispatch", _debug_on_dispatch_stats)
+    builder.command(f"{_cmd} debug data", _debug_on_data_stats)
+    builder.command(f"{_cmd} data migrate <backend>", _on_data_migrate)
+    builder.command(f"{_cmd} data layout <layout>", _on_data_relayout)
     build_commands(
         builder,
         [f"{_cmd} debug query death", f"{_cmd} debug query death <player>"],
@@ -106,6 +133,14 @@ def register_commands(s: PluginServerInterface):
         ],
         _testing_async_tpa_command,
     )
+    builder.command(f"{_pfx}{_tph} group <players>", _async_group_command)
+    if runtime.config and runtime.config.enable_modules.back:
+        builder.command(f"{_pfx}{_back}", _on_back_command)
+    if runtime.config and runtime.config.enable_modules.home:
+        builder.command(f"{_pfx}{_home} <home>", _on_home_command)
+        builder.command(f"{_pfx}{_home} set <home>", _on_home_set_command)
+        builder.command(f"{_pfx}{_home} del <home>", _on_home_del_command)
+        builder.command(f"{_pfx}{_home} list", _on_home_list_command)
     build_commands(
         builder,
         [
@@ -121,6 +156,30 @@ def register_commands(s: PluginServerInterface):
     builder.register(s)
 
 
+def suggest_online_players(
+    src: CommandSource, ctx: CommandContext, argument: str = "player"
+) -> list[str]:
+    limit: int = runtime.config.suggestion_limit if runtime.config else 50
+    online_players = runtime.get_online_players()
+    if online_players is not None:
+        return online_players.suggest(get_typed_prefix(ctx, argument), limit)
+    return GetInfo.get_online_list() or []
+
+
+def suggest_homes(src: CommandSource, ctx: CommandContext) -> list[str]:
+    if not src.is_player or not runtime.home_mgr:
+        return []
+    limit: int = runtime.config.suggestion_limit if runtime.config else 50
+    try:
+        return runtime.home_mgr.suggest(
+            src.player,  # pyright: ignore[reportAttributeAccessIssue]
+            get_typed_prefix(ctx, "home"),
+            limit,
+        )
+    except HomeUnavailableError:
+        return []
+
+
 def get_player_names(
     src: CommandSource, ctx: CommandContext
 ) -> tuple[str, str | None]:
@@ -148,15 +207,160 @@ async def _testing_async_tpa_command(src: CommandSource, ctx: CommandContext):
         selected_player,
         target_player,
     )
-    if not GetInfo.is_player_online(
-        selected_player
-    ) or not GetInfo.is_player_online(target_player):
+    online: dict[str, bool] = await GetInfo.async_are_players_online(
+        [selected_player, target_player]
+    )
+    if not all(online.values()):
         if "--debug" not in ctx.command:
             src.reply("player_not_online")
             return
         src.reply(f"> {request.command}")
         return
-    runtime.async_tp_mgr.schedule_add(request)
+    # only requests which would be sent take a token
+    sender: str | None = None
+    if src.is_player:
+        sender = src.player  # pyright: ignore[reportAttributeAccessIssue]
+    if not runtime.async_tp_mgr.acquire(sender):
+        src.reply("tpr.rate_limited")
+        return
+    runtime.async_tp_mgr.schedule_add(request, limit=False)
+
+
+async def _async_group_command(src: CommandSource, ctx: CommandContext):
+    if not runtime.async_tp_mgr:
+        src.reply("AsyncSessionManager is not running...")
+        return
+    if not src.is_player:
+        src.reply("command.player_only")
+        return
+    inviter: str = src.player  # pyright: ignore[reportAttributeAccessIssue]
+    players: list[str] = [
+        i for i in re.split(r"[\s,]+", ctx.get("players", "")) if i
+    ]
+    if not players:
+        raise CommandSyntaxError("failed to parse argument `players`.")
+    online: dict[str, bool] = await GetInfo.async_are_players_online(
+        players
+    )
+    online_players: list[str] = [i for i in players if online.get(i)]
+    if not online_players:
+        src.reply("player_not_online")
+        return
+    if not runtime.async_tp_mgr.acquire(inviter):
+        src.reply("tpr.rate_limited")
+        return
+    runtime.async_tp_mgr.schedule_add_group(
+        GroupTeleportRequest(get_psi(src), inviter, online_players),
+        limit=False,
+    )
+
+
+def _on_back_command(src: CommandSource, ctx: CommandContext):
+    if not src.is_player:
+        src.reply("command.player_only")
+        return
+    if not runtime.backtrack_mgr:
+        src.reply("back.not_running")
+        return
+    player: str = src.player  # pyright: ignore[reportAttributeAccessIssue]
+    entry: BackEntry | None = runtime.backtrack_mgr.peek(player)
+    if not entry:
+        src.reply("back.no_history")
+        return
+    # going back does not push the origin, or two !!back would ping-pong
+    TeleportPosition(get_psi(src), player, entry.position).execute(
+        record_back=False
+    )
+    # removed only once the teleport is submitted, a failure keeps it
+    runtime.backtrack_mgr.pop(player, entry)
+
+
+def _on_home_command(src: CommandSource, ctx: CommandContext):
+    if not src.is_player:
+        src.reply("command.player_only")
+        return
+    if not runtime.home_mgr:
+        src.reply("home.not_running")
+        return
+    player: str = src.player  # pyright: ignore[reportAttributeAccessIssue]
+    try:
+        position: MCPosition | None = runtime.home_mgr.get(
+            player, ctx["home"]
+        )
+    except HomeUnavailableError:
+        src.reply("home.load_failed")
+        return
+    if not position:
+        src.reply("home.not_found")
+        return
+    TeleportPosition(get_psi(src), player, position).execute()
+
+
+@new_thread("MTPHome: set")
+def _on_home_set_command(src: CommandSource, ctx: CommandContext):
+    if not src.is_player:
+        src.reply("command.player_only")
+        return
+    if not runtime.home_mgr:
+        src.reply("home.not_running")
+        return
+    name: str = ctx["home"]
+    if (
+        not HOME_NAME_PATTERN.fullmatch(name)
+        or name.lower() in HOME_RESERVED_NAMES
+    ):
+        src.reply("home.invalid_name")
+        return
+    player: str = src.player  # pyright: ignore[reportAttributeAccessIssue]
+    position: MCPosition | None = GetInfo.get_player_position(player)
+    if not position:
+        src.reply("home.locate_failed")
+        return
+    try:
+        if not runtime.home_mgr.set(player, name, position):
+            src.reply("home.limit_reached")
+            return
+    except HomeUnavailableError:
+        src.reply("home.load_failed")
+        return
+    src.reply("home.set")
+
+
+def _on_home_del_command(src: CommandSource, ctx: CommandContext):
+    if not src.is_player:
+        src.reply("command.player_only")
+        return
+    if not runtime.home_mgr:
+        src.reply("home.not_running")
+        return
+    player: str = src.player  # pyright: ignore[reportAttributeAccessIssue]
+    try:
+        if not runtime.home_mgr.remove(player, ctx["home"]):
+            src.reply("home.not_found")
+            return
+    except HomeUnavailableError:
+        src.reply("home.load_failed")
+        return
+    src.reply("home.removed")
+
+
+def _on_home_list_command(src: CommandSource, ctx: CommandContext):
+    if not src.is_player:
+        src.reply("command.player_only")
+        return
+    if not runtime.home_mgr:
+        src.reply("home.not_running")
+        return
+    player: str = src.player  # pyright: ignore[reportAttributeAccessIssue]
+    try:
+        names: list[str] = runtime.home_mgr.get_names(player)
+    except HomeUnavailableError:
+        src.reply("home.load_failed")
+        return
+    if not names:
+        src.reply("home.empty")
+        return
+    src.reply(", ".join(names))
 
 
 async def _testing_async_tpr_command(src: CommandSource, ctx: CommandContext):
@@ -199,16 +403,16 @@ def _testing_tpa_command(src: CommandSource, ctx: CommandContext):
     source_player: str | None = None  # pyright: ignore[reportRedeclaration, reportAssignmentType] # noqa: E501
     if not player:
         raise CommandSyntaxError("failed to parse argument `player`.")
-    if not GetInfo.is_player_online(player):
+    if target and not src.has_permission_higher_than(3):
+        src.reply("permission_denied")
+        return
+    online: dict[str, bool] = GetInfo.are_players_online(
+        [player, target] if target else [player]
+    ) or {}
+    if not online or not all(online.values()):
         src.reply("player_offline")
         return
     if target:
-        if not src.has_permission_higher_than(3):
-            src.reply("permission_denied")
-            return
-        if not GetInfo.is_player_online(target):
-            src.reply("player_offline")
-            return
         tpa_request: TeleportBetweenPlayers = TeleportAsk(  # pyright: ignore[reportRedeclaration] # noqa: E501
             ExecSource("player", target)
         )
@@ -265,12 +469,37 @@ def _debug_on_locate_player(src: CommandSource, ctx: CommandContext):
             src.reply("Failed to locate player.")
 
 
+def _debug_on_rcon_stats(src: CommandSource, ctx: CommandContext):
+    if not runtime.rcon:
+        src.reply("rcon.not_running")
+        return
+    for key, value in runtime.rcon.get_stats().items():
+        src.reply(f"{key}: {value}")
+
+
+def _debug_on_dispatch_stats(src: CommandSource, ctx: CommandContext):
+    if not runtime.dispatcher:
+        src.reply("dispatch.not_running")
+        return
+    for key, value in runtime.dispatcher.get_stats().items():
+        src.reply(f"{key}: {value}")
+
+
+def _debug_on_data_stats(src: CommandSource, ctx: CommandContext):
+    if not runtime.data_mgr:
+        src.reply("data.not_initialized")
+        return
+    for key, value in runtime.data_mgr.get_stats().items():
+        src.reply(f"{key}: {value}")
+
+
 def _debug_on_query_player_death(src: CommandSource, ctx: CommandContext):
     player = get_player(src, ctx)
     if player:
-        death_position: MCPosition | None = runtime.latest_death_positions.get(
-            player, None
-        )
+        if not runtime.death_mgr:
+            src.reply("back.not_running")
+            return
+        death_position: MCPosition | None = runtime.death_mgr.get(player)
         if not death_position:
             src.reply("query.no_results")
             return
@@ -299,6 +528,60 @@ def _debug_on_teleport_player(src: CommandSource, ctx: CommandContext):
         return
 
 
+@new_thread("MTPData: migrate")
+def _on_data_migrate(src: CommandSource, ctx: CommandContext):
+    if not src.has_permission(4):
+        src.reply("permission.denied")
+        return
+    if not runtime.data_mgr or not runtime.config:
+        src.reply("data.not_initialized")
+        return
+    server: PluginServerInterface = get_psi(src)
+    backend: str = ctx["backend"]
+    if not is_backend_type(backend):
+        src.reply(f"data.unknown_backend: {backend}")
+        return
+    src.reply("data.migrate.started")
+    try:
+        copied: int = runtime.data_mgr.migrate(backend)
+    except STORAGE_ERRORS as e:
+        src.reply(f"data.migrate.failed: {e}")
+        return
+    server.save_config_simple(
+        config=runtime.config,
+        file_name=__config_path,
+        in_data_folder=True,
+    )
+    src.reply(f"data.migrate.done: {copied}")
+
+
+@new_thread("MTPData: relayout")
+def _on_data_relayout(src: CommandSource, ctx: CommandContext):
+    if not src.has_permission(4):
+        src.reply("permission.denied")
+        return
+    if not runtime.data_mgr or not runtime.config:
+        src.reply("data.not_initialized")
+        return
+    server: PluginServerInterface = get_psi(src)
+    layout: str = ctx["layout"]
+    if not is_layout(layout):
+        src.reply(f"data.unknown_layout: {layout}")
+        return
+    src.reply("data.relayout.started")
+    try:
+        moved: int = runtime.data_mgr.relayout(layout)
+    except STORAGE_ERRORS as e:
+        src.reply(f"data.relayout.failed: {e}")
+        return
+    server.save_config_simple(
+        config=runtime.config,
+        file_name=__config_path,
+        in_data_folder=True,
+    )
+    src.reply(f"data.relayout.done: {moved}")
+
+
 def on_plugin_clean_main_config(src: CommandSource, ctx: CommandContext):
     if not src.has_permission(4):
         src.reply("permission.denied")
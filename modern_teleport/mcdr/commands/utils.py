@@ -31,3 +31,17 @@ def auto_get_player_from_src(
             src.reply("command.argument_too_many")
             return None
         return src.player  # pyright: ignore[reportAttributeAccessIssue]
+
+
+def get_typed_prefix(ctx: CommandContext, argument: str) -> str:
+    """Get what the user has typed for the argument being completed.
+
+    Args:
+        ctx (CommandContext): Provided by MCDReforged when suggesting, \
+            the partial argument is already parsed into it.
+        argument (str): The argument name.
+
+    Returns:
+        str: The partial argument, empty if nothing is typed yet.
+    """
+    return str(ctx.get(argument, ""))
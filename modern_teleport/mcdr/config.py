@@ -32,6 +32,12 @@ class DataStorage(Serializable):
     save_to_world: bool = False
     server_dir: str = ""
     world_name: str = "world"
+    backend: Literal["json", "sqlite"] = "json"
+    sqlite_file: str = "data.db"
+    layout: Literal["flat", "sharded"] = "flat"
+    max_documents: int = 4096
+    flush_interval: float = 5
+    flush_threshold: int = 64
 
 
 class OptionalAPIs(Serializable):
@@ -39,21 +45,68 @@ class OptionalAPIs(Serializable):
     minecraft_data_api: bool = False
 
 
+class RconOptions(Serializable):
+    queue_size: int = 64
+    async_pool_size: int = 2
+    result_window: float = 0.2
+    adaptive_timeout: bool = True
+    min_wait: float = 0.1
+    reconnect_after: int = 3
+    breaker_threshold: int = 5
+    breaker_cooldown: float = 10
+    reconcile_interval: float = 60
+
+
+class BackOptions(Serializable):
+    max_deaths: int = 1024
+    history_size: int = 16
+    max_histories: int = 1024
+    origin_max_age: float = 1
+
+
+class HomeOptions(Serializable):
+    max_homes: int = 10
+    max_players: int = 1024
+
+
+class DispatchOptions(Serializable):
+    tick: float = 0.05
+    budget: int = 8
+
+
+class RateLimit(Serializable):
+    enable: bool = True
+    player_rate: float = 0.2
+    player_burst: float = 3
+    global_rate: float = 5
+    global_burst: float = 20
+    max_players: int = 1024
+
+
 class TimeoutManager(Serializable):
     rcon_wait: float = 0.5
     rcon_failed: float = 5
     teleport: float = 120
+    group_teleport: float = 30
+    unload: float = 5
 
 
 class MainConfig(Serializable):
     enable: bool = False
     enable_modules: PluginModules = PluginModules()
     identity_mode: Literal["name", "uuid"] = "name"
+    identity_cache_size: int = 4096
     rcon_support: bool = False
     rcon_module: Literal["mcdr", "async_rcon"] = "mcdr"
     rcon_feedback: bool = True
+    rcon_options: RconOptions = RconOptions()
+    dispatch_options: DispatchOptions = DispatchOptions()
     timeout: TimeoutManager = TimeoutManager()
+    rate_limit: RateLimit = RateLimit()
     location_marker_as_warp: bool = False
+    suggestion_limit: int = 50
+    back_options: BackOptions = BackOptions()
+    home_options: HomeOptions = HomeOptions()
     optional_apis: OptionalAPIs = OptionalAPIs()
     data_storage: DataStorage = DataStorage()
 
@@ -1,16 +1,28 @@
+import time
 import modern_teleport.runtime as runtime
 
+from collections.abc import Container
+from typing import Any
 from mcdreforged.api.all import (
     PluginServerInterface,
     CommandSource,
     new_thread,
 )
-from auto_uuid_api import is_uuid, local_api
+from auto_uuid_api import is_uuid
 from location_api import Point3D, MCPosition
-from modern_teleport.utils import Player, execute_if
+from modern_teleport.utils import execute_if
+from modern_teleport.utils.identity import identity_cache
+from modern_teleport.utils.rate_limit import RateLimiter
+from modern_teleport.modules.back import BacktrackManager, DeathManager
+from modern_teleport.modules.dispatcher import CommandDispatcher
+from modern_teleport.modules.home import HomeManager
+from modern_teleport.modules.players import OnlinePlayers
 from modern_teleport.modules.rcon import RconManager
 from modern_teleport.modules.storage import DataManager
-from modern_teleport.modules.tpmanager_async import SessionManager
+from modern_teleport.modules.tpmanager_async import (
+    SessionManager,
+    cancel_exported_requests,
+)
 
 
 @execute_if(
@@ -18,9 +30,52 @@ from modern_teleport.modules.tpmanager_async import SessionManager
 )
 def init_modules():
     assert runtime.server is not None
-    runtime.rcon = RconManager(runtime.server)
+    assert runtime.config is not None
+    runtime.rcon = RconManager(runtime.server, runtime.config.rcon_module)
     runtime.data_mgr = DataManager(runtime.server)
+    runtime.dispatcher = CommandDispatcher(
+        runtime.server,
+        runtime.config.dispatch_options.tick,
+        runtime.config.dispatch_options.budget,
+    )
+    back_options = runtime.config.back_options
+    runtime.backtrack_mgr = BacktrackManager(
+        runtime.server,
+        back_options.history_size,
+        back_options.max_histories,
+    )
+    runtime.death_mgr = DeathManager(
+        runtime.server,
+        runtime.data_mgr,
+        GetInfo.get_player_position,
+        back_options.max_deaths,
+        runtime.backtrack_mgr,
+        GetInfo.get_all_positions,
+    )
+    home_options = runtime.config.home_options
+    runtime.home_mgr = HomeManager(
+        runtime.server,
+        runtime.data_mgr,
+        home_options.max_homes,
+        home_options.max_players,
+    )
     runtime.async_tp_mgr = SessionManager(runtime.server)
+    rate_limit = runtime.config.rate_limit
+    if rate_limit.enable:
+        runtime.async_tp_mgr.rate_limiter = RateLimiter(
+            rate_limit.player_rate,
+            rate_limit.player_burst,
+            rate_limit.global_rate,
+            rate_limit.global_burst,
+            rate_limit.max_players,
+        )
+    identity_cache.configure(runtime.config.identity_cache_size)
+    runtime.online_players = OnlinePlayers(
+        runtime.server, GetInfo.fetch_online_list
+    )
+    runtime.online_players.start_reconcile(
+        runtime.config.rcon_options.reconcile_interval
+    )
     runtime.server.logger.info("modules.initialized")
 
 
@@ -28,23 +83,113 @@ def init_modules():
     lambda: runtime.server is not None and runtime.config is not None, True
 )
 def init_online_players(s: PluginServerInterface):
-    _online_players = GetInfo.get_online_list()
-    online_players: list[Player] = []
-    if _online_players:
-        for i in _online_players:
-            uuid: str | None = local_api.get(i)
-            if not uuid:
-                raise ValueError(f"uuid not found for {i}")
-            player = Player(i, uuid)
-            online_players.append(player)
-    runtime.rcon_online_players = online_players
+    if runtime.online_players is None:
+        return
+    _online_players: list[str] | None = GetInfo.fetch_online_list()
+    if _online_players is None:
+        # nothing to ask, only players joining from now on are known
+        s.logger.warning("players.join_leave_only")
+        _online_players = []
+    runtime.online_players.seed(_online_players)
 
 
-@execute_if(
-    lambda: runtime.config is not None
-    and runtime.config.optional_apis.online_player_api
-)
-def get_online_players_optional(s: PluginServerInterface) -> list[str] | None:
+def export_state(timeout: float = 5) -> dict[str, Any]:
+    """Export in-memory state as plain data, so it survives a plugin \
+    reload. Pending teleport requests are handed over silently.
+
+    Args:
+        timeout (float, optional): Max seconds to wait for the session \
+            manager. Defaults to 5.
+
+    Returns:
+        dict[str, Any]: The state, restore it with `import_state`.
+    """
+    state: dict[str, Any] = {
+        "exported_at": time.monotonic(),
+        "death_positions": (
+            runtime.death_mgr.export() if runtime.death_mgr else {}
+        ),
+        "back_history": (
+            runtime.backtrack_mgr.export() if runtime.backtrack_mgr else {}
+        ),
+    }
+    online_players: OnlinePlayers | None = runtime.get_online_players()
+    if online_players is not None:
+        state["online_players"] = online_players.get_names()
+    if runtime.async_tp_mgr:
+        try:
+            state["teleport_requests"] = (
+                runtime.async_tp_mgr.export_requests().result(timeout)
+            )
+        except TimeoutError:
+            if runtime.server:
+                runtime.server.logger.warning("tpr.export_timeout")
+    return state
+
+
+def import_state(state: dict[str, Any]):
+    """Restore state exported by `export_state` before a reload.
+
+    Args:
+        state (dict[str, Any]): The exported state.
+    """
+    assert runtime.server is not None
+    if runtime.death_mgr:
+        runtime.death_mgr.restore(state.get("death_positions", {}))
+    if runtime.backtrack_mgr:
+        runtime.backtrack_mgr.restore(state.get("back_history", {}))
+    online: list[str] | None = state.get("online_players")
+    if (
+        runtime.online_players is not None
+        and runtime.server.is_server_startup()
+    ):
+        if online is not None:
+            runtime.online_players.seed(online)
+        else:
+            init_online_players(runtime.server)
+    # taken out so the unloaded plugin does not cancel them as well
+    requests: dict[str, list[dict[str, Any]]] | None = state.pop(
+        "teleport_requests", None
+    )
+    if runtime.async_tp_mgr and requests:
+        elapsed: float = time.monotonic() - state.get(
+            "exported_at", time.monotonic()
+        )
+        for i in requests.values():
+            for j in i:
+                j["remaining"] -= elapsed
+        runtime.async_tp_mgr.import_requests(requests)
+
+
+def discard_state(state: dict[str, Any]):
+    """Cancel teleport requests of a state exported by `export_state` \
+    which no reloaded plugin took over, so players are told and group \
+    tags are removed.
+
+    Args:
+        state (dict[str, Any]): The exported state.
+    """
+    requests: dict[str, list[dict[str, Any]]] | None = state.pop(
+        "teleport_requests", None
+    )
+    if runtime.server and requests:
+        cancel_exported_requests(runtime.server, requests)
+
+
+def get_rcon() -> RconManager | None:
+    """Get the rcon manager if rcon can be queried now.
+
+    Returns:
+        RconManager | None: None if rcon is off or not running.
+    """
+    if runtime.rcon and runtime.rcon.is_available():
+        return runtime.rcon
+    return None
+
+
+def get_online_players_from_api(
+    s: PluginServerInterface,
+) -> list[str] | None:
     oapi = s.get_plugin_instance("online_player_api")  # type: ignore
     if oapi:
         return oapi.get_player_list()  # type: ignore
@@ -52,9 +197,13 @@ def get_online_players_optional(s: PluginServerInterface) -> list[str] | None:
 
 @execute_if(
     lambda: runtime.config is not None
-    and runtime.config.optional_apis.minecraft_data_api
+    and runtime.config.optional_apis.online_player_api
 )
-def get_player_pos_optional(
+def get_online_players_optional(s: PluginServerInterface) -> list[str] | None:
+    return get_online_players_from_api(s)
+
+
+def get_player_pos_from_api(
     s: PluginServerInterface, player: str
 ) -> MCPosition | None:
     mc_data_api = s.get_plugin_instance("minecraft_data_api")  # type: ignore
@@ -71,6 +220,38 @@ def get_player_pos_optional(
             return MCPosition(Point3D(*position), dimension)
 
 
+@execute_if(
+    lambda: runtime.config is not None
+    and runtime.config.optional_apis.minecraft_data_api
+)
+def get_player_pos_optional(
+    s: PluginServerInterface, player: str
+) -> MCPosition | None:
+    return get_player_pos_from_api(s, player)
+
+
+def match_online_players(
+    players: list[str], online: Container[str]
+) -> dict[str, bool]:
+    """Check players against online names, resolving all uuids at once.
+
+    Args:
+        players (list[str]): Player names or uuids.
+        online (Container[str]): Lowercase online player names.
+
+    Returns:
+        dict[str, bool]: Whether each given player is online.
+    """
+    names: dict[str, str | None] = identity_cache.resolve_many(
+        [i for i in players if is_uuid(i)]
+    )
+    result: dict[str, bool] = {}
+    for i in players:
+        name: str | None = names.get(i, i)
+        result[i] = name is not None and name.lower() in online
+    return result
+
+
 class GetInfo:
     def __init__(self):
         pass
@@ -91,12 +272,30 @@ class GetInfo:
     @classmethod
     @execute_if(lambda: runtime.server is not None, True)
     def get_online_list(cls) -> list[str]:
+        online_players: OnlinePlayers | None = runtime.get_online_players()
+        if online_players is not None:
+            return online_players.get_names()
+        return cls.fetch_online_list() or []
+
+    @classmethod
+    @execute_if(lambda: runtime.server is not None, True)
+    def fetch_online_list(cls) -> list[str] | None:
+        """Ask the server for online players, bypassing the registry.
+
+        Returns:
+            list[str] | None: None if no source is available.
+        """
         assert runtime.server is not None
         result: list[str] | None = get_online_players_optional(runtime.server)
-        if not result:
-            if runtime.rcon:
-                result = runtime.rcon.get_online_players()
-        return result if result is not None else []
+        if result:
+            return result
+        rcon: RconManager | None = get_rcon()
+        if rcon:
+            try:
+                return rcon.get_online_players()
+            except (RuntimeError, TimeoutError) as e:
+                runtime.server.logger.warning(f"rcon.query_failed: {e}")
+        return get_online_players_from_api(runtime.server)
 
     @classmethod
     @execute_if(lambda: runtime.server is not None, True)
@@ -104,15 +303,68 @@ class GetInfo:
         assert runtime.server is not None
         _player: str | None = player
         if is_uuid(player):
-            _player = local_api.get(player)
+            _player = identity_cache.get_name(player)
         if _player:
-            online_players: list[str] | None = get_online_players_optional(
-                runtime.server
-            )
-            if not online_players:
-                if runtime.rcon:
-                    online_players = runtime.rcon.get_online_players()
-                return (_player in online_players) if online_players else False
+            registry: OnlinePlayers | None = runtime.get_online_players()
+            if registry is not None:
+                return _player in registry
+            online_players: list[str] = cls.get_online_list()
+            return _player in online_players
+        return False
+
+    @classmethod
+    @execute_if(lambda: runtime.server is not None, True)
+    def are_players_online(cls, players: list[str]) -> dict[str, bool]:
+        """Check several players with one online list lookup.
+
+        Args:
+            players (list[str]): Player names or uuids.
+
+        Returns:
+            dict[str, bool]: Whether each given player is online.
+        """
+        online: Container[str] | None = runtime.get_online_players()
+        if online is None:
+            online = {i.lower() for i in cls.get_online_list()}
+        return match_online_players(players, online)
+
+    @classmethod
+    async def async_are_players_online(
+        cls, players: list[str]
+    ) -> dict[str, bool]:
+        online: Container[str] | None = runtime.get_online_players()
+        if online is None:
+            online = {i.lower() for i in await cls.async_get_online_list()}
+        return match_online_players(players, online)
+
+    @classmethod
+    async def async_get_online_list(cls) -> list[str]:
+        assert runtime.server is not None
+        online_players: OnlinePlayers | None = runtime.get_online_players()
+        if online_players is not None:
+            return online_players.get_names()
+        result: list[str] | None = get_online_players_optional(runtime.server)
+        rcon: RconManager | None = get_rcon()
+        if not result and rcon:
+            try:
+                result = await rcon.async_get_online_players()
+            except (RuntimeError, TimeoutError) as e:
+                runtime.server.logger.warning(f"rcon.query_failed: {e}")
+        if not result:
+            result = get_online_players_from_api(runtime.server)
+        return result if result is not None else []
+
+    @classmethod
+    async def async_is_player_online(cls, player: str) -> bool:
+        _player: str | None = player
+        if is_uuid(player):
+            _player = identity_cache.get_name(player)
+        if _player:
+            registry: OnlinePlayers | None = runtime.get_online_players()
+            if registry is not None:
+                return _player in registry
+            online_players: list[str] = await cls.async_get_online_list()
+            return _player in online_players
         return False
 
     @classmethod
@@ -122,11 +374,27 @@ class GetInfo:
         position: MCPosition | None = get_player_pos_optional(
             runtime.server, player
         )
+        rcon: RconManager | None = get_rcon()
+        if not position and rcon:
+            try:
+                position = rcon.get_player_pos(player)
+            except (RuntimeError, TimeoutError) as e:
+                runtime.server.logger.warning(f"rcon.query_failed: {e}")
         if not position:
-            if runtime.rcon:
-                position = runtime.rcon.get_player_pos(player)
+            position = get_player_pos_from_api(runtime.server, player)
         return position
 
+    @classmethod
+    @execute_if(lambda: runtime.server is not None, True)
+    def get_all_positions(cls) -> dict[str, MCPosition]:
+        rcon: RconManager | None = get_rcon()
+        if rcon:
+            try:
+                return rcon.get_all_positions()
+            except (RuntimeError, TimeoutError):
+                pass
+        return {}
+
 
 if __name__ == "__main__":
     print("Core module of MTP(modern_teleport).")
@@ -0,0 +1,335 @@
+import asyncio
+import struct
+
+from location_api import MCPosition
+
+from modern_teleport.modules.rcon_parser import (
+    get_player_pos_command,
+    parse_online_players,
+    parse_player_pos,
+)
+
+PACKET_RESPONSE = 0
+PACKET_COMMAND = 2
+PACKET_AUTH_RESPONSE = 2
+PACKET_AUTH = 3
+# Minecraft answers unknown packet types in order, so a packet of this type
+# sent right after a command marks the end of the command's response.
+PACKET_SENTINEL = 100
+
+
+class RconAuthError(ConnectionError):
+    pass
+
+
+def pack_packet(request_id: int, packet_type: int, body: str) -> bytes:
+    """Build a Source RCON packet.
+
+    Args:
+        request_id (int): The request id.
+        packet_type (int): The packet type.
+        body (str): The packet body.
+
+    Returns:
+        bytes: The packet bytes including the length prefix.
+    """
+    payload: bytes = (
+        struct.pack("<ii", request_id, packet_type)
+        + body.encode("utf-8")
+        + b"\x00\x00"
+    )
+    return struct.pack("<i", len(payload)) + payload
+
+
+async def read_packet(
+    reader: asyncio.StreamReader,
+) -> tuple[int, int, str]:
+    """Read a Source RCON packet.
+
+    Args:
+        reader (asyncio.StreamReader): The stream to read from.
+
+    Returns:
+        tuple[int, int, str]: The request id, type and body of the packet.
+    """
+    (length,) = struct.unpack("<i", await reader.readexactly(4))
+    payload: bytes = await reader.readexactly(length)
+    request_id, packet_type = struct.unpack("<ii", payload[:8])
+    return request_id, packet_type, payload[8:-2].decode("utf-8", "replace")
+
+
+class PendingResponse:
+    """Fragments of a response which is not finished yet.
+    """
+    def __init__(self, future: asyncio.Future[str]):
+        self.future: asyncio.Future[str] = future
+        self.fragments: list[str] = []
+
+
+class AsyncRconConnection:
+    """A single rcon connection which multiplexes requests by request id.
+    """
+    def __init__(self, host: str, port: int, password: str):
+        """Init an rcon connection, call `connect` before using it.
+
+        Args:
+            host (str): The rcon host.
+            port (int): The rcon port.
+            password (str): The rcon password.
+        """
+        self.host: str = host
+        self.port: int = port
+        self.password: str = password
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+        self.pending: dict[int, PendingResponse] = {}
+        self.sentinels: dict[int, int] = {}
+        self._next_id: int = 0
+        self._read_task: asyncio.Task | None = None
+
+    @property
+    def connected(self) -> bool:
+        return self._read_task is not None and not self._read_task.done()
+
+    def _new_id(self) -> int:
+        self._next_id = self._next_id % 0x7FFFFFFF + 1
+        return self._next_id
+
+    async def connect(self):
+        """Open the connection and authenticate.
+
+        Raises:
+            RconAuthError: If the password is rejected.
+        """
+        self.reader, self.writer = await asyncio.open_connection(
+            self.host, self.port
+        )
+        auth_id: int = self._new_id()
+        self.writer.write(pack_packet(auth_id, PACKET_AUTH, self.password))
+        await self.writer.drain()
+        while True:
+            request_id, packet_type, _ = await read_packet(self.reader)
+            if packet_type != PACKET_AUTH_RESPONSE:
+                continue
+            if request_id == -1:
+                await self.close()
+                raise RconAuthError("rcon.auth_failed")
+            break
+        self._read_task = asyncio.create_task(self._read_loop())
+
+    async def close(self):
+        """Close the connection, pending requests will fail.
+        """
+        if self._read_task:
+            self._read_task.cancel()
+            self._read_task = None
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+            self.writer = None
+        self._fail_pending(ConnectionError("rcon.connection_closed"))
+
+    def _fail_pending(self, error: Exception):
+        for i in self.pending.values():
+            if not i.future.done():
+                i.future.set_exception(error)
+        self.pending.clear()
+        self.sentinels.clear()
+
+    async def _read_loop(self):
+        assert self.reader is not None
+        try:
+            while True:
+                request_id, _, body = await read_packet(self.reader)
+                if request_id in self.sentinels:
+                    pending_id: int = self.sentinels.pop(request_id)
+                    done: PendingResponse | None = self.pending.pop(
+                        pending_id, None
+                    )
+                    if done and not done.future.done():
+                        done.future.set_result("".join(done.fragments))
+                    continue
+                pending: PendingResponse | None = self.pending.get(
+                    request_id
+                )
+                if pending:
+                    pending.fragments.append(body)
+        except (asyncio.IncompleteReadError, ConnectionError, OSError) as e:
+            self._fail_pending(ConnectionError(f"rcon.connection_lost: {e}"))
+
+    def send_many(self, commands: list[str]) -> list[asyncio.Future[str]]:
+        """Write several commands at once without waiting for replies.
+
+        Args:
+            commands (list[str]): The commands to send.
+
+        Raises:
+            ConnectionError: If the connection is not open.
+
+        Returns:
+            list[asyncio.Future[str]]: Futures of the replies, in order.
+        """
+        if not self.connected or not self.writer:
+            raise ConnectionError("rcon.not_connected")
+        loop = asyncio.get_running_loop()
+        futures: list[asyncio.Future[str]] = []
+        data: list[bytes] = []
+        for command in commands:
+            request_id: int = self._new_id()
+            sentinel_id: int = self._new_id()
+            future: asyncio.Future[str] = loop.create_future()
+            self.pending[request_id] = PendingResponse(future)
+            self.sentinels[sentinel_id] = request_id
+            data.append(pack_packet(request_id, PACKET_COMMAND, command))
+            data.append(pack_packet(sentinel_id, PACKET_SENTINEL, ""))
+            futures.append(future)
+        self.writer.write(b"".join(data))
+        return futures
+
+    def discard(self, futures: list[asyncio.Future[str]]):
+        """Stop waiting for replies, like after a timeout, without \
+        failing other requests on the connection. Replies which arrive \
+        later are ignored.
+
+        Args:
+            futures (list[asyncio.Future[str]]): Futures returned by \
+                `send_many`.
+        """
+        dropped: set[int] = {
+            request_id
+            for request_id, pending in self.pending.items()
+            if pending.future in futures
+        }
+        for request_id in dropped:
+            del self.pending[request_id]
+        self.sentinels = {
+            k: v for k, v in self.sentinels.items() if v not in dropped
+        }
+
+
+class AsyncRconClient:
+    """Asyncio rcon client with a small pool of multiplexed connections.
+    """
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        password: str,
+        pool_size: int = 2,
+        timeout: float = 5,
+        loop: asyncio.AbstractEventLoop | None = None,
+    ):
+        """Init async rcon client, connections are opened on first use.
+
+        Args:
+            host (str): The rcon host.
+            port (int): The rcon port.
+            password (str): The rcon password.
+            pool_size (int, optional): Max connections kept open. \
+                Defaults to 2.
+            timeout (float, optional): Seconds to wait for a reply. \
+                Defaults to 5.
+            loop (asyncio.AbstractEventLoop | None, optional): The event \
+                loop the connections live on. Defaults to None, the loop \
+                of the first query.
+        """
+        self.host: str = host
+        self.port: int = port
+        self.password: str = password
+        self.pool_size: int = max(1, pool_size)
+        self.timeout: float = timeout
+        self.connections: list[AsyncRconConnection] = []
+        self.loop: asyncio.AbstractEventLoop | None = loop
+        self._connecting: asyncio.Lock | None = None
+
+    async def _get_connection(self) -> AsyncRconConnection:
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+        elif asyncio.get_running_loop() is not self.loop:
+            # streams can not be used from another loop
+            raise RuntimeError("rcon.async_rcon.other_loop")
+        self.connections = [i for i in self.connections if i.connected]
+        if self.connections:
+            idle: AsyncRconConnection = min(
+                self.connections, key=lambda i: len(i.pending)
+            )
+            if not idle.pending or len(self.connections) >= self.pool_size:
+                return idle
+        if self._connecting is None:
+            self._connecting = asyncio.Lock()
+        async with self._connecting:
+            if len(self.connections) >= self.pool_size:
+                return min(self.connections, key=lambda i: len(i.pending))
+            connection = AsyncRconConnection(
+                self.host, self.port, self.password
+            )
+            await connection.connect()
+            self.connections.append(connection)
+            return connection
+
+    async def get_many(
+        self, commands: list[str], timeout: float | None = None
+    ) -> list[str]:
+        """Send several commands in one write on a single connection, \
+        so they cost one round trip.
+
+        Args:
+            commands (list[str]): The commands to send.
+            timeout (float | None, optional): Seconds to wait for the \
+                replies. Defaults to None, the client timeout.
+
+        Raises:
+            TimeoutError: If the replies do not arrive in time.
+
+        Returns:
+            list[str]: The replies, in order.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        for retry in (False, True):
+            connection: AsyncRconConnection = await self._get_connection()
+            try:
+                futures = connection.send_many(commands)
+                return list(
+                    await asyncio.wait_for(
+                        asyncio.gather(*futures), timeout
+                    )
+                )
+            except ConnectionError:
+                await connection.close()
+                if retry:
+                    raise
+            except TimeoutError:
+                connection.discard(futures)
+                raise TimeoutError("rcon.no_response")
+        return []
+
+    async def get(self, command: str) -> str:
+        """Send a command and wait for its reply.
+
+        Args:
+            command (str): The command to send.
+
+        Returns:
+            str: The reply.
+        """
+        return (await self.get_many([command]))[0]
+
+    async def get_online_players(self) -> list[str] | None:
+        return parse_online_players(await self.get("list"))
+
+    async def get_player_pos(self, player: str) -> MCPosition | None:
+        return parse_player_pos(
+            await self.get(get_player_pos_command(player))
+        )
+
+    async def close(self):
+        """Close all connections.
+        """
+        for i in self.connections:
+            await i.close()
+        self.connections.clear()
+
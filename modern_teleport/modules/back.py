@@ -1,9 +1,550 @@
-# import modern_teleport.runtime as runtime
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from collections.abc import Callable
+from enum import IntEnum
+from typing import NamedTuple
+
+from location_api import MCPosition, Point3D
+from mcdreforged.api.all import PluginServerInterface
+
+from modern_teleport import runtime
+from modern_teleport.modules.storage import MTP, DataManager
+from modern_teleport.modules.storage_backend import STORAGE_ERRORS
+
+
+def position_to_data(position: MCPosition) -> dict:
+    return {
+        "x": position.point.x,
+        "y": position.point.y,
+        "z": position.point.z,
+        "dimension": position.dimension,
+    }
+
+
+def position_from_data(data: dict) -> MCPosition:
+    return MCPosition(
+        Point3D(data["x"], data["y"], data["z"]), data["dimension"]
+    )
+
+
+def evict_offline(players: OrderedDict, max_size: int) -> int:
+    """Drop the least recently used offline players until at most \
+    `max_size` are left, online players are never dropped.
+
+    Args:
+        players (OrderedDict): Lower-case player names to anything, in \
+            LRU order.
+        max_size (int): Max players kept.
+
+    Returns:
+        int: How many players were dropped.
+    """
+    overflow: int = len(players) - max_size
+    if overflow <= 0:
+        return 0
+    evicted: int = 0
+    online_players = runtime.get_online_players()
+    for key in list(players):
+        if evicted >= overflow:
+            break
+        if online_players is not None and key in online_players:
+            continue
+        del players[key]
+        evicted += 1
+    return evicted
 
 
 class DeathManager:
-    pass
+    """Latest death positions of players.
+
+    At most `max_size` players are kept in memory, the least recently \
+    used offline players are evicted first. Changes go to the `MTP.BACK` \
+    document of each player, the data manager writes them to disk later.
+
+    Deaths are located by one worker thread, players who died at about \
+    the same time are located with a single query when `locate_all` is \
+    given.
+    """
+    def __init__(
+        self,
+        server: PluginServerInterface,
+        data_mgr: DataManager | None,
+        locate: Callable[[str], MCPosition | None],
+        max_size: int = 1024,
+        backtrack: "BacktrackManager | None" = None,
+        locate_all: Callable[[], dict[str, MCPosition]] | None = None,
+    ):
+        """Init death manager.
+
+        Args:
+            server (PluginServerInterface): MCDReforged plugin server \
+                interface.
+            data_mgr (DataManager | None): Used to persist positions, \
+                they are kept in memory only if None.
+            locate (Callable[[str], MCPosition | None]): Get the current \
+                position of a player.
+            max_size (int, optional): Max players kept in memory. \
+                Defaults to 1024.
+            backtrack (BacktrackManager | None, optional): Deaths are \
+                also pushed to its back history if given. Defaults to None.
+            locate_all (Callable[[], dict[str, MCPosition]] | None, \
+                optional): Get positions of all online players, used when \
+                several deaths wait, players it misses fall back to \
+                `locate`. Defaults to None.
+        """
+        self.server: PluginServerInterface = server
+        self.s = self.server  # alias
+        self.data_mgr: DataManager | None = data_mgr
+        self.locate: Callable[[str], MCPosition | None] = locate
+        self.max_size: int = max(1, max_size)
+        self.backtrack: BacktrackManager | None = backtrack
+        self.locate_all: Callable[[], dict[str, MCPosition]] | None = (
+            locate_all
+        )
+        self._deaths: list[str] = []
+        self._worker: threading.Thread | None = None
+        self._positions: OrderedDict[str, tuple[str, MCPosition]] = (
+            OrderedDict()
+        )
+        self._lock: threading.RLock = threading.RLock()
+        self.evicted: int = 0
+        self.loaded: int = 0
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def get(self, player: str, load: bool = True) -> MCPosition | None:
+        """Get the latest death position of a player.
+
+        Args:
+            player (str): The player name.
+            load (bool, optional): Read the data file if the player is \
+                not in memory. Defaults to True.
+
+        Returns:
+            MCPosition | None: None if the player has not died yet.
+        """
+        key: str = player.lower()
+        with self._lock:
+            cached: tuple[str, MCPosition] | None = self._positions.get(key)
+            if cached:
+                self._positions.move_to_end(key)
+                return cached[1]
+        if not load or not self.data_mgr:
+            return None
+        position: MCPosition | None = self._load(player)
+        if position:
+            with self._lock:
+                if key not in self._positions:
+                    self._positions[key] = (player, position)
+                    self._evict()
+                self.loaded += 1
+        return position
+
+    def _load(self, player: str) -> MCPosition | None:
+        assert self.data_mgr is not None
+        try:
+            data: dict = self.data_mgr.read(MTP.BACK, player)
+            if data.get("death"):
+                return position_from_data(data["death"])
+        except (KeyError, RuntimeError, TypeError, *STORAGE_ERRORS) as e:
+            self.s.logger.warning(f"back.load_failed: {player}: {e}")
+        return None
+
+    def record(self, player: str, position: MCPosition):
+        """Set the latest death position of a player.
+
+        Args:
+            player (str): The player name.
+            position (MCPosition): Where the player died.
+        """
+        key: str = player.lower()
+        with self._lock:
+            self._positions[key] = (player, position)
+            self._positions.move_to_end(key)
+            self._evict()
+        if not self.data_mgr:
+            return
+        try:
+            with self.data_mgr.edit(MTP.BACK, player) as data:
+                data["death"] = position_to_data(position)
+        except (RuntimeError, TypeError, *STORAGE_ERRORS) as e:
+            self.s.logger.error(f"back.save_failed: {player}: {e}")
+
+    def capture(self, player: str):
+        """Locate a player who just died and record the position, in \
+        the worker thread so death events are not blocked.
+
+        Args:
+            player (str): The player name.
+        """
+        with self._lock:
+            self._deaths.append(player)
+            if self._worker is not None:
+                return
+            self._worker = threading.Thread(
+                target=self._locate_deaths,
+                name="MTPBack: locate",
+                daemon=True,
+            )
+            self._worker.start()
+
+    def _locate_deaths(self):
+        try:
+            while True:
+                with self._lock:
+                    players: list[str] = self._deaths
+                    self._deaths = []
+                    if not players:
+                        # deaths captured from now on start a new worker
+                        self._worker = None
+                        return
+                self._locate(players)
+        finally:
+            with self._lock:
+                if self._worker is threading.current_thread():
+                    self._worker = None
+
+    def _locate(self, players: list[str]):
+        positions: dict[str, MCPosition] = {}
+        if len(players) > 1 and self.locate_all:
+            found: dict[str, MCPosition] = {
+                name.lower(): position
+                for name, position in self.locate_all().items()
+            }
+            positions = {
+                i: found[i.lower()] for i in players if i.lower() in found
+            }
+        for player in players:
+            position: MCPosition | None = positions.get(player)
+            if position is None:
+                position = self.locate(player)
+            if position:
+                self.record(player, position)
+                if self.backtrack:
+                    self.backtrack.record(player, position, BackKind.DEATH)
+
+    def _evict(self):
+        self.evicted += evict_offline(self._positions, self.max_size)
+
+    def export(self) -> dict[str, dict]:
+        with self._lock:
+            return {
+                name: position_to_data(position)
+                for name, position in self._positions.values()
+            }
+
+    def restore(self, data: dict[str, dict]):
+        with self._lock:
+            for name, position in data.items():
+                self._positions[name.lower()] = (
+                    name,
+                    position_from_data(position),
+                )
+            self._evict()
+
+    def get_stats(self) -> dict[str, int]:
+        return {
+            "cached": len(self._positions),
+            "loaded": self.loaded,
+            "evicted": self.evicted,
+        }
+
+
+class BackKind(IntEnum):
+    TELEPORT = 0
+    DEATH = 1
+
+
+class BackEntry(NamedTuple):
+    position: MCPosition
+    time: float
+    kind: BackKind
+
+
+class DimensionTable:
+    """Dimension names interned as small integer ids.
+    """
+    def __init__(self):
+        self._ids: dict[str, int] = {}
+        self._names: list[str] = []
+        self._lock: threading.Lock = threading.Lock()
+
+    def get_id(self, dimension: str) -> int:
+        dimension_id: int | None = self._ids.get(dimension)
+        if dimension_id is None:
+            with self._lock:
+                dimension_id = self._ids.setdefault(
+                    dimension, len(self._names)
+                )
+                if dimension_id == len(self._names):
+                    self._names.append(dimension)
+        return dimension_id
+
+    def get_name(self, dimension_id: int) -> str:
+        return self._names[dimension_id]
+
+
+class BackHistory:
+    """Fixed-capacity ring buffer of back positions, stored in flat \
+    arrays so pushing and popping allocate nothing.
+    """
+    __slots__ = (
+        "capacity",
+        "coords",
+        "dimensions",
+        "head",
+        "kinds",
+        "size",
+        "times",
+    )
+
+    def __init__(self, capacity: int):
+        """Init back history, all memory is allocated here.
+
+        Args:
+            capacity (int): Max entries kept, older ones are overwritten.
+        """
+        self.capacity: int = max(1, capacity)
+        self.coords: array[float] = array("d", bytes(24 * self.capacity))
+        self.times: array[float] = array("d", bytes(8 * self.capacity))
+        self.dimensions: array[int] = array("I", bytes(4 * self.capacity))
+        self.kinds: array[int] = array("B", bytes(self.capacity))
+        self.head: int = 0
+        self.size: int = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def push(
+        self,
+        x: float,
+        y: float,
+        z: float,
+        dimension_id: int,
+        timestamp: float,
+        kind: BackKind,
+    ):
+        slot: int = self.head
+        base: int = slot * 3
+        self.coords[base] = x
+        self.coords[base + 1] = y
+        self.coords[base + 2] = z
+        self.dimensions[slot] = dimension_id
+        self.times[slot] = timestamp
+        self.kinds[slot] = kind
+        self.head = (slot + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def slot(self, index: int = 0) -> int:
+        """Get the array slot of an entry.
+
+        Args:
+            index (int, optional): 0 for the newest entry. Defaults to 0.
+
+        Raises:
+            IndexError: If there are not that many entries.
+
+        Returns:
+            int: The slot in the arrays.
+        """
+        if not 0 <= index < self.size:
+            raise IndexError("back.no_history")
+        return (self.head - 1 - index) % self.capacity
+
+    def pop(self) -> int:
+        """Remove the newest entry, its slot stays readable until the next \
+        push.
+
+        Raises:
+            IndexError: If the history is empty.
+
+        Returns:
+            int: The slot of the removed entry.
+        """
+        slot: int = self.slot(0)
+        self.head = slot
+        self.size -= 1
+        return slot
 
 
 class BacktrackManager:
-    pass
+    """Back history of players, their teleport origins and deaths.
+
+    Each player uses a `BackHistory` of the same capacity, histories of \
+    the least recently used offline players are dropped beyond \
+    `max_players`.
+    """
+    def __init__(
+        self,
+        server: PluginServerInterface,
+        capacity: int = 16,
+        max_players: int = 1024,
+    ):
+        """Init backtrack manager.
+
+        Args:
+            server (PluginServerInterface): MCDReforged plugin server \
+                interface.
+            capacity (int, optional): Max entries of each player. \
+                Defaults to 16.
+            max_players (int, optional): Max players kept. \
+                Defaults to 1024.
+        """
+        self.server: PluginServerInterface = server
+        self.s = self.server  # alias
+        self.capacity: int = capacity
+        self.max_players: int = max(1, max_players)
+        self.dimensions: DimensionTable = DimensionTable()
+        self._histories: OrderedDict[str, BackHistory] = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+        self.evicted: int = 0
+
+    def record(
+        self,
+        player: str,
+        position: MCPosition,
+        kind: BackKind = BackKind.TELEPORT,
+        timestamp: float | None = None,
+    ):
+        """Push a position to the back history of a player.
+
+        Args:
+            player (str): The player name.
+            position (MCPosition): The position to go back to.
+            kind (BackKind, optional): Why the position is recorded. \
+                Defaults to BackKind.TELEPORT.
+            timestamp (float | None, optional): When it happened, now if \
+                None. Defaults to None.
+        """
+        key: str = player.lower()
+        dimension_id: int = self.dimensions.get_id(position.dimension)
+        with self._lock:
+            history: BackHistory | None = self._histories.get(key)
+            if history is None:
+                history = BackHistory(self.capacity)
+                self._histories[key] = history
+                self.evicted += evict_offline(
+                    self._histories, self.max_players
+                )
+            else:
+                self._histories.move_to_end(key)
+            history.push(
+                position.point.x,
+                position.point.y,
+                position.point.z,
+                dimension_id,
+                time.time() if timestamp is None else timestamp,
+                kind,
+            )
+
+    def _read(self, history: BackHistory, slot: int) -> BackEntry:
+        base: int = slot * 3
+        return BackEntry(
+            MCPosition(
+                Point3D(
+                    history.coords[base],
+                    history.coords[base + 1],
+                    history.coords[base + 2],
+                ),
+                self.dimensions.get_name(history.dimensions[slot]),
+            ),
+            history.times[slot],
+            BackKind(history.kinds[slot]),
+        )
+
+    def peek(self, player: str, index: int = 0) -> BackEntry | None:
+        """Read an entry of a player without removing it.
+
+        Args:
+            player (str): The player name.
+            index (int, optional): 0 for the newest entry. Defaults to 0.
+
+        Returns:
+            BackEntry | None: None if there is no such entry.
+        """
+        with self._lock:
+            history: BackHistory | None = self._histories.get(player.lower())
+            if history is None or index >= len(history):
+                return None
+            return self._read(history, history.slot(index))
+
+    def pop(
+        self, player: str, expected: BackEntry | None = None
+    ) -> BackEntry | None:
+        """Remove and return the newest entry of a player.
+
+        Args:
+            player (str): The player name.
+            expected (BackEntry | None, optional): An entry read by `peek` \
+                earlier, nothing is removed unless it is still the newest \
+                one, compared by time and kind. Defaults to None.
+
+        Returns:
+            BackEntry | None: None if the history is empty or the newest \
+                entry is not `expected`.
+        """
+        with self._lock:
+            history: BackHistory | None = self._histories.get(player.lower())
+            if not history:
+                return None
+            if expected is not None:
+                slot: int = history.slot(0)
+                if (
+                    history.times[slot] != expected.time
+                    or history.kinds[slot] != expected.kind
+                ):
+                    return None
+            return self._read(history, history.pop())
+
+    def get_history(self, player: str) -> list[BackEntry]:
+        """Get all entries of a player, newest first.
+
+        Args:
+            player (str): The player name.
+
+        Returns:
+            list[BackEntry]: The entries.
+        """
+        with self._lock:
+            history: BackHistory | None = self._histories.get(player.lower())
+            if history is None:
+                return []
+            return [
+                self._read(history, history.slot(i))
+                for i in range(len(history))
+            ]
+
+    def export(self) -> dict[str, list[list]]:
+        return {
+            key: [
+                [
+                    *position_to_data(i.position).values(),
+                    i.time,
+                    int(i.kind),
+                ]
+                for i in reversed(self.get_history(key))
+            ]
+            for key in list(self._histories)
+        }
+
+    def restore(self, data: dict[str, list[list]]):
+        for key, entries in data.items():
+            for x, y, z, dimension, timestamp, kind in entries:
+                self.record(
+                    key,
+                    MCPosition(Point3D(x, y, z), dimension),
+                    BackKind(kind),
+                    timestamp,
+                )
+
+    def get_stats(self) -> dict[str, int]:
+        return {
+            "players": len(self._histories),
+            "dimensions": len(self.dimensions._names),
+            "evicted": self.evicted,
+            "bytes_per_player": self.capacity * 37,
+        }
@@ -0,0 +1,199 @@
+import threading
+import time
+from collections import deque
+from enum import IntEnum
+
+from mcdreforged.api.all import PluginServerInterface
+
+from modern_teleport import runtime
+from modern_teleport.utils.general_tools import LatencyTracker
+
+
+class CommandPriority(IntEnum):
+    """Lower values are dispatched first, commands of the same priority \
+    keep their order.
+    """
+    TELEPORT = 0
+    NOTIFY = 1
+    DIAGNOSTIC = 2
+
+
+class CommandDispatcher:
+    """Worker thread which feeds queued commands to the server console, \
+    at most `budget` commands each tick.
+
+    A command queued again right after the same pending command is \
+    merged into it instead of being sent twice. Copies with other \
+    commands in between are kept, as merging them would reorder commands.
+    """
+    def __init__(
+        self,
+        server: PluginServerInterface,
+        tick: float = 0.05,
+        budget: int = 8,
+    ):
+        """Init command dispatcher, the worker starts on first submit.
+
+        Args:
+            server (PluginServerInterface): MCDReforged plugin server \
+                interface.
+            tick (float, optional): Seconds between two batches. \
+                Defaults to 0.05, a game tick.
+            budget (int, optional): Max commands dispatched each tick. \
+                Defaults to 8.
+        """
+        self.server: PluginServerInterface = server
+        self.s = self.server  # alias
+        self.tick: float = tick
+        self.budget: int = max(1, budget)
+        self._queues: dict[CommandPriority, deque[tuple[str, float]]] = {
+            i: deque() for i in CommandPriority
+        }
+        self._size: int = 0
+        self._condition: threading.Condition = threading.Condition()
+        self._stopping: bool = False
+        self._closed: bool = False
+        self._worker: threading.Thread | None = None
+        self.latency: dict[CommandPriority, LatencyTracker] = {
+            i: LatencyTracker() for i in CommandPriority
+        }
+        self.dispatched: int = 0
+        self.merged: int = 0
+        self.failed: int = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._size
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and self._worker.is_alive()
+
+    def start(self):
+        """Start the worker thread if it is not running.
+        """
+        if self.running:
+            return
+        self._stopping = False
+        self._worker = threading.Thread(
+            target=self._run, name="MTPDispatch: worker", daemon=True
+        )
+        self._worker.start()
+
+    def stop(self, timeout: float = 1):
+        """Dispatch what is still queued without pacing, then stop the \
+        worker thread. Commands submitted afterwards are executed directly.
+
+        Args:
+            timeout (float, optional): Max seconds to wait for the worker. \
+                Defaults to 1.
+        """
+        with self._condition:
+            self._closed = True
+            if not self._worker:
+                return
+            self._stopping = True
+            self._condition.notify()
+        self._worker.join(timeout)
+        self._worker = None
+
+    def submit(
+        self,
+        command: str,
+        priority: CommandPriority = CommandPriority.NOTIFY,
+    ) -> bool:
+        """Queue a command for the server console.
+
+        Args:
+            command (str): The command, without slash.
+            priority (CommandPriority, optional): The priority class. \
+                Defaults to CommandPriority.NOTIFY.
+
+        Returns:
+            bool: False if it was merged into the latest pending command.
+        """
+        with self._condition:
+            closed: bool = self._closed
+            if not closed:
+                self.start()
+        if closed:
+            self.s.execute(command)
+            self.dispatched += 1
+            return True
+        with self._condition:
+            queue: deque[tuple[str, float]] = self._queues[priority]
+            if queue and queue[-1][0] == command:
+                self.merged += 1
+                return False
+            queue.append((command, time.monotonic()))
+            self._size += 1
+            self._condition.notify()
+        return True
+
+    def _take(self, limit: int) -> list[tuple[str, CommandPriority, float]]:
+        batch: list[tuple[str, CommandPriority, float]] = []
+        for priority, queue in self._queues.items():
+            while queue and len(batch) < limit:
+                command, submitted = queue.popleft()
+                batch.append((command, priority, submitted))
+        self._size -= len(batch)
+        return batch
+
+    def _run(self):
+        next_tick: float = 0
+        while True:
+            with self._condition:
+                while not self._size and not self._stopping:
+                    self._condition.wait()
+                if not self._size:
+                    return
+                stopping: bool = self._stopping
+            delay: float = next_tick - time.monotonic()
+            if delay > 0 and not stopping:
+                time.sleep(delay)
+            next_tick = time.monotonic() + self.tick
+            with self._condition:
+                batch = self._take(self._size if stopping else self.budget)
+            for command, priority, submitted in batch:
+                try:
+                    self.s.execute(command)
+                # a failing command must not stop the worker
+                except Exception as e:  # noqa: BLE001
+                    self.failed += 1
+                    self.s.logger.error(f"dispatch.failed: {e}")
+                self.latency[priority].record(time.monotonic() - submitted)
+                self.dispatched += 1
+
+    def get_stats(self) -> dict[str, int | float | None]:
+        stats: dict[str, int | float | None] = {
+            "queue_depth": self.queue_depth,
+            "dispatched": self.dispatched,
+            "merged": self.merged,
+            "failed": self.failed,
+        }
+        for priority, tracker in self.latency.items():
+            name: str = priority.name.lower()
+            stats[f"{name}_p50"] = tracker.percentile(50)
+            stats[f"{name}_p99"] = tracker.percentile(99)
+        return stats
+
+
+def dispatch(
+    server: PluginServerInterface,
+    command: str,
+    priority: CommandPriority = CommandPriority.NOTIFY,
+):
+    """Execute a command through the plugin command dispatcher, or \
+    directly if it is not initialized.
+
+    Args:
+        server (PluginServerInterface): MCDReforged plugin server \
+            interface.
+        command (str): The command, without slash.
+        priority (CommandPriority, optional): The priority class. \
+            Defaults to CommandPriority.NOTIFY.
+    """
+    if runtime.dispatcher:
+        runtime.dispatcher.submit(command, priority)
+    else:
+        server.execute(command)
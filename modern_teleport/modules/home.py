@@ -1,8 +1,215 @@
-# import modern_teleport.runtime as runtime
+import threading
+from collections import OrderedDict
+
+from location_api import MCPosition
+from mcdreforged.api.all import PluginServerInterface
+
+from modern_teleport.modules.back import (
+    evict_offline,
+    position_from_data,
+    position_to_data,
+)
+from modern_teleport.modules.storage import MTP, DataManager
+from modern_teleport.modules.storage_backend import STORAGE_ERRORS
+from modern_teleport.utils.completion import PrefixIndex
+
+
+class HomeUnavailableError(RuntimeError):
+    """Raised when the homes of a player could not be loaded, so they are \
+    neither shown nor overwritten.
+    """
+
+
+class PlayerHomes:
+    """Homes of one player, looked up by name ignoring case.
+    """
+    __slots__ = ("index", "positions")
+
+    def __init__(self, homes: dict[str, MCPosition] | None = None):
+        self.positions: dict[str, tuple[str, MCPosition]] = {}
+        self.index: PrefixIndex = PrefixIndex()
+        if homes:
+            self.positions = {
+                name.lower(): (name, position)
+                for name, position in homes.items()
+            }
+            self.index.reset(list(homes))
+
+    def __len__(self) -> int:
+        return len(self.positions)
 
 
 class HomeManager:
-    pass
+    """Homes of players, kept in the `MTP.HOME` document of each player.
+
+    Homes of a player are read once on first use and indexed in memory, \
+    at most `max_players` players are kept and offline players are \
+    evicted first.
+    """
+    def __init__(
+        self,
+        server: PluginServerInterface,
+        data_mgr: DataManager | None,
+        max_homes: int = 10,
+        max_players: int = 1024,
+    ):
+        """Init home manager.
+
+        Args:
+            server (PluginServerInterface): MCDReforged plugin server \
+                interface.
+            data_mgr (DataManager | None): Used to persist homes, they are \
+                kept in memory only if None.
+            max_homes (int, optional): Max homes of each player, \
+                unlimited if not positive. Defaults to 10.
+            max_players (int, optional): Max players kept in memory. \
+                Defaults to 1024.
+        """
+        self.server: PluginServerInterface = server
+        self.s = self.server  # alias
+        self.data_mgr: DataManager | None = data_mgr
+        self.max_homes: int = max_homes
+        self.max_players: int = max(1, max_players)
+        self._players: OrderedDict[str, PlayerHomes] = OrderedDict()
+        self._lock: threading.RLock = threading.RLock()
+        self.loaded: int = 0
+        self.evicted: int = 0
+
+    def _get_homes(self, player: str) -> PlayerHomes:
+        key: str = player.lower()
+        with self._lock:
+            homes: PlayerHomes | None = self._players.get(key)
+            if homes is not None:
+                self._players.move_to_end(key)
+                return homes
+        # a failed load raises, only loaded homes are cached and saved
+        homes = PlayerHomes(self._load(player))
+        with self._lock:
+            cached: PlayerHomes | None = self._players.get(key)
+            if cached is not None:
+                return cached
+            self._players[key] = homes
+            self.loaded += 1
+            self.evicted += evict_offline(self._players, self.max_players)
+        return homes
+
+    def _load(self, player: str) -> dict[str, MCPosition]:
+        if not self.data_mgr:
+            return {}
+        try:
+            data: dict = self.data_mgr.read(MTP.HOME, player)
+            return {
+                name: position_from_data(position)
+                for name, position in data.get("homes", {}).items()
+            }
+        except Exception as e:
+            self.s.logger.warning(f"home.load_failed: {player}: {e}")
+            # nothing is cached, the next access tries again
+            raise HomeUnavailableError(f"home.load_failed: {player}") from e
+
+    def get(self, player: str, name: str) -> MCPosition | None:
+        """Get a home of a player.
+
+        Args:
+            player (str): The player name.
+            name (str): The home name in any case.
+
+        Raises:
+            HomeUnavailableError: If the homes of the player could not \
+                be loaded.
+
+        Returns:
+            MCPosition | None: None if the home does not exist.
+        """
+        home: tuple[str, MCPosition] | None = self._get_homes(
+            player
+        ).positions.get(name.lower())
+        return home[1] if home else None
+
+    def set(self, player: str, name: str, position: MCPosition) -> bool:
+        """Add a home or move an existing one.
+
+        Args:
+            player (str): The player name.
+            name (str): The home name.
+            position (MCPosition): The home position.
+
+        Raises:
+            HomeUnavailableError: If the homes of the player could not \
+                be loaded.
+
+        Returns:
+            bool: False if the player already has `max_homes` homes and \
+                this is a new one.
+        """
+        homes: PlayerHomes = self._get_homes(player)
+        key: str = name.lower()
+        with self._lock:
+            old: tuple[str, MCPosition] | None = homes.positions.get(key)
+            if (
+                old is None
+                and self.max_homes > 0
+                and len(homes) >= self.max_homes
+            ):
+                return False
+            if old is not None and old[0] != name:
+                homes.index.remove(old[0])
+            homes.positions[key] = (name, position)
+            homes.index.add(name)
+        self._save(player, homes)
+        return True
+
+    def remove(self, player: str, name: str) -> bool:
+        """Remove a home.
+
+        Args:
+            player (str): The player name.
+            name (str): The home name in any case.
+
+        Raises:
+            HomeUnavailableError: If the homes of the player could not \
+                be loaded.
+
+        Returns:
+            bool: False if the home does not exist.
+        """
+        homes: PlayerHomes = self._get_homes(player)
+        with self._lock:
+            old: tuple[str, MCPosition] | None = homes.positions.pop(
+                name.lower(), None
+            )
+            if old is None:
+                return False
+            homes.index.remove(old[0])
+        self._save(player, homes)
+        return True
+
+    def _save(self, player: str, homes: PlayerHomes):
+        if not self.data_mgr:
+            return
+        try:
+            with self.data_mgr.edit(MTP.HOME, player) as data, self._lock:
+                data["homes"] = {
+                    name: position_to_data(position)
+                    for name, position in homes.positions.values()
+                }
+        except (RuntimeError, TypeError, *STORAGE_ERRORS) as e:
+            self.s.logger.error(f"home.save_failed: {player}: {e}")
+
+    def get_names(self, player: str) -> list[str]:
+        return self._get_homes(player).index.suggest(limit=0)
+
+    def suggest(
+        self, player: str, prefix: str = "", limit: int = 50
+    ) -> list[str]:
+        return self._get_homes(player).index.suggest(prefix, limit)
+
+    def get_stats(self) -> dict[str, int]:
+        return {
+            "cached": len(self._players),
+            "loaded": self.loaded,
+            "evicted": self.evicted,
+        }
 
 
 class HomeShare:
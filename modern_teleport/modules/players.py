@@ -0,0 +1,174 @@
+import threading
+from collections.abc import Callable
+
+from mcdreforged.api.all import PluginServerInterface
+
+from modern_teleport.utils import Player
+from modern_teleport.utils.completion import PrefixIndex
+
+
+class OnlinePlayers:
+    """Online players kept in memory, updated by join and leave events and \
+    reconciled with the server from time to time.
+    """
+    def __init__(
+        self,
+        server: PluginServerInterface,
+        fetch: Callable[[], list[str] | None],
+    ):
+        """Init online player registry, it is not ready until `seed`.
+
+        Args:
+            server (PluginServerInterface): MCDReforged plugin server \
+                interface.
+            fetch (Callable[[], list[str] | None]): Fetch online player \
+                names from the server, used for seeding and reconciling.
+        """
+        self.server: PluginServerInterface = server
+        self.s = self.server  # alias
+        self.fetch: Callable[[], list[str] | None] = fetch
+        self.ready: bool = False
+        self._players: dict[str, Player] = {}
+        self.index: PrefixIndex = PrefixIndex()
+        self._lock: threading.Lock = threading.Lock()
+        # names joined or left while a reconcile fetches, None otherwise
+        self._journal: set[str] | None = None
+        self._stop: threading.Event = threading.Event()
+        self._reconcile_thread: threading.Thread | None = None
+
+    def __contains__(self, player: str | Player) -> bool:
+        if isinstance(player, Player):
+            return (
+                player.name is not None
+                and self._players.get(player.name.lower()) == player
+            )
+        return player.lower() in self._players
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+    def get_names(self) -> list[str]:
+        return [i.name for i in self._players.values() if i.name]
+
+    def get_players(self) -> list[Player]:
+        return list(self._players.values())
+
+    def get_player(self, name: str) -> Player | None:
+        """Get an online player by name.
+
+        Args:
+            name (str): The player name in any case.
+
+        Returns:
+            Player | None: None if the player is not online.
+        """
+        return self._players.get(name.lower())
+
+    def seed(self, names: list[str]):
+        """Replace all online players and mark the registry ready.
+
+        Args:
+            names (list[str]): Online player names.
+        """
+        with self._lock:
+            self._players = {i.lower(): Player(i) for i in names}
+            self.index.reset(names)
+            self.ready = True
+
+    def add(self, name: str):
+        with self._lock:
+            self._players[name.lower()] = Player(name)
+            self.index.add(name)
+            if self._journal is not None:
+                self._journal.add(name.lower())
+
+    def remove(self, name: str):
+        with self._lock:
+            self._players.pop(name.lower(), None)
+            self.index.remove(name)
+            if self._journal is not None:
+                self._journal.add(name.lower())
+
+    def clear(self):
+        with self._lock:
+            self._players = {}
+            self.index.clear()
+            self.ready = False
+
+    def suggest(self, prefix: str = "", limit: int = 50) -> list[str]:
+        return self.index.suggest(prefix, limit)
+
+    def reconcile(self) -> bool:
+        """Fetch online players from the server and apply the difference \
+        to the registry. Players who joined or left while fetching keep \
+        what their event said, the fetched list may predate it.
+
+        Returns:
+            bool: True if the registry was changed.
+        """
+        with self._lock:
+            self._journal = set()
+        try:
+            names: list[str] | None = self.fetch()
+        except BaseException:
+            with self._lock:
+                self._journal = None
+            raise
+        with self._lock:
+            journal: set[str] = self._journal or set()
+            self._journal = None
+            if names is None:
+                return False
+            fetched: dict[str, str] = {
+                i.lower(): i for i in names if i.lower() not in journal
+            }
+            joined: list[str] = [
+                name for key, name in fetched.items()
+                if key not in self._players
+            ]
+            left: list[str] = [
+                key for key in self._players
+                if key not in fetched and key not in journal
+            ]
+            if self.ready and not joined and not left:
+                return False
+            if self.ready:
+                self.s.logger.warning("players.reconciled")
+            for name in joined:
+                self._players[name.lower()] = Player(name)
+                self.index.add(name)
+            for key in left:
+                self.index.remove(self._players.pop(key).name or key)
+            self.ready = True
+        return True
+
+    def start_reconcile(self, interval: float):
+        """Reconcile in a background thread every `interval` seconds.
+
+        Args:
+            interval (float): Seconds between two reconciles, disabled if \
+                not positive.
+        """
+        if interval <= 0 or self._reconcile_thread:
+            return
+        self._stop.clear()
+        self._reconcile_thread = threading.Thread(
+            target=self._reconcile_loop,
+            args=(interval,),
+            name="MTPPlayers: reconcile",
+            daemon=True,
+        )
+        self._reconcile_thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._reconcile_thread = None
+
+    def _reconcile_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            if not self.s.is_server_startup():
+                continue
+            try:
+                self.reconcile()
+            except (RuntimeError, TimeoutError) as e:
+                self.s.logger.warning(f"players.reconcile_failed: {e}")
@@ -1,13 +1,274 @@
-import re
+import asyncio
+import time
+import threading
 import modern_teleport.runtime as runtime
 
-from concurrent.futures import ThreadPoolExecutor, Future
+from concurrent.futures import Future
+from queue import Queue, Empty, Full
 from typing import Literal
 from mcdreforged.api.all import PluginServerInterface
-from location_api import Point3D, MCPosition
+from location_api import MCPosition
 from modern_teleport.utils import execute_if
+from modern_teleport.utils.general_tools import LatencyTracker
+from modern_teleport.modules.async_rcon import AsyncRconClient
+from modern_teleport.modules.rcon_parser import (
+    ALL_POSITIONS_COMMANDS,
+    get_player_pos_command,
+    parse_all_positions,
+    parse_online_players,
+    parse_player_pos,
+)
 
 rcon_module = Literal["mcdr", "async_rcon"]
+BreakerState = Literal["closed", "open", "half_open"]
+READ_ONLY_PREFIXES: tuple[str, ...] = (
+    "list",
+    "data get ",
+    "execute as @a run data get ",
+)
+
+
+def is_read_only(command: str) -> bool:
+    """Check whether a command only reads server state, so its reply may \
+    be reused for a short time.
+
+    Args:
+        command (str): The command string.
+
+    Returns:
+        bool: True if the command does not change anything.
+    """
+    return command.startswith(READ_ONLY_PREFIXES)
+
+
+class RconUnavailableError(RuntimeError):
+    """Raised when a query is not sent at all, like when the rcon circuit \
+    breaker is open or rcon is not running, so it is safe to send the \
+    commands another way.
+    """
+
+
+class CircuitBreaker:
+    """Stop sending rcon queries for a while after repeated failures.
+    """
+    def __init__(self, threshold: int = 5, cooldown: float = 10):
+        """Init circuit breaker.
+
+        Args:
+            threshold (int, optional): Consecutive failures that open the \
+                breaker. Defaults to 5.
+            cooldown (float, optional): Seconds to stay open before \
+                letting a probe query through. Defaults to 10.
+        """
+        self.threshold: int = threshold
+        self.cooldown: float = cooldown
+        self.state: BreakerState = "closed"
+        self.failures: int = 0
+        self.trips: int = 0
+        self.opened_at: float = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Check whether a query may be sent now, the first caller after \
+        the cooldown becomes the probe.
+
+        Returns:
+            bool: False if the caller should fail fast.
+        """
+        if self.state == "closed":
+            return True
+        with self._lock:
+            if (
+                self.state == "open"
+                and time.monotonic() - self.opened_at >= self.cooldown
+            ):
+                self.state = "half_open"
+                return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.state = "closed"
+
+    def record_failure(self) -> bool:
+        """Count a failed query.
+
+        Returns:
+            bool: True if this failure opened the breaker.
+        """
+        self.failures += 1
+        if self.state == "half_open" or (
+            self.state == "closed" and self.failures >= self.threshold
+        ):
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self.trips += 1
+            return True
+        return False
+
+
+class RconRequest:
+    """Queries waiting in the rcon dispatcher queue, sent back-to-back.
+    """
+    def __init__(self, commands: list[str], deadline: float):
+        """Create a queued rcon query.
+
+        Args:
+            commands (list[str]): The commands to be sent through rcon.
+            deadline (float): `time.monotonic()` value after which the \
+                query is dropped instead of being sent.
+        """
+        self.commands: list[str] = commands
+        self.deadline: float = deadline
+        self.future: Future[list[str | None]] = Future()
+
+
+class SharedQuery:
+    """A query on the event loop shared by the callers asking for the \
+    same read-only commands while it is in flight.
+    """
+    def __init__(self, task: asyncio.Task[list[str | None]]):
+        self.task: asyncio.Task[list[str | None]] = task
+        self.waiters: int = 0
+
+
+class RconDispatcher:
+    """Long-lived worker thread which sends queued queries through the \
+    MCDReforged rcon connection one after another.
+    """
+    def __init__(self, server: PluginServerInterface, max_queue: int = 64):
+        """Init rcon dispatcher.
+
+        Args:
+            server (PluginServerInterface): MCDReforged plugin server \
+                interface.
+            max_queue (int, optional): Max queries waiting in the queue. \
+                Defaults to 64.
+        """
+        self.server: PluginServerInterface = server
+        self.s = self.server  # alias
+        self.queue: Queue[RconRequest | None] = Queue(maxsize=max_queue)
+        self.in_flight: int = 0
+        self.completed: int = 0
+        self.expired: int = 0
+        self.rejected: int = 0
+        self.reconnects: int = 0
+        self._reconnecting: threading.Lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+
+    @property
+    def queue_depth(self) -> int:
+        return self.queue.qsize()
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and self._worker.is_alive()
+
+    def start(self):
+        """Start the worker thread if it is not running.
+        """
+        if self.running:
+            return
+        self._worker = threading.Thread(
+            target=self._run, name="MTPRcon: dispatcher", daemon=True
+        )
+        self._worker.start()
+
+    def stop(self, timeout: float = 1):
+        """Stop the worker thread, queries still queued will fail.
+
+        Args:
+            timeout (float, optional): Max seconds to wait for the worker. \
+                Defaults to 1.
+        """
+        if not self._worker:
+            return
+        while True:
+            try:
+                request: RconRequest | None = self.queue.get_nowait()
+            except Empty:
+                break
+            if request:
+                request.future.cancel()
+        try:
+            self.queue.put(None, timeout=timeout)
+        except Full:
+            pass
+        self._worker.join(timeout)
+        self._worker = None
+
+    def submit(
+        self, commands: list[str], timeout: float
+    ) -> Future[list[str | None]]:
+        """Queue queries for the worker thread, they are sent one after \
+        another without other queries in between.
+
+        Args:
+            commands (list[str]): The commands to be sent through rcon.
+            timeout (float): Seconds the query may wait before being sent.
+
+        Raises:
+            RconUnavailableError: If the queue is full.
+
+        Returns:
+            Future[list[str | None]]: Resolved with the rcon replies.
+        """
+        self.start()
+        request = RconRequest(commands, time.monotonic() + timeout)
+        try:
+            self.queue.put_nowait(request)
+        except Full:
+            self.rejected += 1
+            raise RconUnavailableError("rcon.queue_full")
+        return request.future
+
+    def reconnect(self):
+        """Reconnect MCDReforged rcon, skipped if another thread is \
+        already doing it.
+        """
+        if not self._reconnecting.acquire(blocking=False):
+            return
+        try:
+            self.reconnects += 1
+            self.s._mcdr_server.connect_rcon()
+        finally:
+            self._reconnecting.release()
+
+    def get_stats(self) -> dict[str, int]:
+        return {
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "expired": self.expired,
+            "rejected": self.rejected,
+            "reconnects": self.reconnects,
+        }
+
+    def _run(self):
+        while True:
+            request: RconRequest | None = self.queue.get()
+            if request is None:
+                return
+            if not request.future.set_running_or_notify_cancel():
+                continue
+            if time.monotonic() > request.deadline:
+                self.expired += 1
+                request.future.set_exception(
+                    RconUnavailableError("rcon.expired")
+                )
+                continue
+            self.in_flight += 1
+            try:
+                result: list[str | None] = [
+                    self.s.rcon_query(i) for i in request.commands
+                ]
+            except Exception as e:  # noqa: BLE001 - raised to the caller
+                request.future.set_exception(e)
+            else:
+                request.future.set_result(result)
+            finally:
+                self.in_flight -= 1
+                self.completed += 1
 
 
 class RconManager:
@@ -19,79 +280,491 @@ class RconManager:
         self.server: PluginServerInterface = server
         self.s = self.server
         self.module: rcon_module = module
+        max_queue: int = 64
+        if runtime.config:
+            max_queue = runtime.config.rcon_options.queue_size
+        self.dispatcher: RconDispatcher = RconDispatcher(
+            self.server, max_queue
+        )
+        self.async_client: AsyncRconClient | None = None
+        self._inflight: dict[tuple[str, ...], Future[list[str | None]]] = {}
+        self._inflight_lock: threading.Lock = threading.Lock()
+        self._async_inflight: dict[tuple[str, ...], SharedQuery] = {}
+        self._recent: dict[
+            tuple[str, ...], tuple[float, list[str | None]]
+        ] = {}
+        self.positions: dict[str, tuple[float, MCPosition]] = {}
+        self.coalesced: int = 0
+        self.window_hits: int = 0
+        self.timeouts: int = 0
+        self.latency: LatencyTracker = LatencyTracker()
+        self.breaker: CircuitBreaker = CircuitBreaker()
+        if runtime.config:
+            self.breaker = CircuitBreaker(
+                runtime.config.rcon_options.breaker_threshold,
+                runtime.config.rcon_options.breaker_cooldown,
+            )
+
+    def is_available(self) -> bool:
+        """Check whether rcon is enabled in config and can be queried now, \
+        so callers use other sources instead of failing.
+
+        Returns:
+            bool: False if `rcon_support` is off or no rcon is running.
+        """
+        if runtime.config is not None and not runtime.config.rcon_support:
+            return False
+        if self.module == "async_rcon" and self.get_async_client():
+            return True
+        return self.s.is_rcon_running()
+
+    def get_timeouts(self) -> tuple[float, float]:
+        """Get timeouts derived from observed latency, with the values of \
+        `TimeoutManager` as upper bounds and `rcon_options.min_wait` as \
+        lower bound, so a hiccup on a fast server is not a timeout.
+
+        Returns:
+            tuple[float, float]: Seconds to wait before reconnecting, and \
+                seconds to wait after reconnecting.
+        """
+        assert runtime.config is not None
+        rcon_wait: float = runtime.config.timeout.rcon_wait
+        rcon_failed: float = runtime.config.timeout.rcon_failed
+        if not runtime.config.rcon_options.adaptive_timeout:
+            return rcon_wait, rcon_failed
+        if len(self.latency.samples) < 20:
+            return rcon_wait, rcon_failed
+        p99: float | None = self.latency.percentile(99)
+        assert p99 is not None
+        wait: float = max(
+            runtime.config.rcon_options.min_wait, min(rcon_wait, p99 * 4)
+        )
+        failed: float = min(rcon_failed, max(wait, p99 * 20))
+        return wait, failed
 
-    @execute_if(lambda: runtime.config is not None, True)
     def get_from_mcdr(self, command: str) -> str | None:
+        results: list[str | None] | None = self.get_many_from_mcdr([command])
+        return results[0] if results else None
+
+    @execute_if(lambda: runtime.config is not None, True)
+    def get_many_from_mcdr(self, commands: list[str]) -> list[str | None]:
         assert runtime.config is not None
         if not self.s.is_rcon_running():
-            raise RuntimeError("rcon.mcdr.not_running")
-        with ThreadPoolExecutor(max_workers=1) as executor:
-            future: Future[str | None] = executor.submit(
-                self.s.rcon_query, command
-            )
+            raise RconUnavailableError("rcon.mcdr.not_running")
+        rcon_wait, rcon_failed = self.get_timeouts()
+        future: Future[list[str | None]] = self.dispatcher.submit(
+            commands, rcon_wait + rcon_failed
+        )
         try:
-            result: str | None = future.result(  # pyright: ignore[reportRedeclaration] # noqa: E501
-                timeout=runtime.config.timeout.rcon_wait
-            )
+            result: list[str | None] = future.result(timeout=rcon_wait)
+            self.timeouts = 0
+            return result
         except TimeoutError:
             self.s.logger.warning("rcon.timeout")
-            try:
-                self.s._mcdr_server.connect_rcon()
-                result: str | None = future.result(
-                    timeout=runtime.config.timeout.rcon_failed
-                )
-            except TimeoutError:
-                raise TimeoutError("rcon.no_response")
-        return result
+        try:
+            if self._count_timeout():
+                self.dispatcher.reconnect()
+            return future.result(timeout=rcon_failed)
+        except TimeoutError:
+            future.cancel()
+            raise TimeoutError("rcon.no_response")
 
-    def get_from_async_rcon(self, _: str) -> str | None:
-        raise NotImplementedError("module.not_implemented_yet")
+    def _count_timeout(self) -> bool:
+        """Count a query which was not answered in time.
 
-    def get(self, command: str) -> str | None:
-        result: str | None = None
-        if self.module == "mcdr":
-            result = self.get_from_mcdr(command)
-        elif self.module == "async_rcon":
-            self.s.logger.warning("module.not_implemented_yet")
-            # return self.get_from_async_rcon(command)
-            result = self.get_from_mcdr(command)
+        Returns:
+            bool: True if enough consecutive timeouts happened that rcon \
+                should be reconnected.
+        """
+        assert runtime.config is not None
+        self.timeouts += 1
+        if self.timeouts < runtime.config.rcon_options.reconnect_after:
+            return False
+        self.timeouts = 0
+        return True
+
+    def get_stats(self) -> dict[str, int | float | str | None]:
+        stats: dict[str, int | float | str | None] = {}
+        stats.update(self.dispatcher.get_stats())
+        stats["coalesced"] = self.coalesced
+        stats["window_hits"] = self.window_hits
+        stats["timeouts"] = self.timeouts
+        stats.update(self.latency.get_stats())
+        if runtime.config:
+            stats["rcon_wait"], stats["rcon_failed"] = self.get_timeouts()
+        stats["breaker"] = self.breaker.state
+        stats["breaker_failures"] = self.breaker.failures
+        stats["breaker_trips"] = self.breaker.trips
+        return stats
+
+    def _before_query(self):
+        if not self.breaker.allow():
+            raise RconUnavailableError("rcon.circuit_open")
+
+    def _after_query(self, start: float, error: BaseException | None):
+        if error is None:
+            self.latency.record(time.monotonic() - start)
+            self.breaker.record_success()
+        elif self.breaker.record_failure():
+            self.s.logger.warning("rcon.circuit_open")
+
+    def close(self):
+        """Stop the rcon worker and close async rcon connections, call it \
+        when unloading plugin.
+        """
+        self.dispatcher.stop()
+        client: AsyncRconClient | None = self.async_client
+        if client and client.loop and client.loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.close(), client.loop)
+
+    def get_async_client(self) -> AsyncRconClient | None:
+        """Get the async rcon client, created from the rcon settings of \
+        MCDReforged on first call.
+
+        Returns:
+            AsyncRconClient | None: None if rcon is not configured in \
+                MCDReforged.
+        """
+        if self.async_client:
+            return self.async_client
+        rcon_config: dict = self.s.get_mcdr_config().get("rcon", {}) or {}
+        if not rcon_config.get("enable", False):
+            return None
+        pool_size: int = 2
+        timeout: float = 5
+        loop: asyncio.AbstractEventLoop | None = None
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        if runtime.config:
+            pool_size = runtime.config.rcon_options.async_pool_size
+            timeout = runtime.config.timeout.rcon_failed
+        self.async_client = AsyncRconClient(
+            rcon_config.get("address", "127.0.0.1"),
+            int(rcon_config.get("port", 25575)),
+            rcon_config.get("password", ""),
+            pool_size,
+            timeout,
+            loop,
+        )
+        return self.async_client
+
+    def get_from_async_rcon(self, command: str) -> str | None:
+        return self.get_many_from_async_rcon([command])[0]
+
+    def get_many_from_async_rcon(
+        self, commands: list[str]
+    ) -> list[str | None]:
+        """Query through the async rcon client from a thread other than \
+        its event loop.
+
+        Args:
+            commands (list[str]): The commands to be sent through rcon.
+
+        Raises:
+            RuntimeError: If the async client is not bound to a running \
+                event loop, or the caller is on that loop.
+
+        Returns:
+            list[str | None]: The rcon replies.
+        """
+        client: AsyncRconClient | None = self.get_async_client()
+        if not client or not client.loop or not client.loop.is_running():
+            raise RuntimeError("rcon.async_rcon.not_running")
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is client.loop:
+            raise RuntimeError("rcon.async_rcon.blocking_in_loop")
+        future = asyncio.run_coroutine_threadsafe(
+            client.get_many(commands), client.loop
+        )
+        return list(future.result(timeout=client.timeout * 2))
+
+    def _feedback(self, results: list[str | None]):
         if runtime.config:
             if runtime.config.rcon_feedback:
-                self.s.logger.info(result)
-        return result
+                for i in results:
+                    self.s.logger.info(i)
 
-    def get_online_players(self) -> list[str] | None:
-        reply: str | None = self.get("list")
-        if reply:
-            match: re.Match[str] | None = re.match(
-                r"There are \d+ of a max of \d+ players online:", reply
+    def get(self, command: str) -> str | None:
+        return self.get_many([command])[0]
+
+    def _get_recent(
+        self, key: tuple[str, ...]
+    ) -> list[str | None] | None:
+        recent = self._recent.get(key)
+        if recent and recent[0] > time.monotonic():
+            self.window_hits += 1
+            return list(recent[1])
+        return None
+
+    def _remember(self, key: tuple[str, ...], results: list[str | None]):
+        window: float = 0
+        if runtime.config:
+            window = runtime.config.rcon_options.result_window
+        if window <= 0 or not all(is_read_only(i) for i in key):
+            return
+        now: float = time.monotonic()
+        if len(self._recent) > 64:
+            self._recent = {
+                k: v for k, v in self._recent.items() if v[0] > now
+            }
+        self._recent[key] = (now + window, list(results))
+
+    def get_many(self, commands: list[str]) -> list[str | None]:
+        """Send several commands back-to-back, with async rcon they share \
+        a single round trip. Callers asking for the same read-only \
+        commands while they are in flight share one query and its result.
+
+        Args:
+            commands (list[str]): The commands to be sent through rcon.
+
+        Returns:
+            list[str | None]: The rcon replies, in order.
+        """
+        key: tuple[str, ...] = tuple(commands)
+        recent: list[str | None] | None = self._get_recent(key)
+        if recent is not None:
+            return recent
+        if not all(is_read_only(i) for i in key):
+            # sending the same change twice is not the same as once
+            return self._query_many(commands)
+        with self._inflight_lock:
+            shared: Future[list[str | None]] | None = self._inflight.get(key)
+            owner: bool = shared is None
+            if shared is None:
+                shared = Future()
+                self._inflight[key] = shared
+        if not owner:
+            self.coalesced += 1
+            return list(shared.result())
+        try:
+            results: list[str | None] = self._query_many(commands)
+        except BaseException as e:
+            shared.set_exception(e)
+            raise
+        else:
+            self._remember(key, results)
+            shared.set_result(results)
+            return results
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def _query_many(self, commands: list[str]) -> list[str | None]:
+        self._before_query()
+        start: float = time.monotonic()
+        results: list[str | None] = [None] * len(commands)
+        try:
+            if self.module == "mcdr":
+                results = self.get_many_from_mcdr(commands) or results
+            elif self.module == "async_rcon":
+                try:
+                    results = self.get_many_from_async_rcon(commands)
+                except RuntimeError:
+                    results = self.get_many_from_mcdr(commands) or results
+        except Exception as e:
+            self._after_query(start, e)
+            raise
+        self._after_query(start, None)
+        self._feedback(results)
+        return results
+
+    async def async_get(self, command: str) -> str | None:
+        return (await self.async_get_many([command]))[0]
+
+    async def async_get_many(self, commands: list[str]) -> list[str | None]:
+        """Query without blocking the event loop of the caller, identical \
+        read-only queries in flight on the same loop are shared. A caller \
+        which is cancelled only stops waiting, the query is cancelled \
+        once nobody waits for it.
+
+        Args:
+            commands (list[str]): The commands to be sent through rcon.
+
+        Returns:
+            list[str | None]: The rcon replies, in order.
+        """
+        key: tuple[str, ...] = tuple(commands)
+        recent: list[str | None] | None = self._get_recent(key)
+        if recent is not None:
+            return recent
+        if not all(is_read_only(i) for i in key):
+            return await self._async_query_many(commands)
+        query: SharedQuery | None = self._async_inflight.get(key)
+        if query is None:
+            query = SharedQuery(
+                asyncio.ensure_future(self._async_query_many(commands))
+            )
+            self._async_inflight[key] = query
+            query.task.add_done_callback(
+                lambda task: self._async_query_done(key, task)
             )
-            if match:
-                # fmt: off
-                names_section: str = reply[match.end():].strip()
-                # fmt: on
-                if names_section:
-                    online_list: list[str] = [
-                        name.strip()
-                        for name in names_section.split(",")
-                        if name.strip()
-                    ]
-                else:
-                    online_list = []
-                return online_list
+        else:
+            self.coalesced += 1
+        query.waiters += 1
+        try:
+            return list(await asyncio.shield(query.task))
+        finally:
+            query.waiters -= 1
+            if not query.waiters and not query.task.done():
+                query.task.cancel()
 
-    def get_player_pos(self, player: str) -> MCPosition | None:
-        pos_info: str | None = self.get(f"data get entity {player} Pos")
-        dim_info: str | None = self.get(f"data get entity {player} Dimension")
-        pos_info_valid: bool = pos_info != "No entity was found"
-        dim_info_valid: bool = dim_info != "No entity was found"
-        if pos_info and dim_info:
-            if pos_info_valid and dim_info_valid:
-                pos_data: str = pos_info.split(":")[1].strip()
-                pos: list[str] = pos_data.strip("[]").split(", ")
-                position: list = [float(coord[:-1]) for coord in pos]
-                dimension = dim_info.split(": ", 1)[1].strip().strip('"')
-                return MCPosition(
-                    Point3D(*position),
-                    dimension,
+    def _async_query_done(
+        self, key: tuple[str, ...], task: asyncio.Task[list[str | None]]
+    ):
+        query: SharedQuery | None = self._async_inflight.get(key)
+        if query is not None and query.task is task:
+            del self._async_inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._remember(key, task.result())
+
+    async def _async_query_many(
+        self, commands: list[str]
+    ) -> list[str | None]:
+        assert runtime.config is not None
+        self._before_query()
+        start: float = time.monotonic()
+        rcon_wait, rcon_failed = self.get_timeouts()
+        results: list[str | None] = []
+        client: AsyncRconClient | None = None
+        if self.module == "async_rcon":
+            client = self.get_async_client()
+        try:
+            if client:
+                results = list(
+                    await client.get_many(commands, rcon_wait + rcon_failed)
+                )
+            else:
+                if not self.s.is_rcon_running():
+                    raise RconUnavailableError("rcon.mcdr.not_running")
+                timeout: float = rcon_wait + rcon_failed
+                future: Future[list[str | None]] = self.dispatcher.submit(
+                    commands, timeout
                 )
+                try:
+                    results = await asyncio.wait_for(
+                        asyncio.wrap_future(future), timeout
+                    )
+                    self.timeouts = 0
+                except TimeoutError:
+                    self.s.logger.warning("rcon.timeout")
+                    if self._count_timeout():
+                        await asyncio.to_thread(self.dispatcher.reconnect)
+                    raise TimeoutError("rcon.no_response")
+        except Exception as e:
+            self._after_query(start, e)
+            raise
+        self._after_query(start, None)
+        self._feedback(results)
+        return results
+
+    def _remember_positions(self, positions: dict[str, MCPosition]):
+        now: float = time.monotonic()
+        if len(self.positions) > 1024:
+            self.positions = {}
+        for name, position in positions.items():
+            self.positions[name.lower()] = (now, position)
+
+    def get_cached_position(
+        self, player: str, max_age: float
+    ) -> MCPosition | None:
+        """Get a position of a player queried a moment ago.
+
+        Args:
+            player (str): The player name.
+            max_age (float): Max seconds since the position was queried.
+
+        Returns:
+            MCPosition | None: None if there is no fresh position.
+        """
+        cached = self.positions.get(player.lower())
+        if cached and time.monotonic() - cached[0] <= max_age:
+            return cached[1]
+        return None
+
+    def forget_positions(self, players: list[str]):
+        for i in players:
+            self.positions.pop(i.lower(), None)
+
+    def get_online_players(self) -> list[str] | None:
+        return parse_online_players(self.get("list"))
+
+    def get_player_pos(self, player: str) -> MCPosition | None:
+        position: MCPosition | None = parse_player_pos(
+            self.get(get_player_pos_command(player))
+        )
+        if position:
+            self._remember_positions({player: position})
+        return position
+
+    def get_all_positions(self) -> dict[str, MCPosition]:
+        """Get positions of all online players with two commands sent \
+        back-to-back, instead of two queries per player.
+
+        Returns:
+            dict[str, MCPosition]: Player names and their positions.
+        """
+        positions: dict[str, MCPosition] = parse_all_positions(
+            self.get_many(ALL_POSITIONS_COMMANDS)
+        )
+        self._remember_positions(positions)
+        return positions
+
+    async def async_get_online_players(self) -> list[str] | None:
+        return parse_online_players(await self.async_get("list"))
+
+    async def async_get_player_pos(self, player: str) -> MCPosition | None:
+        position: MCPosition | None = parse_player_pos(
+            await self.async_get(get_player_pos_command(player))
+        )
+        if position:
+            self._remember_positions({player: position})
+        return position
+
+    async def async_get_all_positions(self) -> dict[str, MCPosition]:
+        positions: dict[str, MCPosition] = parse_all_positions(
+            await self.async_get_many(ALL_POSITIONS_COMMANDS)
+        )
+        self._remember_positions(positions)
+        return positions
+
+    async def async_get_positions_then_execute(
+        self, players: list[str], commands: list[str]
+    ) -> dict[str, MCPosition]:
+        """Query positions of players and run commands right after, \
+        back-to-back in one batch, so a teleport costs no extra round trip \
+        to learn where the players were.
+
+        Args:
+            players (list[str]): The players to locate.
+            commands (list[str]): The commands to run after locating them, \
+                in order.
+
+        Raises:
+            RconUnavailableError: If nothing was sent.
+
+        Returns:
+            dict[str, MCPosition]: Positions before the command ran, \
+                players who could not be located are left out.
+        """
+        self.forget_positions(players)
+        if len(players) == 1:
+            results: list[str | None] = await self.async_get_many(
+                [get_player_pos_command(players[0]), *commands]
+            )
+            position: MCPosition | None = parse_player_pos(results[0])
+            return {players[0]: position} if position else {}
+        results = await self.async_get_many(ALL_POSITIONS_COMMANDS + commands)
+        wanted: set[str] = {i.lower() for i in players}
+        return {
+            name: position
+            for name, position in parse_all_positions(
+                results[:len(ALL_POSITIONS_COMMANDS)]
+            ).items()
+            if name.lower() in wanted
+        }
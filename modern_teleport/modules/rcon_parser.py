@@ -0,0 +1,168 @@
+import re
+
+from location_api import MCPosition, Point3D
+
+ALL_POSITIONS_COMMANDS: list[str] = [
+    "execute as @a run data get entity @s Pos",
+    "execute as @a run data get entity @s Dimension",
+]
+_ENTITY_DATA_PATTERN: re.Pattern[str] = re.compile(
+    r"(?P<name>\w+) has the following entity data: "
+    r"(?:\[(?P<x>[^,\]]+)d, (?P<y>[^,\]]+)d, (?P<z>[^,\]]+)d\]"
+    r'|"(?P<dimension>[^"]*)")'
+)
+
+
+def get_player_pos_command(player: str) -> str:
+    """Get the command querying the entity data of a player, which holds \
+    both its position and dimension.
+
+    Args:
+        player (str): The player name.
+
+    Returns:
+        str: The `data get entity` query command.
+    """
+    return f"data get entity {player}"
+
+
+def parse_online_players(reply: str | None) -> list[str] | None:
+    """Parse the reply of the `list` command.
+
+    Args:
+        reply (str | None): The rcon reply.
+
+    Returns:
+        list[str] | None: Online player names, None if the reply is \
+            invalid.
+    """
+    if reply:
+        match: re.Match[str] | None = re.match(
+            r"There are \d+ of a max of \d+ players online:", reply
+        )
+        if match:
+            # fmt: off
+            names_section: str = reply[match.end():].strip()
+            # fmt: on
+            if names_section:
+                online_list: list[str] = [
+                    name.strip()
+                    for name in names_section.split(",")
+                    if name.strip()
+                ]
+            else:
+                online_list = []
+            return online_list
+
+
+def _get_top_level_values(snbt: str, keys: set[str]) -> dict[str, str]:
+    """Find values of top level keys in a SNBT compound, keys of nested \
+    compounds like a vehicle are skipped.
+
+    Args:
+        snbt (str): The SNBT text, starting with `{`.
+        keys (set[str]): The keys wanted.
+
+    Returns:
+        dict[str, str]: Keys found and their raw SNBT values.
+    """
+    values: dict[str, str] = {}
+    depth: int = 0
+    quote: str | None = None
+    key_start: int | None = None
+    value: tuple[str, int] | None = None
+    i: int = 0
+    while i < len(snbt):
+        char: str = snbt[i]
+        if quote:
+            if char == "\\":
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char in "{[":
+            depth += 1
+            if depth == 1:
+                key_start = i + 1
+        elif char in "}]" or (char == "," and depth == 1):
+            if depth == 1 and value is not None:
+                values[value[0]] = snbt[value[1]:i].strip()
+                value = None
+            if char == ",":
+                key_start = i + 1
+            else:
+                depth -= 1
+        elif char == ":" and depth == 1 and key_start is not None:
+            key: str = snbt[key_start:i].strip()
+            key_start = None
+            if key in keys:
+                value = (key, i + 1)
+        i += 1
+    return values
+
+
+def parse_player_pos(reply: str | None) -> MCPosition | None:
+    """Parse the reply of `data get entity <player>`.
+
+    Args:
+        reply (str | None): The rcon reply.
+
+    Returns:
+        MCPosition | None: The player position, None if the reply is \
+            invalid.
+    """
+    if not reply or reply == "No entity was found":
+        return None
+    start: int = reply.find("{")
+    if start < 0:
+        return None
+    values: dict[str, str] = _get_top_level_values(
+        reply[start:], {"Pos", "Dimension"}
+    )
+    if "Pos" not in values or "Dimension" not in values:
+        return None
+    try:
+        position: list[float] = [
+            float(coord.strip().rstrip("dD"))
+            for coord in values["Pos"].strip("[]").split(",")
+        ]
+    except ValueError:
+        return None
+    if len(position) != 3:
+        return None
+    return MCPosition(
+        Point3D(*position), values["Dimension"].strip("\"'")
+    )
+
+
+def parse_all_positions(replies: list[str | None]) -> dict[str, MCPosition]:
+    """Parse the replies of `ALL_POSITIONS_COMMANDS` in a single pass.
+
+    Args:
+        replies (list[str | None]): The rcon replies, rcon joins the \
+            output of every player into one reply.
+
+    Returns:
+        dict[str, MCPosition]: Player names and their positions, players \
+            missing either value are left out.
+    """
+    points: dict[str, Point3D] = {}
+    dimensions: dict[str, str] = {}
+    text: str = "\n".join(i for i in replies if i)
+    for match in _ENTITY_DATA_PATTERN.finditer(text):
+        name: str = match.group("name")
+        dimension: str | None = match.group("dimension")
+        if dimension is not None:
+            dimensions[name] = dimension
+        else:
+            points[name] = Point3D(
+                float(match.group("x")),
+                float(match.group("y")),
+                float(match.group("z")),
+            )
+    return {
+        name: MCPosition(point, dimensions[name])
+        for name, point in points.items()
+        if name in dimensions
+    }
@@ -1,10 +1,26 @@
+import copy
+import json
 import os
+import threading
 import modern_teleport.runtime as runtime
 
+from collections import OrderedDict
+from contextlib import contextmanager
 from enum import StrEnum, auto
+from collections.abc import Iterator
 from mcdreforged.api.all import PluginServerInterface
-from auto_uuid_api import is_uuid, local_api
+from auto_uuid_api import is_uuid
 from modern_teleport.utils import execute_if
+from modern_teleport.utils.identity import identity_cache
+from modern_teleport.modules.storage_backend import (
+    STORAGE_ERRORS,
+    JsonFileBackend,
+    StorageBackend,
+    StorageBackendType,
+    StorageLayout,
+    create_backend,
+    get_owner_folder,
+)
 
 
 class MTP(StrEnum):
@@ -18,6 +34,15 @@ class MTP(StrEnum):
 
 class DataManager:
     """Data manager to manage plugin data.
+
+    Documents are cached in memory by module and player. Changes only \
+    mark them dirty, a background flusher writes them to the storage \
+    backend on an interval or once enough are dirty, in one batch.
+
+    Player documents are loaded on first access or when the player joins \
+    and stay pinned while the player is online. Past `max_documents`, \
+    the least recently used clean documents of offline players are \
+    evicted.
     """
     @execute_if(lambda: runtime.config is not None, True)
     def __init__(self, server: PluginServerInterface) -> None:
@@ -48,6 +73,57 @@ class DataManager:
                 self.world_dir,
                 self.s.get_self_metadata().id,
             )
+        # keyed by module and owner, so a player reached by name and by
+        # uuid shares one document
+        self._documents: OrderedDict[tuple[MTP, str], dict] = OrderedDict()
+        self._dirty: set[tuple[MTP, str]] = set()
+        # owners of players who joined and have not left yet
+        self._pinned: set[str] = set()
+        # guards the cache only, backend reads and edits happen outside
+        self._lock: threading.RLock = threading.RLock()
+        # edits of one document wait for each other, not for the others
+        self._edit_locks: list[threading.Lock] = [
+            threading.Lock() for _ in range(64)
+        ]
+        self._flush_lock: threading.Lock = threading.Lock()
+        self._wakeup: threading.Event = threading.Event()
+        self._stop: threading.Event = threading.Event()
+        self._flusher: threading.Thread | None = None
+        self._closed: bool = False
+        # bumped when documents move or the backend is switched, reads
+        # started before are dropped
+        self._generation: int = 0
+        self.written: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evicted: int = 0
+        self.backend: StorageBackend = create_backend(
+            runtime.config.data_storage.backend,
+            self.data_folder,
+            runtime.config.data_storage.sqlite_file,
+            runtime.config.data_storage.layout,
+        )
+
+    def get_player_id(self, name_or_uuid: str) -> str:
+        """Get the name of the data folder of a player, the uuid or the \
+        name depending on `identity_mode`.
+
+        Args:
+            name_or_uuid (str): The player name or uuid string.
+
+        Raises:
+            RuntimeError: If uuid need but could not get.
+
+        Returns:
+            str: The folder name.
+        """
+        assert runtime.config is not None
+        if is_uuid(name_or_uuid) or runtime.config.identity_mode == "name":
+            return name_or_uuid
+        _uuid: str | None = identity_cache.get_uuid(name_or_uuid)
+        if _uuid:
+            return _uuid
+        raise RuntimeError("error.no_uuid")
 
     def get_player_folder(self, name_or_uuid: str) -> str:
         """Get a data storage directory for a player.
@@ -62,16 +138,13 @@ class DataManager:
             str: The directory (folder) path.
         """
         assert runtime.config is not None
-        if is_uuid(name_or_uuid):
-            return os.path.join(self.data_folder, name_or_uuid)
-        else:
-            if runtime.config.identity_mode == "name":
-                return os.path.join(self.data_folder, name_or_uuid)
-            _uuid: str | None = local_api.get_uuid(name_or_uuid)
-            if _uuid:
-                return os.path.join(self.data_folder, _uuid)
-            else:
-                raise RuntimeError("error.no_uuid")
+        return os.path.join(
+            self.data_folder,
+            get_owner_folder(
+                self.get_player_id(name_or_uuid),
+                runtime.config.data_storage.layout,
+            ),
+        )
 
     def get_data_file_path(
         self, module: MTP, name_or_uuid: str | None = None
@@ -101,6 +174,334 @@ class DataManager:
                 f"{module}.json"
             )
 
+    def _get_key(
+        self, module: MTP, name_or_uuid: str | None
+    ) -> tuple[MTP, str]:
+        return module, self.get_owner(module, name_or_uuid)
+
+    def get_owner(
+        self, module: MTP, name_or_uuid: str | None = None
+    ) -> str:
+        """Get the backend owner of a document, the player folder name \
+        or an empty string for global documents.
+
+        Args:
+            module (MTP): MTP module name.
+            name_or_uuid (str | None, optional): The player name or uuid. \
+                Defaults to None.
+
+        Raises:
+            TypeError: If the player name or uuid need but not given.
+
+        Returns:
+            str: The owner.
+        """
+        if module == MTP.WARP or module == MTP.TPRequest:
+            return ""
+        if not name_or_uuid:
+            self.server.logger.error("data.need_name_or_uuid")
+            raise TypeError("data.need_name_or_uuid")
+        return self.get_player_id(name_or_uuid)
+
+    def _get_document(self, key: tuple[MTP, str]) -> dict:
+        while True:
+            with self._lock:
+                document: dict | None = self._documents.get(key)
+                if document is not None:
+                    self._documents.move_to_end(key)
+                    self.hits += 1
+                    return document
+                generation: int = self._generation
+                backend: StorageBackend = self.backend
+            try:
+                loaded: dict = backend.read(*key) or {}
+            except STORAGE_ERRORS:
+                with self._lock:
+                    if generation == self._generation:
+                        raise
+                # the backend was switched and closed meanwhile
+                continue
+            with self._lock:
+                document = self._documents.get(key)
+                if document is not None:
+                    # loaded by another thread meanwhile
+                    return document
+                if generation != self._generation:
+                    continue
+                self._documents[key] = loaded
+                self.misses += 1
+                self._evict(key)
+                return loaded
+
+    def _is_pinned(self, key: tuple[MTP, str]) -> bool:
+        return not key[1] or key in self._dirty or key[1] in self._pinned
+
+    def _evict(self, keep: tuple[MTP, str] | None = None):
+        overflow: int = (
+            len(self._documents) - self.config.data_storage.max_documents
+        )
+        if overflow <= 0:
+            return
+        for key in list(self._documents):
+            if overflow <= 0:
+                break
+            if key == keep or self._is_pinned(key):
+                continue
+            del self._documents[key]
+            self.evicted += 1
+            overflow -= 1
+
+    def preload(self, player: str, modules: list[MTP] | None = None):
+        """Pin the documents of a player who joined and load them in one \
+        backend read, so later access does not wait for the backend.
+
+        Args:
+            player (str): The player name.
+            modules (list[MTP] | None, optional): Player modules to load. \
+                Defaults to None, all player modules.
+        """
+        if modules is None:
+            modules = [MTP.BACK, MTP.HOME]
+        try:
+            owner: str = self.get_player_id(player)
+            with self._lock:
+                self._pinned.add(owner)
+                missing: list[MTP] = [
+                    i for i in modules if (i, owner) not in self._documents
+                ]
+                generation: int = self._generation
+            if not missing:
+                return
+            documents: dict[str, dict] = self.backend.read_owner(
+                owner, missing
+            )
+        except (RuntimeError, *STORAGE_ERRORS) as e:
+            self.s.logger.warning(f"data.load_failed: {player}: {e}")
+            return
+        with self._lock:
+            if generation != self._generation:
+                # read while folders moved, loaded again on access
+                return
+            for module in missing:
+                # edits made meanwhile loaded it already
+                if (module, owner) not in self._documents:
+                    self._documents[module, owner] = documents.get(module, {})
+                    self.misses += 1
+            self._evict()
+
+    def release(self, player: str):
+        """Unpin the documents of a player who left, they are evicted \
+        later if memory is needed.
+
+        Args:
+            player (str): The player name.
+        """
+        try:
+            owner: str = self.get_player_id(player)
+        except RuntimeError as e:
+            self.s.logger.warning(f"data.release_failed: {player}: {e}")
+            return
+        with self._lock:
+            self._pinned.discard(owner)
+            self._evict()
+
+    def read(self, module: MTP, name_or_uuid: str | None = None) -> dict:
+        """Get a copy of a data document, read from disk only the first \
+        time.
+
+        Args:
+            module (MTP): MTP module name.
+            name_or_uuid (str | None, optional): The player name or uuid. \
+                Defaults to None.
+
+        Returns:
+            dict: The document, empty if the file does not exist.
+        """
+        key: tuple[MTP, str] = self._get_key(module, name_or_uuid)
+        document: dict = self._get_document(key)
+        with self._lock:
+            return copy.deepcopy(document)
+
+    @contextmanager
+    def edit(
+        self, module: MTP, name_or_uuid: str | None = None
+    ) -> Iterator[dict]:
+        """Change a data document in memory, it is written to disk later \
+        by the flusher.
+
+        Args:
+            module (MTP): MTP module name.
+            name_or_uuid (str | None, optional): The player name or uuid. \
+                Defaults to None.
+
+        Raises:
+            RuntimeError: If the data manager is closed.
+
+        Yields:
+            dict: A copy of the document, it replaces the cached one once \
+                the block exits without an exception.
+        """
+        key: tuple[MTP, str] = self._get_key(module, name_or_uuid)
+        with self._edit_locks[hash(key) % len(self._edit_locks)]:
+            if self._closed:
+                # the flusher would not run again, the change would be lost
+                raise RuntimeError("data.closed")
+            document: dict = self._get_document(key)
+            with self._lock:
+                edited: dict = copy.deepcopy(document)
+            yield edited
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("data.closed")
+                self._documents[key] = edited
+                self._documents.move_to_end(key)
+                self._dirty.add(key)
+                dirty: int = len(self._dirty)
+        self._start_flusher()
+        if dirty >= self.config.data_storage.flush_threshold:
+            self._wakeup.set()
+
+    def _start_flusher(self):
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        self._stop.clear()
+        self._flusher = threading.Thread(
+            target=self._flush_loop, name="MTPData: flusher", daemon=True
+        )
+        self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.config.data_storage.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """Write every changed document to disk now.
+
+        Returns:
+            int: How many documents were written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                keys: list[tuple[MTP, str]] = list(self._dirty)
+                pending: list[tuple[str, str, str]] = [
+                    (
+                        key[0],
+                        key[1],
+                        json.dumps(
+                            self._documents[key], ensure_ascii=False, indent=2
+                        ),
+                    )
+                    for key in keys
+                ]
+                self._dirty.clear()
+            try:
+                self.backend.write_many(pending)
+            except STORAGE_ERRORS as e:
+                self.s.logger.error(f"data.save_failed: {e}")
+                with self._lock:
+                    self._dirty.update(keys)
+                return 0
+            self.written += len(pending)
+            with self._lock:
+                self._evict()
+            return len(pending)
+
+    def migrate(
+        self, backend: StorageBackendType, batch_size: int = 512
+    ) -> int:
+        """Copy every document to another storage backend and switch to \
+        it, while the plugin keeps running. Changes made meanwhile stay in \
+        memory and are written to the new backend afterwards.
+
+        Args:
+            backend (StorageBackendType): The backend to switch to.
+            batch_size (int, optional): Documents written in each batch. \
+                Defaults to 512.
+
+        Raises:
+            ValueError: If it is the current backend or unknown.
+
+        Returns:
+            int: How many documents were copied.
+        """
+        if backend == self.backend.type:
+            raise ValueError(f"data.same_backend: {backend}")
+        with self._flush_lock:
+            target: StorageBackend = create_backend(
+                backend,
+                self.data_folder,
+                self.config.data_storage.sqlite_file,
+                self.config.data_storage.layout,
+            )
+            copied: int = 0
+            batch: list[tuple[str, str, str]] = []
+            try:
+                for document in self.backend.iter_documents():
+                    batch.append(document)
+                    if len(batch) >= batch_size:
+                        target.write_many(batch)
+                        copied += len(batch)
+                        batch = []
+                target.write_many(batch)
+                copied += len(batch)
+            except Exception:
+                target.close()
+                raise
+            with self._lock:
+                source: StorageBackend = self.backend
+                self.backend = target
+                self._generation += 1
+            source.close()
+            self.config.data_storage.backend = backend
+        self._wakeup.set()
+        return copied
+
+    def relayout(self, layout: StorageLayout) -> int:
+        """Move player folders of the json backend to another layout, \
+        while the plugin keeps running. Reads and writes wait for the \
+        move, so nothing is read from or written to the old layout.
+
+        Args:
+            layout (StorageLayout): The layout to switch to.
+
+        Returns:
+            int: How many player folders were moved.
+        """
+        with self._flush_lock, self._lock:
+            moved: int = 0
+            self._generation += 1
+            if isinstance(self.backend, JsonFileBackend):
+                moved = self.backend.relayout(layout)
+            self.config.data_storage.layout = layout
+        return moved
+
+    def close(self):
+        """Stop the flusher and write what is left, call it when \
+        unloading plugin. Documents can not be edited afterwards.
+        """
+        with self._lock:
+            self._closed = True
+        self._stop.set()
+        self._wakeup.set()
+        if self._flusher is not None:
+            self._flusher.join(1)
+            self._flusher = None
+        self.flush()
+        self.backend.close()
+
+    def get_stats(self) -> dict[str, int | str]:
+        return {
+            "backend": self.backend.type,
+            "documents": len(self._documents),
+            "dirty": len(self._dirty),
+            "written": self.written,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evicted": self.evicted,
+        }
+
 
 if __name__ == "__main__":
     print("Print all MTP(ModernTeleport) modules for testing enum.")
@@ -0,0 +1,374 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Collection, Iterator
+from typing import Literal, TypeGuard, get_args
+
+StorageBackendType = Literal["json", "sqlite"]
+# what reading or writing documents may raise, json errors are ValueError
+STORAGE_ERRORS: tuple[type[Exception], ...] = (
+    OSError,
+    ValueError,
+    sqlite3.Error,
+)
+StorageLayout = Literal["flat", "sharded"]
+# player names and uuids never contain a dot, so no player folder is named
+# like it
+SHARD_FOLDER: str = ".shards"
+
+
+def is_backend_type(value: str) -> TypeGuard[StorageBackendType]:
+    return value in get_args(StorageBackendType)
+
+
+def is_layout(value: str) -> TypeGuard[StorageLayout]:
+    return value in get_args(StorageLayout)
+
+
+def get_shard(owner: str) -> str:
+    """Get the shard folders of an owner, two levels of two hex digits \
+    of its md5 so uuids and names spread the same way.
+
+    Args:
+        owner (str): The player folder name.
+
+    Returns:
+        str: Relative path like `ab/cd`.
+    """
+    digest: str = hashlib.md5(owner.encode("utf-8")).hexdigest()
+    return os.path.join(digest[:2], digest[2:4])
+
+
+def get_owner_folder(owner: str, layout: StorageLayout = "flat") -> str:
+    """Get the folder of an owner relative to the data folder.
+
+    Args:
+        owner (str): The player folder name.
+        layout (StorageLayout, optional): "flat" puts it in the data \
+            folder, "sharded" under its shard in `SHARD_FOLDER`. \
+            Defaults to "flat".
+
+    Returns:
+        str: The relative folder path.
+    """
+    if layout == "sharded":
+        return os.path.join(SHARD_FOLDER, get_shard(owner), owner)
+    return owner
+
+
+class StorageBackend(ABC):
+    """Where data documents are kept. A document is addressed by its \
+    module and owner, the owner is the player folder name (name or uuid) \
+    or an empty string for global documents.
+    """
+    type: StorageBackendType
+
+    @abstractmethod
+    def read(self, module: str, owner: str) -> dict | None:
+        """Read a document.
+
+        Args:
+            module (str): MTP module name.
+            owner (str): The player folder name, empty if global.
+
+        Returns:
+            dict | None: None if the document does not exist.
+        """
+
+    def read_owner(
+        self, owner: str, modules: Collection[str]
+    ) -> dict[str, dict]:
+        """Read several documents of a player.
+
+        Args:
+            owner (str): The player folder name.
+            modules (Collection[str]): MTP module names.
+
+        Returns:
+            dict[str, dict]: Module name to document, documents which do \
+                not exist are left out.
+        """
+        documents: dict[str, dict] = {}
+        for module in modules:
+            document: dict | None = self.read(module, owner)
+            if document is not None:
+                documents[module] = document
+        return documents
+
+    @abstractmethod
+    def write_many(self, documents: list[tuple[str, str, str]]):
+        """Write documents in one batch.
+
+        Args:
+            documents (list[tuple[str, str, str]]): Module, owner and the \
+                serialized json text of each document.
+        """
+
+    @abstractmethod
+    def iter_documents(self) -> Iterator[tuple[str, str, str]]:
+        """Iterate all stored documents without loading them at once.
+
+        Yields:
+            tuple[str, str, str]: Module, owner and the json text.
+        """
+
+    def close(self):
+        pass
+
+
+class JsonFileBackend(StorageBackend):
+    """One folder per player with a `<module>.json` file per module, \
+    global documents are `<module>.json` in the data folder. Player \
+    folders are either right in the data folder or under hash shards \
+    in `SHARD_FOLDER`.
+    """
+    type = "json"
+
+    def __init__(self, data_folder: str, layout: StorageLayout = "flat"):
+        self.data_folder: str = data_folder
+        self.layout: StorageLayout = layout
+
+    def get_path(self, module: str, owner: str) -> str:
+        if not owner:
+            return os.path.join(self.data_folder, f"{module}.json")
+        return os.path.join(
+            self.data_folder,
+            get_owner_folder(owner, self.layout),
+            f"{module}.json",
+        )
+
+    def read(self, module: str, owner: str) -> dict | None:
+        try:
+            with open(
+                self.get_path(module, owner), "r", encoding="utf-8"
+            ) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def write_many(self, documents: list[tuple[str, str, str]]):
+        for module, owner, text in documents:
+            path: str = self.get_path(module, owner)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path: str = f"{path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(temp_path, path)
+
+    def iter_documents(self) -> Iterator[tuple[str, str, str]]:
+        if not os.path.isdir(self.data_folder):
+            return
+        with os.scandir(self.data_folder) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(".json"):
+                    yield self._read_text(entry.path, entry.name, "")
+        for owner, folder in self._iter_owner_folders():
+            yield from self._iter_folder(folder, owner)
+
+    def _iter_owner_folders(self) -> Iterator[tuple[str, str]]:
+        with os.scandir(self.data_folder) as entries:
+            for entry in entries:
+                if entry.is_dir() and entry.name != SHARD_FOLDER:
+                    yield entry.name, entry.path
+        for shard in self._iter_shards():
+            with os.scandir(shard) as owners:
+                for owner in owners:
+                    if owner.is_dir():
+                        yield owner.name, owner.path
+
+    def _iter_shards(self) -> Iterator[str]:
+        root: str = os.path.join(self.data_folder, SHARD_FOLDER)
+        if not os.path.isdir(root):
+            return
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if not entry.is_dir():
+                    continue
+                with os.scandir(entry.path) as shards:
+                    for shard in shards:
+                        if shard.is_dir():
+                            yield shard.path
+
+    def relayout(self, layout: StorageLayout) -> int:
+        """Move every player folder to another layout, one folder at a \
+        time by renaming it.
+
+        Args:
+            layout (StorageLayout): The layout to switch to.
+
+        Returns:
+            int: How many player folders were moved.
+        """
+        moved: int = 0
+        if os.path.isdir(self.data_folder):
+            # folders already moved may be scanned again, they are skipped
+            for owner, folder in self._iter_owner_folders():
+                target: str = os.path.join(
+                    self.data_folder, get_owner_folder(owner, layout)
+                )
+                if folder == target:
+                    continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.rename(folder, target)
+                moved += 1
+            if layout == "flat":
+                self._remove_empty_shards()
+        self.layout = layout
+        return moved
+
+    def _remove_empty_shards(self):
+        shards: list[str] = list(self._iter_shards())
+        # the shard folders, then their parents, then the root
+        for folder in (
+            shards
+            + sorted({os.path.dirname(i) for i in shards})
+            + [os.path.join(self.data_folder, SHARD_FOLDER)]
+        ):
+            try:
+                os.rmdir(folder)
+            except OSError:
+                pass
+
+    def _iter_folder(
+        self, folder: str, owner: str
+    ) -> Iterator[tuple[str, str, str]]:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(".json"):
+                    yield self._read_text(entry.path, entry.name, owner)
+
+    def _read_text(
+        self, path: str, file_name: str, owner: str
+    ) -> tuple[str, str, str]:
+        with open(path, "r", encoding="utf-8") as f:
+            return file_name.removesuffix(".json"), owner, f.read()
+
+
+class SqliteBackend(StorageBackend):
+    """All documents in one SQLite database in WAL mode, looked up by \
+    module and owner through the primary key, or by owner alone through \
+    an index. Each batch is written in one transaction.
+
+    The owner is the player name in name mode, so it is the lookup by \
+    name. In uuid mode names are resolved to uuids by the identity cache \
+    before any lookup, a name column would go stale when players rename.
+    """
+    type = "sqlite"
+    _SCHEMA: str = (
+        "CREATE TABLE IF NOT EXISTS documents ("
+        "module TEXT NOT NULL, "
+        "owner TEXT NOT NULL, "
+        "data TEXT NOT NULL, "
+        "PRIMARY KEY (module, owner)"
+        ") WITHOUT ROWID"
+    )
+    _INDEX: str = (
+        "CREATE INDEX IF NOT EXISTS documents_owner ON documents (owner)"
+    )
+    _SELECT: str = "SELECT data FROM documents WHERE module = ? AND owner = ?"
+    _SELECT_OWNER: str = "SELECT module, data FROM documents WHERE owner = ?"
+    _UPSERT: str = (
+        "INSERT INTO documents (module, owner, data) VALUES (?, ?, ?) "
+        "ON CONFLICT (module, owner) DO UPDATE SET data = excluded.data"
+    )
+    _SELECT_ALL: str = "SELECT module, owner, data FROM documents"
+
+    def __init__(self, path: str):
+        """Open or create the database.
+
+        Args:
+            path (str): The database file path.
+        """
+        self.path: str = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock: threading.Lock = threading.Lock()
+        self._conn: sqlite3.Connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(self._SCHEMA)
+        self._conn.execute(self._INDEX)
+
+    def read(self, module: str, owner: str) -> dict | None:
+        with self._lock:
+            row: tuple[str] | None = self._conn.execute(
+                self._SELECT, (module, owner)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def read_owner(
+        self, owner: str, modules: Collection[str]
+    ) -> dict[str, dict]:
+        # one query through the owner index instead of one per module
+        with self._lock:
+            rows: list[tuple[str, str]] = self._conn.execute(
+                self._SELECT_OWNER, (owner,)
+            ).fetchall()
+        return {
+            module: json.loads(data)
+            for module, data in rows
+            if module in modules
+        }
+
+    def write_many(self, documents: list[tuple[str, str, str]]):
+        if not documents:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(self._UPSERT, documents)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def iter_documents(self) -> Iterator[tuple[str, str, str]]:
+        # a separate cursor, rows are fetched a page at a time
+        cursor: sqlite3.Cursor = self._conn.cursor()
+        cursor.arraysize = 256
+        with self._lock:
+            cursor.execute(self._SELECT_ALL)
+        while True:
+            with self._lock:
+                rows: list[tuple[str, str, str]] = cursor.fetchmany()
+            if not rows:
+                break
+            yield from rows
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_backend(
+    backend: StorageBackendType,
+    data_folder: str,
+    sqlite_file: str,
+    layout: StorageLayout = "flat",
+) -> StorageBackend:
+    """Create the storage backend selected in config.
+
+    Args:
+        backend (StorageBackendType): "json" or "sqlite".
+        data_folder (str): The plugin data folder.
+        sqlite_file (str): The database file name, relative to the data \
+            folder.
+        layout (StorageLayout, optional): Player folder layout of the \
+            json backend. Defaults to "flat".
+
+    Raises:
+        ValueError: If the backend is unknown.
+
+    Returns:
+        StorageBackend: The backend.
+    """
+    if backend == "json":
+        return JsonFileBackend(data_folder, layout)
+    if backend == "sqlite":
+        return SqliteBackend(os.path.join(data_folder, sqlite_file))
+    raise ValueError(f"data.unknown_backend: {backend}")
+
@@ -1,13 +1,26 @@
 import asyncio
+import concurrent.futures
+import heapq
+import itertools
+import json
+import secrets
 import modern_teleport.runtime as runtime
 
 from datetime import datetime
-from typing import Literal
+from typing import Any, Literal
+from collections.abc import Callable, Iterator
 from mcdreforged.api.all import PluginServerInterface
 from location_api import MCPosition, Point3D
+from modern_teleport.modules.dispatcher import CommandPriority, dispatch
+from modern_teleport.modules.rcon import RconUnavailableError
+from modern_teleport.utils import Player
+from modern_teleport.utils.rate_limit import RateLimiter
 
 TeleportType = Literal["ask", "invite", "position"]
 TeleportRequestOptions = Literal["accept", "reject", "cancel"]
+RequestStatus = Literal[
+    "pending", "accepted", "rejected", "cancelled", "timeout"
+]
 
 
 def get_teleport_command(
@@ -46,6 +59,91 @@ def get_teleport_command(
         raise TypeError("Invalid teleport type")
 
 
+def teleport_with_back(
+    server: PluginServerInterface,
+    players: list[str],
+    command: str,
+    then: list[str] | None = None,
+    before: list[str] | None = None,
+    record_back: bool = True,
+):
+    """Run a teleport command, pushing where the players were to their \
+    back history first if the back module is enabled.
+
+    Fresh cached positions are used when every player has one, otherwise \
+    the positions are queried back-to-back with the teleport command in \
+    one rcon batch, so the teleport does not wait for an extra round trip. \
+    The commands before and after the teleport always go through the same \
+    channel as the teleport, so they run in order.
+
+    Args:
+        server (PluginServerInterface): MCDReforged plugin server \
+            interface.
+        players (list[str]): The players the command teleports.
+        command (str): The teleport command.
+        then (list[str] | None, optional): Commands run after the \
+            teleport command. Defaults to None.
+        before (list[str] | None, optional): Commands run right before \
+            the teleport command, like tagging the players it selects. \
+            Defaults to None.
+        record_back (bool, optional): False to leave the back history \
+            alone, for teleports which go back. Defaults to True.
+    """
+    backtrack = runtime.backtrack_mgr
+    rcon = runtime.rcon
+
+    def dispatch_all():
+        for i in before or []:
+            dispatch(server, i, CommandPriority.TELEPORT)
+        dispatch(server, command, CommandPriority.TELEPORT)
+        for i in then or []:
+            dispatch(server, i)
+
+    if (
+        not record_back
+        or backtrack is None
+        or rcon is None
+        or runtime.config is None
+        or not runtime.config.enable_modules.back
+        or not rcon.is_available()
+    ):
+        dispatch_all()
+        return
+    max_age: float = runtime.config.back_options.origin_max_age
+    cached: dict[str, MCPosition | None] = {
+        i: rcon.get_cached_position(i, max_age) for i in players
+    }
+    if all(cached.values()):
+        for name, position in cached.items():
+            assert position is not None
+            backtrack.record(name, position)
+        rcon.forget_positions(players)
+        dispatch_all()
+        return
+
+    async def locate_and_teleport():
+        try:
+            positions: dict[str, MCPosition] = (
+                await rcon.async_get_positions_then_execute(
+                    players, [*(before or []), command, *(then or [])]
+                )
+            )
+        except RconUnavailableError as e:
+            # nothing was sent, the teleport still has to run
+            server.logger.warning(f"back.locate_failed: {e}")
+            dispatch_all()
+            return
+        except (RuntimeError, TimeoutError, ConnectionError) as e:
+            # the batch may have run already, sending it again could
+            # teleport twice
+            server.logger.error(f"back.teleport_unknown: {e}")
+            return
+        for name, position in positions.items():
+            backtrack.record(name, position)
+
+    server.schedule_task(locate_and_teleport())
+
+
 class TeleportPosition:
     """Teleport a target player to a specific position.
     """
@@ -119,7 +217,12 @@ class TeleportPosition:
         else:
             raise TypeError("No valid position given.")
 
-    def execute(self, debug: bool = False, src_player: str | None = None):
+    def execute(
+        self,
+        debug: bool = False,
+        src_player: str | None = None,
+        record_back: bool = True,
+    ):
         """Execute the command string and run the teleport task.
 
         Args:
@@ -127,6 +230,8 @@ class TeleportPosition:
                 in console. Defaults to False.
             src_player (str | None, optional): The target player name of \
                 who will receive the notification message. Defaults to None.
+            record_back (bool, optional): Whether the origin is pushed to \
+                the back history of the target player. Defaults to True.
         """
         command: str = self.get_command()
         if "execute" not in command:
@@ -139,7 +244,13 @@ class TeleportPosition:
             if src_player:
                 self.s.tell(src_player, f"> {command}")
         else:
-            self.s.execute(command)
+            assert self.target_player is not None
+            teleport_with_back(
+                self.s,
+                [self.target_player],
+                command,
+                record_back=record_back,
+            )
 
 
 class TeleportRequest:
@@ -172,44 +283,69 @@ class TeleportRequest:
         self.server: PluginServerInterface = server
         self.s = self.server  # alias
         self.tp_type: TeleportType = tp_type
-        self.tp_task: asyncio.Task | None = None
-        self.wait_confirm: asyncio.Future = asyncio.Future()
+        self.status: RequestStatus = "pending"
+        self.deadline: float | None = None
+        self.on_finished: Callable[[TeleportRequest], None] | None = None
         self._command_format: str = get_teleport_command(tp_type)
         self.selected_player: str = selected_player
         self.target_player: str = target_player
+        self.selected: Player = Player(selected_player)
+        self.target: Player = Player(target_player)
+        self.pair: frozenset[Player] = frozenset((self.selected, self.target))
         self.command: str = self._command_format.format(
             selected_player=self.selected_player,
             target_player=self.target_player,
         )
         self.start_time: datetime | None = None
 
-    async def set_task(self):
-        """Set up the async teleport request task.
+    @property
+    def done(self) -> bool:
+        return self.status != "pending"
+
+    def start(self, deadline: float, notify: bool = True):
+        """Mark the request as sent and notify the target player.
+
+        Args:
+            deadline (float): Event loop time when the request expires.
+            notify (bool, optional): Tell the target player, False when \
+                restoring after a reload. Defaults to True.
         """
-        assert runtime.config is not None
         self.start_time = datetime.now()
-        timeout: float = runtime.config.timeout.teleport
-        self.tp_task = asyncio.create_task(
-            asyncio.wait_for(fut=self.wait_confirm, timeout=timeout)
-        )
+        self.deadline = deadline
+        if notify:
+            self.s.tell(self.target_player, "tpr.receive")
 
-        self.s.tell(self.target_player, "tpr.receive")
+    def _finish(self, status: RequestStatus):
+        self.status = status
+        if self.on_finished:
+            self.on_finished(self)
 
     def accept(self):
-        """Accept the teleport request.
+        """Accept the teleport request and run the teleport command.
         """
-        if not self.wait_confirm.done():
-            self.wait_confirm.set_result(True)
+        if not self.done:
             self.s.tell(self.target_player, "tpr.accept")
             self.s.tell(self.selected_player, "tpr.accepted")
+            self.s.logger.info("tpr.accept")
+            teleport_with_back(
+                self.s,
+                [
+                    self.selected_player
+                    if self.tp_type == "ask"
+                    else self.target_player
+                ],
+                self.command,
+            )
+            self._finish("accepted")
 
     def reject(self):
         """Reject the teleport request.
         """
-        if not self.wait_confirm.done():
-            self.wait_confirm.set_result(False)
+        if not self.done:
             self.s.tell(self.target_player, "tpr.reject")
             self.s.tell(self.selected_player, "tpr.rejected")
+            self.s.logger.info("tpr.failed")
+            self._finish("rejected")
 
     def cancel(self, reason: str | None = None):
         """Cancel the teleport request.
@@ -218,8 +354,7 @@ class TeleportRequest:
             reason (str | None, optional): Why the teleport request is \
                 cancelling. Defaults to None.
         """
-        if not self.wait_confirm.done():
-            self.wait_confirm.cancel()
+        if not self.done:
             if self.s.is_server_running():
                 if not reason:
                     self.s.tell(self.target_player, "tpr.cancel")
@@ -227,28 +362,15 @@ class TeleportRequest:
                 else:
                     self.s.tell(self.target_player, reason)
                     self.s.tell(self.selected_player, reason)
+            self.when_cancelled()
+            self._finish("cancelled")
 
-    async def wait_for_target_player(self) -> bool:
-        """Asyncly wait for confirmation from the target player.
-
-        Returns:
-            bool: True if the target player accepted the teleport request.
+    def expire(self):
+        """Expire the teleport request, called when its deadline passed.
         """
-        try:
-            result: bool = await self.wait_confirm
-            if result:
-                self.s.logger.info("tpr.accept")
-                self.s.execute(self.command)
-                return True
-            else:
-                self.s.logger.info("tpr.failed")
-                return False
-        except asyncio.TimeoutError:
+        if not self.done:
             self.when_timeout()
-            return False
-        except asyncio.CancelledError:
-            self.when_cancelled()
-            return False
+            self._finish("timeout")
 
     def when_timeout(self):
         """Send error logs and messages when the teleport request timeout.
@@ -272,8 +394,186 @@ class TeleportRequest:
             )
 
 
+class GroupTeleportRequest:
+    """Invite several players to teleport to one player at once.
+
+    Invites and results go out as one `tellraw` each. Players who accept \
+    get a unique tag, so a single `tp` moves all of them when every \
+    invited player has answered or the deadline passed.
+    """
+    def __init__(
+        self,
+        server: PluginServerInterface,
+        inviter: str,
+        players: list[str],
+    ):
+        """Create a group teleport request.
+
+        Args:
+            server (PluginServerInterface): MCDReforged plugin server \
+                interface.
+            inviter (str): The player others will be teleported to.
+            players (list[str]): The invited players, the inviter is \
+                ignored if included.
+        """
+        self.server: PluginServerInterface = server
+        self.s = self.server  # alias
+        self.inviter_player: str = inviter
+        self.inviter: Player = Player(inviter)
+        self.invited: dict[Player, str] = {}
+        for i in players:
+            player = Player(i)
+            if player != self.inviter:
+                self.invited.setdefault(player, i)
+        self.accepted: dict[Player, str] = {}
+        self.answered: set[Player] = set()
+        self.status: RequestStatus = "pending"
+        self.deadline: float | None = None
+        self.on_finished: Callable[[GroupTeleportRequest], None] | None = None
+        self.tag: str = f"mtp_group_{secrets.token_hex(4)}"
+        self.command: str = f"tp @a[tag={self.tag}] {self.inviter_player}"
+        self.start_time: datetime | None = None
+
+    @property
+    def done(self) -> bool:
+        return self.status != "pending"
+
+    def tell_many(self, players: list[str], message: str):
+        """Send one message to several players, one `tell` each.
+
+        A target selector cannot match a list of names, and tagging the \
+        players first costs more commands than it saves.
+
+        Args:
+            players (list[str]): The player names.
+            message (str): The message.
+        """
+        for i in players:
+            self.s.tell(i, message)
+
+    def start(self, deadline: float, notify: bool = True):
+        """Mark the request as sent and invite all players.
+
+        Args:
+            deadline (float): Event loop time when the request expires.
+            notify (bool, optional): Send the invites, False when \
+                restoring after a reload. Defaults to True.
+        """
+        self.start_time = datetime.now()
+        self.deadline = deadline
+        if notify:
+            self.tell_many(list(self.invited.values()), "tpr.group_receive")
+            self.s.tell(self.inviter_player, "tpr.group_sent")
+
+    def _finish(self, status: RequestStatus):
+        self.status = status
+        if self.on_finished:
+            self.on_finished(self)
+
+    def respond(self, player: Player, accept: bool):
+        """Record the answer of an invited player.
+
+        Args:
+            player (Player): The invited player.
+            accept (bool): Whether the player accepted.
+        """
+        if self.done or player not in self.invited or player in self.answered:
+            return
+        self.answered.add(player)
+        name: str = self.invited[player]
+        if accept:
+            self.accepted[player] = name
+            self.s.tell(name, "tpr.accept")
+        else:
+            self.s.tell(name, "tpr.reject")
+        if len(self.answered) == len(self.invited):
+            self.teleport()
+
+    def remove(self, player: Player):
+        """Forget an invited player, useful when the player left.
+
+        Args:
+            player (Player): The invited player.
+        """
+        if self.done or self.invited.pop(player, None) is None:
+            return
+        self.answered.discard(player)
+        self.accepted.pop(player, None)
+        if not self.invited:
+            self.cancel()
+        elif len(self.answered) == len(self.invited):
+            self.teleport()
+
+    def teleport(self):
+        """Teleport every player who accepted with a single command, they \
+        are tagged right before it on the same channel, so players who \
+        left meanwhile are never tagged.
+        """
+        if self.done:
+            return
+        if not self.accepted:
+            self.s.tell(self.inviter_player, "tpr.group_empty")
+            self._finish("rejected")
+            return
+        self.s.logger.info(
+            f"tpr.group_accept: {len(self.accepted)} -> "
+            f"{self.inviter_player}"
+        )
+        teleport_with_back(
+            self.s,
+            list(self.accepted.values()),
+            self.command,
+            [
+                (
+                    f"tellraw @a[tag={self.tag}] "
+                    f"{json.dumps({'text': 'tpr.accepted'})}"
+                ),
+                f"tag @a[tag={self.tag}] remove {self.tag}",
+            ],
+            [f"tag {i} add {self.tag}" for i in self.accepted.values()],
+        )
+        self.s.tell(self.inviter_player, "tpr.group_accepted")
+        self._finish("accepted")
+
+    def cancel(self, reason: str | None = None):
+        """Cancel the group teleport request, nobody is teleported.
+
+        Args:
+            reason (str | None, optional): Why the request is cancelling. \
+                Defaults to None.
+        """
+        if self.done:
+            return
+        if self.s.is_server_running():
+            self.tell_many(
+                list(self.invited.values()) + [self.inviter_player],
+                reason or "tpr.cancel",
+            )
+        self._finish("cancelled")
+
+    def expire(self):
+        """Teleport players who accepted so far, called when its deadline \
+        passed.
+        """
+        self.teleport()
+
+
+PendingRequest = TeleportRequest | GroupTeleportRequest
+
+
 class SessionManager:
     """Session manager for managing the teleport requests async designed.
+
+    Requests are indexed by their selected player, their target player \
+    and the unordered pair of both, so lookups do not scan all pending \
+    requests. Group requests are indexed by their inviter and each \
+    invited player. Expiry is driven by one deadline heap and a single \
+    timer on the event loop, finished requests are dropped from the heap \
+    lazily.
+
+    All state is owned by the event loop running `add`, public methods \
+    called from other threads hand their work over to that loop instead \
+    of taking locks.
     """
     def __init__(self, server: PluginServerInterface):
         """Init session manager.
@@ -284,7 +584,170 @@ class SessionManager:
         """
         self.server: PluginServerInterface = server
         self.s = self.server  # alias
-        self.tp_tasks: list[TeleportRequest] = []
+        self._by_pair: dict[frozenset[Player], TeleportRequest] = {}
+        self._by_selected: dict[Player, dict[TeleportRequest, None]] = {}
+        self._by_target: dict[Player, dict[TeleportRequest, None]] = {}
+        self._groups_by_inviter: dict[Player, GroupTeleportRequest] = {}
+        self._groups_by_player: dict[
+            Player, dict[GroupTeleportRequest, None]
+        ] = {}
+        self._timers: list[tuple[float, int, PendingRequest]] = []
+        self._timer_seq: itertools.count = itertools.count()
+        self._timer_handle: asyncio.TimerHandle | None = None
+        self._stale_timers: int = 0
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.rate_limiter: RateLimiter | None = None
+
+    @property
+    def tp_tasks(self) -> list[TeleportRequest]:
+        """All pending teleport requests, in arrival order.
+        """
+        return list(self._by_pair.values())
+
+    def _in_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def call_in_loop(
+        self, func: Callable[..., Any], *args: Any
+    ) -> concurrent.futures.Future:
+        """Run a callable on the event loop owning the requests, directly \
+        if already on it or if no loop owns them yet.
+
+        Args:
+            func (Callable[..., Any]): The callable to run.
+            *args (Any): Arguments passed to the callable.
+
+        Returns:
+            concurrent.futures.Future: Result of the callable, can be \
+                waited from any thread except the loop itself.
+        """
+        future: concurrent.futures.Future = concurrent.futures.Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(func(*args))
+            except Exception as e:  # noqa: BLE001 - raised to the caller
+                future.set_exception(e)
+
+        loop = self.loop
+        if loop is None or not loop.is_running() or self._in_loop():
+            run()
+            return future
+        try:
+            loop.call_soon_threadsafe(run)
+        except RuntimeError:  # loop closed meanwhile
+            run()
+        return future
+
+    def _index(self, tp_task: TeleportRequest):
+        self._by_pair[tp_task.pair] = tp_task
+        self._by_selected.setdefault(tp_task.selected, {})[tp_task] = None
+        self._by_target.setdefault(tp_task.target, {})[tp_task] = None
+
+    def _unindex(self, tp_task: TeleportRequest):
+        if self._by_pair.get(tp_task.pair) is tp_task:
+            del self._by_pair[tp_task.pair]
+        for index, player in (
+            (self._by_selected, tp_task.selected),
+            (self._by_target, tp_task.target),
+        ):
+            requests = index.get(player)
+            if requests is not None:
+                requests.pop(tp_task, None)
+                if not requests:
+                    del index[player]
+
+    def get_requests_of(self, player: str) -> list[TeleportRequest]:
+        """Get pending requests sent or received by a player, should be \
+        called on the event loop.
+
+        Args:
+            player (str): The player name.
+
+        Returns:
+            list[TeleportRequest]: The requests, in arrival order for \
+                each side.
+        """
+        _player = Player(player)
+        return list(self._by_selected.get(_player, {})) + list(
+            self._by_target.get(_player, {})
+        )
+
+    @property
+    def group_tasks(self) -> list[GroupTeleportRequest]:
+        """All pending group teleport requests, in arrival order.
+        """
+        return list(self._groups_by_inviter.values())
+
+    def _index_group(self, group: GroupTeleportRequest):
+        self._groups_by_inviter[group.inviter] = group
+        for i in group.invited:
+            self._groups_by_player.setdefault(i, {})[group] = None
+
+    def _unindex_group(self, group: GroupTeleportRequest):
+        if self._groups_by_inviter.get(group.inviter) is group:
+            del self._groups_by_inviter[group.inviter]
+        for i in group.invited:
+            groups = self._groups_by_player.get(i)
+            if groups is not None:
+                groups.pop(group, None)
+                if not groups:
+                    del self._groups_by_player[i]
+
+    def _on_finished(self, tp_task: TeleportRequest):
+        self._unindex(tp_task)
+        self._drop_timer()
+
+    def _on_group_finished(self, group: GroupTeleportRequest):
+        self._unindex_group(group)
+        self._drop_timer()
+
+    def _drop_timer(self):
+        self._stale_timers += 1
+        if self._stale_timers > 64 and self._stale_timers * 2 > len(
+            self._timers
+        ):
+            self._timers = [i for i in self._timers if not i[2].done]
+            heapq.heapify(self._timers)
+            self._stale_timers = 0
+
+    def _schedule_timer(self, loop: asyncio.AbstractEventLoop):
+        while self._timers and self._timers[0][2].done:
+            heapq.heappop(self._timers)
+            self._stale_timers = max(0, self._stale_timers - 1)
+        if not self._timers:
+            if self._timer_handle:
+                self._timer_handle.cancel()
+                self._timer_handle = None
+            return
+        deadline: float = self._timers[0][0]
+        if self._timer_handle:
+            if self._timer_handle.when() <= deadline:
+                return
+            self._timer_handle.cancel()
+        self._timer_handle = loop.call_at(
+            deadline, self._fire_timers, loop
+        )
+
+    def _fire_timers(self, loop: asyncio.AbstractEventLoop):
+        self._timer_handle = None
+        now: float = loop.time()
+        while self._timers and self._timers[0][0] <= now:
+            _, _, tp_task = heapq.heappop(self._timers)
+            if tp_task.done:
+                self._stale_timers = max(0, self._stale_timers - 1)
+                continue
+            try:
+                tp_task.expire()
+            # one failing request must not stop the timers of the others
+            except Exception as e:  # noqa: BLE001
+                self.s.logger.error(f"tpr.expire_failed: {e}")
+        self._schedule_timer(loop)
 
     async def add(self, tp_task: TeleportRequest):
         """Add a teleport request in session manager.
@@ -292,45 +755,123 @@ class SessionManager:
         Args:
             tp_task (TeleportRequest): A teleport request task.
         """
-        if len(self.tp_tasks) > 0:
-            for i in self.tp_tasks:
-                if (
-                    i.selected_player.lower()
-                    == tp_task.selected_player.lower()
-                    and i.target_player.lower()
-                    == tp_task.target_player.lower()
-                ) or (
-                    i.selected_player.lower() == tp_task.target_player.lower()
-                    and i.target_player.lower()
-                    == tp_task.selected_player.lower()
-                ):
-                    self.s.tell(tp_task.selected_player, "tpr.exists")
-                    self.s.logger.warning("tpr.exists")
-                    return
-        self.tp_tasks.append(tp_task)
-        try:
-            await tp_task.set_task()
-            await tp_task.wait_for_target_player()
-        finally:
-            if tp_task in self.tp_tasks:
-                self.tp_tasks.remove(tp_task)
+        self.loop = asyncio.get_running_loop()
+        self._add(tp_task)
 
-    def schedule_add(self, tp_task: TeleportRequest):
-        """Add a teleport request task and schedule it in MCDReforged \
-            AsyncTaskExecutor.
+    def _add(self, tp_task: TeleportRequest, remaining: float | None = None):
+        assert runtime.config is not None and self.loop is not None
+        if tp_task.pair in self._by_pair:
+            self.s.tell(tp_task.selected_player, "tpr.exists")
+            self.s.logger.warning("tpr.exists")
+            return
+        deadline: float = self.loop.time() + (
+            runtime.config.timeout.teleport if remaining is None else remaining
+        )
+        self._index(tp_task)
+        tp_task.on_finished = self._on_finished
+        tp_task.start(deadline, notify=remaining is None)
+        self._push_timer(tp_task, deadline)
+
+    def _push_timer(self, tp_task: PendingRequest, deadline: float):
+        assert self.loop is not None
+        heapq.heappush(
+            self._timers, (deadline, next(self._timer_seq), tp_task)
+        )
+        self._schedule_timer(self.loop)
+
+    def _add_group(
+        self, group: GroupTeleportRequest, remaining: float | None = None
+    ):
+        assert runtime.config is not None and self.loop is not None
+        if group.inviter in self._groups_by_inviter:
+            self.s.tell(group.inviter_player, "tpr.exists")
+            return
+        if not group.invited:
+            self.s.tell(group.inviter_player, "tpr.group_empty")
+            return
+        deadline: float = self.loop.time() + (
+            runtime.config.timeout.group_teleport
+            if remaining is None
+            else remaining
+        )
+        self._index_group(group)
+        group.on_finished = self._on_group_finished
+        group.start(deadline, notify=remaining is None)
+        self._push_timer(group, deadline)
+
+    def schedule_add(
+        self, tp_task: TeleportRequest, limit: bool = True
+    ) -> concurrent.futures.Future | None:
+        """Add a teleport request task from any thread, it is queued on the \
+            event loop in the order of calls. The first request is scheduled \
+            in MCDReforged AsyncTaskExecutor to learn the loop.
 
         Args:
             tp_task (TeleportRequest): The teleport request task.
+            limit (bool, optional): Take a token from `rate_limiter` for the \
+                selected player, pass False if the caller already did. \
+                Defaults to True.
+
+        Returns:
+            concurrent.futures.Future | None: Done when the request is \
+                added, None for the first request or if it is rate limited.
         """
+        if limit and not self.acquire(tp_task.selected_player):
+            self.s.tell(tp_task.selected_player, "tpr.rate_limited")
+            return None
+        return self._submit(self._add, tp_task)
+
+    def schedule_add_group(
+        self, group: GroupTeleportRequest, limit: bool = True
+    ) -> concurrent.futures.Future | None:
+        """Add a group teleport request from any thread, like \
+            `schedule_add`.
+
+        Args:
+            group (GroupTeleportRequest): The group teleport request.
+            limit (bool, optional): Take a token from `rate_limiter` for the \
+                inviter. Defaults to True.
+
+        Returns:
+            concurrent.futures.Future | None: Done when the request is \
+                added, None for the first request or if it is rate limited.
+        """
+        if limit and not self.acquire(group.inviter_player):
+            self.s.tell(group.inviter_player, "tpr.rate_limited")
+            return None
+        return self._submit(self._add_group, group)
+
+    def _submit(
+        self, func: Callable[..., None], *args: Any
+    ) -> concurrent.futures.Future | None:
+        if self.loop is not None:
+            return self.call_in_loop(func, *args)
+
         async def add_task():
-            await self.add(tp_task)
+            self.loop = asyncio.get_running_loop()
+            func(*args)
 
         self.s.schedule_task(add_task())
 
+    def acquire(self, player: str | None) -> bool:
+        """Check the rate limit before sending a request.
+
+        Args:
+            player (str | None): The player sending it, only the global \
+                limit applies if None.
+
+        Returns:
+            bool: False if the request should be dropped.
+        """
+        if self.rate_limiter is None:
+            return True
+        return self.rate_limiter.acquire(player)
+
     def confirm_latest_request(
         self, target_player: str, option: TeleportRequestOptions
-    ):
-        """Confirm the latest teleport request in session manager.
+    ) -> concurrent.futures.Future:
+        """Confirm the latest teleport request in session manager, safe to \
+        call from any thread.
 
         Args:
             target_player (str): The target player of the target teleport \
@@ -339,33 +880,193 @@ class SessionManager:
 
         Raises:
             ValueError: Raises if invalid option given.
+
+        Returns:
+            concurrent.futures.Future: Done when the request is confirmed.
         """
-        tasks_to_do: list[TeleportRequest] = []
-        for i in self.tp_tasks:
-            if i.target_player.lower() == target_player.lower():
-                tasks_to_do.append(i)
+        if option not in ("accept", "reject", "cancel"):
+            raise ValueError(f"Invalid option: {option}")
+        return self.call_in_loop(
+            self._confirm_latest_request, Player(target_player), option
+        )
 
-        if not tasks_to_do:
+    def _confirm_latest_request(
+        self, target: Player, option: TeleportRequestOptions
+    ):
+        requests = self._by_target.get(target)
+        if not requests:
+            groups = self._groups_by_player.get(target)
+            if groups:
+                next(reversed(groups)).respond(target, option == "accept")
             return
-
-        latest_task: TeleportRequest = max(
-            tasks_to_do,
-            key=lambda task: task.start_time
-            if task.start_time
-            else datetime.min,
-        )
+        latest_task: TeleportRequest = next(reversed(requests))
         if option == "accept":
             latest_task.accept()
         elif option == "reject":
             latest_task.reject()
-        elif option == "cancel":
-            latest_task.cancel()
         else:
-            raise ValueError(f"Invalid option: {option}")
+            latest_task.cancel()
 
-    def cancel_all_requests(self):
-        """Cancel all teleport requests in session manager. Useful when \
-            unloading plugin.
+    def cancel_requests_of(
+        self, player: str, reason: str | None = None
+    ) -> concurrent.futures.Future:
+        """Cancel requests sent or received by a player, safe to call from \
+        any thread. Useful when the player left.
+
+        Args:
+            player (str): The player name.
+            reason (str | None, optional): Why the requests are cancelling. \
+                Defaults to None.
+
+        Returns:
+            concurrent.futures.Future: Done when the requests are cancelled.
+        """
+        return self.call_in_loop(self._cancel_requests_of, player, reason)
+
+    def _cancel_requests_of(self, player: str, reason: str | None):
+        for i in self.get_requests_of(player):
+            i.cancel(reason)
+        _player = Player(player)
+        group: GroupTeleportRequest | None = self._groups_by_inviter.get(
+            _player
+        )
+        if group:
+            group.cancel(reason)
+        for i in self._groups_by_player.pop(_player, {}):
+            i.remove(_player)
+
+    def cancel_all_requests(self) -> concurrent.futures.Future:
+        """Cancel all teleport requests in session manager, safe to call \
+        from any thread. Useful when unloading plugin.
+
+        Returns:
+            concurrent.futures.Future: Done when the requests are cancelled.
         """
+        return self.call_in_loop(self._cancel_all_requests)
+
+    def _cancel_all_requests(self):
         for i in self.tp_tasks:
             i.cancel()
+        for i in self.group_tasks:
+            i.cancel()
+        self._clear_timers()
+
+    def _clear_timers(self):
+        if self._timer_handle:
+            self._timer_handle.cancel()
+            self._timer_handle = None
+        self._timers.clear()
+        self._stale_timers = 0
+
+    def export_requests(self) -> concurrent.futures.Future:
+        """Hand all pending requests over as plain data and forget them \
+        without notifying anybody, safe to call from any thread. Used \
+        before the plugin reloads.
+
+        Returns:
+            concurrent.futures.Future: Resolved with the exported data, \
+                which can be passed to `import_requests`.
+        """
+        return self.call_in_loop(self._export_requests)
+
+    def _export_requests(self) -> dict[str, list[dict[str, Any]]]:
+        now: float = self.loop.time() if self.loop else 0
+        requests: list[dict[str, Any]] = [
+            {
+                "type": i.tp_type,
+                "selected": i.selected_player,
+                "target": i.target_player,
+                "remaining": (i.deadline or now) - now,
+            }
+            for i in self.tp_tasks
+        ]
+        groups: list[dict[str, Any]] = [
+            {
+                "inviter": i.inviter_player,
+                "invited": list(i.invited.values()),
+                "accepted": list(i.accepted.values()),
+                "answered": [i.invited[j] for j in i.answered],
+                "tag": i.tag,
+                "remaining": (i.deadline or now) - now,
+            }
+            for i in self.group_tasks
+        ]
+        for i in self.tp_tasks + self.group_tasks:
+            i.status = "cancelled"
+        self._by_pair.clear()
+        self._by_selected.clear()
+        self._by_target.clear()
+        self._groups_by_inviter.clear()
+        self._groups_by_player.clear()
+        self._clear_timers()
+        return {"requests": requests, "groups": groups}
+
+    def import_requests(
+        self, data: dict[str, list[dict[str, Any]]]
+    ) -> concurrent.futures.Future | None:
+        """Restore requests exported by `export_requests` with their \
+        remaining time, players are not notified again.
+
+        Args:
+            data (dict[str, list[dict[str, Any]]]): The exported data.
+
+        Returns:
+            concurrent.futures.Future | None: Done when the requests are \
+                restored, None if the loop is not known yet.
+        """
+        return self._submit(self._import_requests, data)
+
+    def _import_requests(self, data: dict[str, list[dict[str, Any]]]):
+        for tp_task, remaining in requests_from_data(self.s, data):
+            if isinstance(tp_task, GroupTeleportRequest):
+                self._add_group(tp_task, max(0, remaining))
+            else:
+                self._add(tp_task, max(0, remaining))
+
+
+def requests_from_data(
+    server: PluginServerInterface, data: dict[str, list[dict[str, Any]]]
+) -> Iterator[tuple[PendingRequest, float]]:
+    """Rebuild requests exported by `SessionManager.export_requests`, \
+    they are not added to any session manager.
+
+    Args:
+        server (PluginServerInterface): MCDReforged plugin server \
+            interface.
+        data (dict[str, list[dict[str, Any]]]): The exported data.
+
+    Yields:
+        tuple[PendingRequest, float]: Each request and its remaining \
+            seconds.
+    """
+    for i in data.get("requests", []):
+        yield (
+            TeleportRequest(server, i["type"], i["selected"], i["target"]),
+            i["remaining"],
+        )
+    for i in data.get("groups", []):
+        group = GroupTeleportRequest(server, i["inviter"], i["invited"])
+        group.accepted = {Player(j): j for j in i["accepted"]}
+        group.answered = {Player(j) for j in i["answered"]}
+        group.tag = i["tag"]
+        group.command = f"tp @a[tag={group.tag}] {group.inviter_player}"
+        yield group, i["remaining"]
+
+
+def cancel_exported_requests(
+    server: PluginServerInterface, data: dict[str, list[dict[str, Any]]]
+):
+    """Cancel requests exported by `SessionManager.export_requests` which \
+    no session manager took over, notifying players and removing group \
+    tags.
+
+    Args:
+        server (PluginServerInterface): MCDReforged plugin server \
+            interface.
+        data (dict[str, list[dict[str, Any]]]): The exported data.
+    """
+    for tp_task, _ in requests_from_data(server, data):
+        try:
+            tp_task.cancel()
+        except (RuntimeError, OSError) as e:
+            server.logger.error(f"tpr.cancel_failed: {e}")
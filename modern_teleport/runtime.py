@@ -1,7 +1,9 @@
 from mcdreforged.api.all import PluginServerInterface
-from location_api import MCPosition
 from modern_teleport.mcdr.config import MainConfig
-from modern_teleport.utils import Player
+from modern_teleport.modules.back import BacktrackManager, DeathManager
+from modern_teleport.modules.dispatcher import CommandDispatcher
+from modern_teleport.modules.home import HomeManager
+from modern_teleport.modules.players import OnlinePlayers
 from modern_teleport.modules.rcon import RconManager
 from modern_teleport.modules.storage import DataManager
 from modern_teleport.modules.tpmanager_async import SessionManager
@@ -14,10 +16,11 @@ server: PluginServerInterface | None = None
 rcon: RconManager | None = None
 data_mgr: DataManager | None = None
 async_tp_mgr: SessionManager | None = None
-rcon_online_players: list[Player] | None = None
-
-# Cached player data
-latest_death_positions: dict[str, MCPosition] = {}
+online_players: OnlinePlayers | None = None
+dispatcher: CommandDispatcher | None = None
+death_mgr: DeathManager | None = None
+backtrack_mgr: BacktrackManager | None = None
+home_mgr: HomeManager | None = None
 
 
 def load_config(cfg: MainConfig):
@@ -38,3 +41,15 @@ def set_server(s: PluginServerInterface):
     """
     global server
     server = s
+
+
+def get_online_players() -> OnlinePlayers | None:
+    """Get the online player registry if it is ready to be trusted.
+
+    Returns:
+        OnlinePlayers | None: None if the registry is missing or not \
+            seeded yet.
+    """
+    if online_players is not None and online_players.ready:
+        return online_players
+    return None
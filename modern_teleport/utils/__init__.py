@@ -1,8 +1,12 @@
+import threading
+
 from typing import Literal, Self
 from uuid import UUID
+from weakref import WeakValueDictionary
 
-from auto_uuid_api import local_api
+from auto_uuid_api import is_uuid
 from modern_teleport.utils.general_tools import execute_if
+from modern_teleport.utils.identity import identity_cache
 
 from mcdreforged.api.all import (
     CommandContext,
@@ -41,26 +45,86 @@ class FeatureDisabledError(Exception):
 
 
 class Player:
-    def __init__(
-        self, name: str | None = None, uuid: str | UUID | None = None
-    ) -> None:
-        self.name: str | None = name
-        self.uuid: UUID | None = None  # pyright: ignore[reportRedeclaration]
-        if isinstance(uuid, str):
-            self.uuid: UUID | None = UUID(uuid)
+    """Immutable player identity, one shared instance per player.
+
+    Players are equal when their names match ignoring case, so they can \
+    be used as dict keys and set members. A player whose name could not \
+    be resolved from its uuid is keyed by the uuid instead, and is not \
+    equal to a named player with that uuid created later. A uuid learnt \
+    later is filled into the shared instance, it is not part of the \
+    identity.
+    """
+    __slots__ = ("__weakref__", "key", "name", "uuid")
+    _registry: WeakValueDictionary[str, "Player"] = WeakValueDictionary()
+    _registry_lock: threading.Lock = threading.Lock()
+    name: str | None
+    uuid: UUID | None
+    key: str
+
+    def __new__(
+        cls, name: str | None = None, uuid: str | UUID | None = None
+    ) -> Self:
         if not name and not uuid:
             raise TypeError("No information provided for this player.")
-        self.try_complete_profile()
-
-    def try_complete_profile(self):
-        if not self.name and self.uuid:
-            if local_api:
-                _result = local_api.get(str(self.uuid))
-                self.name = _result
-        if not self.uuid and self.name:
-            if local_api:
-                _result: str | None = local_api.get(self.name)
-                self.uuid = UUID(_result)
+        if name and not uuid and is_uuid(name):
+            name, uuid = None, name
+        _uuid: UUID | None = UUID(uuid) if isinstance(uuid, str) else uuid
+        player: Player | None = cls._lookup(name, _uuid)
+        if player is not None and player.name and player.uuid:
+            return player
+        # only players not complete yet wait for the identity cache
+        name, _uuid = cls.try_complete_profile(name, _uuid)
+        uuid_key: str | None = f"uuid:{_uuid}" if _uuid else None
+        key: str = f"name:{name.lower()}" if name else f"uuid:{_uuid}"
+        with cls._registry_lock:
+            player = cls._registry.get(key)
+            if player is not None:
+                if uuid_key and player.uuid is None:
+                    object.__setattr__(player, "uuid", _uuid)
+                    cls._registry[uuid_key] = player
+                return player
+            player = super().__new__(cls)
+            object.__setattr__(player, "name", name)
+            object.__setattr__(player, "uuid", _uuid)
+            object.__setattr__(player, "key", key)
+            cls._registry[key] = player
+            if uuid_key:
+                cls._registry[uuid_key] = player
+        return player
+
+    @classmethod
+    def _lookup(cls, name: str | None, uuid: UUID | None) -> "Player | None":
+        with cls._registry_lock:
+            player: Player | None = None
+            if name:
+                player = cls._registry.get(f"name:{name.lower()}")
+            elif uuid:
+                player = cls._registry.get(f"uuid:{uuid}")
+            if player is not None and uuid and player.uuid is None:
+                object.__setattr__(player, "uuid", uuid)
+                cls._registry[f"uuid:{uuid}"] = player
+            return player
+
+    @staticmethod
+    def try_complete_profile(
+        name: str | None, uuid: UUID | None
+    ) -> tuple[str | None, UUID | None]:
+        if not name and uuid:
+            name = identity_cache.get_name(str(uuid))
+        if not uuid and name:
+            _result: str | None = identity_cache.get_uuid(name)
+            if _result:
+                uuid = UUID(_result)
+        return name, uuid
+
+    def __setattr__(self, name: str, value: object):
+        raise AttributeError("Player is immutable.")
+
+    def __delattr__(self, name: str):
+        raise AttributeError("Player is immutable.")
+
+    def __reduce__(self):
+        return (Player, (self.name, self.uuid))
 
     def get_string(self, data_type: PlayerDataType, auto: bool = False) -> str:
         if data_type == "name":
@@ -90,26 +154,21 @@ class Player:
     def __str__(self) -> str:
         return f"Player(name={self.name}, uuid={self.uuid})"
 
+    def __repr__(self) -> str:
+        return str(self)
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
     def __eq__(self, value: object) -> bool:
-        class_match: bool = False
-        name_match: bool = False
-        uuid_match: bool = False
-        if isinstance(value, Player):
-            class_match = True
-        else:
+        if self is value:
+            return True
+        if not isinstance(value, Player):
             return False
-        if self.name is not None and value.name is not None:
-            name_match = (self.name.lower() == value.name.lower())
-        else:
-            name_match = (self.name is None) == (value.name is None)
-        return (
-            class_match is True
-            and name_match is True
-            and uuid_match is True
-        )
+        return self.key == value.key
 
 
 if __name__ == "__main__":
-    player = Player(uuid="00000000-0000-0000-0000-000000000000")
-    player.name = "Steve"
+    player = Player("Steve", "00000000-0000-0000-0000-000000000000")
     print(player)
+    print(player is Player(uuid="00000000-0000-0000-0000-000000000000"))
@@ -0,0 +1,78 @@
+from bisect import bisect_left, insort
+
+
+class PrefixIndex:
+    """Sorted index of names for case-insensitive prefix completion.
+
+    Names are added and removed in place. Suggesting copies only the slice \
+    it returns, so it is safe while another thread updates the index.
+    """
+    def __init__(self, names: list[str] | None = None):
+        """Init prefix index.
+
+        Args:
+            names (list[str] | None, optional): Initial names. \
+                Defaults to None.
+        """
+        self._keys: list[str] = []
+        self._names: dict[str, str] = {}
+        if names:
+            self.reset(names)
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self._names
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def reset(self, names: list[str]):
+        """Replace all names in the index.
+
+        Args:
+            names (list[str]): The new names.
+        """
+        self._names = {i.lower(): i for i in names}
+        self._keys = sorted(self._names)
+
+    def add(self, name: str):
+        key: str = name.lower()
+        if key not in self._names:
+            insort(self._keys, key)
+        self._names[key] = name
+
+    def remove(self, name: str):
+        key: str = name.lower()
+        if self._names.pop(key, None) is None:
+            return
+        index: int = bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            del self._keys[index]
+
+    def clear(self):
+        self._keys = []
+        self._names = {}
+
+    def suggest(self, prefix: str = "", limit: int = 50) -> list[str]:
+        """Get names starting with a prefix, ignoring case.
+
+        Args:
+            prefix (str, optional): The typed prefix. Defaults to "".
+            limit (int, optional): Max names returned, unlimited if not \
+                positive. Defaults to 50.
+
+        Returns:
+            list[str]: Matching names in their original case, sorted.
+        """
+        key: str = prefix.lower()
+        start: int = bisect_left(self._keys, key)
+        # one slice, the list may change in place meanwhile
+        keys: list[str] = (
+            self._keys[start:start + limit] if limit > 0
+            else self._keys[start:]
+        )
+        result: list[str] = []
+        for i in keys:
+            if not i.startswith(key):
+                break
+            result.append(self._names.get(i, i))
+        return result
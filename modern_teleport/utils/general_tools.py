@@ -1,3 +1,5 @@
+from bisect import bisect_left, insort
+from collections import deque
 from typing import Callable, TypeVar, ParamSpec
 from functools import wraps
 
@@ -29,3 +31,49 @@ def execute_if(
         return wrapper
 
     return decorator
+
+
+class LatencyTracker:
+    """Rolling window of latency samples in seconds, also kept sorted so \
+    percentiles are read without sorting.
+    """
+    def __init__(self, size: int = 256):
+        """Init latency tracker.
+
+        Args:
+            size (int, optional): How many recent samples are kept. \
+                Defaults to 256.
+        """
+        self.samples: deque[float] = deque(maxlen=size)
+        self._ordered: list[float] = []
+        self.total: int = 0
+
+    def record(self, seconds: float):
+        if len(self.samples) == self.samples.maxlen:
+            oldest: float = self.samples[0]
+            del self._ordered[bisect_left(self._ordered, oldest)]
+        self.samples.append(seconds)
+        insort(self._ordered, seconds)
+        self.total += 1
+
+    def percentile(self, p: float) -> float | None:
+        """Get a percentile of the recent samples.
+
+        Args:
+            p (float): The percentile, from 0 to 100.
+
+        Returns:
+            float | None: None if there are no samples yet.
+        """
+        ordered: list[float] = self._ordered
+        if not ordered:
+            return None
+        index: int = min(len(ordered) - 1, int(len(ordered) * p / 100))
+        return ordered[index]
+
+    def get_stats(self) -> dict[str, float | int | None]:
+        return {
+            "samples": self.total,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+        }
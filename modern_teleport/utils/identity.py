@@ -0,0 +1,169 @@
+import threading
+import time
+from collections import OrderedDict
+
+from auto_uuid_api import is_uuid, local_api
+
+_NOT_CACHED = object()
+
+
+class IdentityCache:
+    """Bounded LRU cache of player name <-> uuid in front of \
+    `auto_uuid_api`, unknown names are remembered for a short time too.
+    """
+    def __init__(self, max_size: int = 4096, negative_ttl: float = 30):
+        """Init identity cache.
+
+        Args:
+            max_size (int, optional): Max players kept. Defaults to 4096.
+            negative_ttl (float, optional): Seconds to remember that a \
+                name or uuid could not be resolved. Defaults to 30.
+        """
+        self.max_size: int = max_size
+        self.negative_ttl: float = negative_ttl
+        self._uuids: OrderedDict[str, str] = OrderedDict()
+        self._names: dict[str, str] = {}
+        self._unknown: dict[str, float] = {}
+        self._lock: threading.Lock = threading.Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def configure(self, max_size: int, negative_ttl: float | None = None):
+        self.max_size = max_size
+        if negative_ttl is not None:
+            self.negative_ttl = negative_ttl
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        while len(self._uuids) > self.max_size:
+            _, uuid = self._uuids.popitem(last=False)
+            self._names.pop(uuid, None)
+
+    def remember(self, name: str, uuid: str):
+        """Put a known name and uuid pair into the cache.
+
+        Args:
+            name (str): The player name.
+            uuid (str): The player uuid.
+        """
+        with self._lock:
+            old_uuid: str | None = self._uuids.pop(name.lower(), None)
+            if old_uuid:
+                self._names.pop(old_uuid, None)
+            old_name: str | None = self._names.get(uuid.lower())
+            if old_name:
+                self._uuids.pop(old_name.lower(), None)
+            self._uuids[name.lower()] = uuid.lower()
+            self._names[uuid.lower()] = name
+            self._unknown.pop(name.lower(), None)
+            self._unknown.pop(uuid.lower(), None)
+            self._evict()
+
+    def invalidate(self, name_or_uuid: str):
+        """Forget a player, including a cached failure to resolve it.
+
+        Args:
+            name_or_uuid (str): The player name or uuid.
+        """
+        key: str = name_or_uuid.lower()
+        with self._lock:
+            self._unknown.pop(key, None)
+            if is_uuid(name_or_uuid):
+                name: str | None = self._names.pop(key, None)
+                if name:
+                    self._uuids.pop(name.lower(), None)
+            else:
+                uuid: str | None = self._uuids.pop(key, None)
+                if uuid:
+                    self._names.pop(uuid, None)
+
+    def clear(self):
+        with self._lock:
+            self._uuids.clear()
+            self._names.clear()
+            self._unknown.clear()
+
+    def _lookup_cached(self, key: str, from_uuid: bool) -> object:
+        with self._lock:
+            if from_uuid:
+                name: str | None = self._names.get(key)
+                if name:
+                    self._uuids.move_to_end(name.lower())
+                    self.hits += 1
+                    return name
+            else:
+                uuid: str | None = self._uuids.get(key)
+                if uuid:
+                    self._uuids.move_to_end(key)
+                    self.hits += 1
+                    return uuid
+            expires: float | None = self._unknown.get(key)
+            if expires is not None:
+                if expires > time.monotonic():
+                    self.hits += 1
+                    return None
+                del self._unknown[key]
+        return _NOT_CACHED
+
+    def resolve(self, name_or_uuid: str) -> str | None:
+        """Get the uuid of a name, or the name of a uuid.
+
+        Args:
+            name_or_uuid (str): The player name or uuid.
+
+        Returns:
+            str | None: None if `auto_uuid_api` does not know the player.
+        """
+        from_uuid: bool = is_uuid(name_or_uuid)
+        key: str = name_or_uuid.lower()
+        cached: object = self._lookup_cached(key, from_uuid)
+        if cached is not _NOT_CACHED:
+            return cached  # type: ignore[return-value]
+        self.misses += 1
+        result: str | None = local_api.get(name_or_uuid)
+        if not result:
+            now: float = time.monotonic()
+            with self._lock:
+                if len(self._unknown) >= self.max_size:
+                    self._unknown = {
+                        k: v for k, v in self._unknown.items() if v > now
+                    }
+                    if len(self._unknown) >= self.max_size:
+                        self._unknown.clear()
+                self._unknown[key] = now + self.negative_ttl
+            return None
+        if from_uuid:
+            self.remember(result, name_or_uuid)
+        else:
+            self.remember(name_or_uuid, result)
+        return result
+
+    def get_uuid(self, name: str) -> str | None:
+        return name if is_uuid(name) else self.resolve(name)
+
+    def get_name(self, uuid: str) -> str | None:
+        return self.resolve(uuid) if is_uuid(uuid) else uuid
+
+    def resolve_many(self, names_or_uuids: list[str]) -> dict[str, str | None]:
+        """Resolve several players, each distinct one looked up once.
+
+        Args:
+            names_or_uuids (list[str]): Player names or uuids.
+
+        Returns:
+            dict[str, str | None]: The uuid of each name and the name of \
+                each uuid.
+        """
+        return {i: self.resolve(i) for i in dict.fromkeys(names_or_uuids)}
+
+    def get_stats(self) -> dict[str, int]:
+        return {
+            "cached": len(self._uuids),
+            "unknown": len(self._unknown),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+identity_cache: IdentityCache = IdentityCache()
@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    """Token bucket refilled lazily when it is used.
+    """
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens: float = tokens
+        self.updated: float = now
+
+    def refill(self, rate: float, burst: float, now: float):
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+
+
+class RateLimiter:
+    """Per-key and global token buckets, idle keys are dropped in LRU \
+    order so players who left do not keep memory.
+    """
+    def __init__(
+        self,
+        rate: float = 0.2,
+        burst: float = 3,
+        global_rate: float = 5,
+        global_burst: float = 20,
+        max_keys: int = 1024,
+    ):
+        """Init rate limiter, a rate not positive disables its bucket.
+
+        Args:
+            rate (float, optional): Tokens per second of each key. \
+                Defaults to 0.2.
+            burst (float, optional): Max tokens of each key. Defaults to 3.
+            global_rate (float, optional): Tokens per second shared by all \
+                keys. Defaults to 5.
+            global_burst (float, optional): Max shared tokens. \
+                Defaults to 20.
+            max_keys (int, optional): Max keys tracked. Defaults to 1024.
+        """
+        self.rate: float = rate
+        self.burst: float = burst
+        self.global_rate: float = global_rate
+        self.global_burst: float = global_burst
+        self.max_keys: int = max_keys
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+        self._global: TokenBucket = TokenBucket(
+            global_burst, time.monotonic()
+        )
+        self._lock: threading.Lock = threading.Lock()
+        self.allowed: int = 0
+        self.limited: int = 0
+
+    def _get_bucket(self, key: str, now: float) -> TokenBucket:
+        bucket: TokenBucket | None = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.burst, now)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket.refill(self.rate, self.burst, now)
+        return bucket
+
+    def acquire(self, key: str | None = None) -> bool:
+        """Take one token from the bucket of a key and the global bucket.
+
+        Args:
+            key (str | None, optional): Usually the player name, only the \
+                global bucket is used if None. Defaults to None.
+
+        Returns:
+            bool: False if either bucket is empty, no token is taken then.
+        """
+        now: float = time.monotonic()
+        with self._lock:
+            bucket: TokenBucket | None = None
+            if key is not None and self.rate > 0:
+                bucket = self._get_bucket(key.lower(), now)
+                if bucket.tokens < 1:
+                    self.limited += 1
+                    return False
+            if self.global_rate > 0:
+                self._global.refill(self.global_rate, self.global_burst, now)
+                if self._global.tokens < 1:
+                    self.limited += 1
+                    return False
+                self._global.tokens -= 1
+            if bucket is not None:
+                bucket.tokens -= 1
+            self.allowed += 1
+            return True
+
+    def get_stats(self) -> dict[str, int]:
+        return {
+            "tracked": len(self._buckets),
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
@@ -0,0 +1,52 @@
+import logging
+
+import pytest
+
+# The plugin modules import each other through `modern_teleport.runtime`,
+# import them in the same order as MCDReforged loading the entrypoint.
+import modern_teleport.mcdr  # noqa: F401
+from modern_teleport import runtime
+from modern_teleport.mcdr.config import MainConfig
+
+
+class FakeServer:
+    """Records what the plugin sends to the server instead of a real \
+    MCDReforged plugin server interface.
+    """
+    def __init__(self, data_folder: str = ""):
+        self.logger: logging.Logger = logging.getLogger("MTP")
+        self.data_folder: str = data_folder
+        self.executed: list[str] = []
+        self.told: list[tuple[str, str]] = []
+
+    def get_data_folder(self) -> str:
+        return self.data_folder
+
+    def get_mcdr_config(self) -> dict:
+        return {}
+
+    def execute(self, command: str):
+        self.executed.append(command)
+
+    def tell(self, player: str, message):
+        self.told.append((player, str(message)))
+
+    def is_server_running(self) -> bool:
+        return True
+
+    def is_server_startup(self) -> bool:
+        return True
+
+    def is_rcon_running(self) -> bool:
+        return False
+
+    def get_plugin_instance(self, plugin_id: str):
+        return None
+
+
+@pytest.fixture
+def config():
+    cfg = MainConfig()
+    runtime.load_config(cfg)
+    yield cfg
+    runtime.load_config(None)  # type: ignore[arg-type]
@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+
+from modern_teleport.modules.async_rcon import (
+    PACKET_AUTH,
+    PACKET_AUTH_RESPONSE,
+    PACKET_COMMAND,
+    PACKET_RESPONSE,
+    AsyncRconClient,
+    RconAuthError,
+    pack_packet,
+    read_packet,
+)
+from modern_teleport.modules.rcon_parser import parse_player_pos
+
+PASSWORD = "password"
+commands: list[str] = []
+
+
+async def handle_fake_client(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+):
+    try:
+        while True:
+            request_id, packet_type, body = await read_packet(reader)
+            if packet_type == PACKET_AUTH:
+                ok: bool = body == PASSWORD
+                writer.write(
+                    pack_packet(
+                        request_id if ok else -1, PACKET_AUTH_RESPONSE, ""
+                    )
+                )
+            elif packet_type == PACKET_COMMAND:
+                if body == "slow":
+                    await asyncio.sleep(0.3)
+                    reply = "late"
+                elif body == "list":
+                    reply = (
+                        "There are 2 of a max of 20 players online: "
+                        "Steve, Alex"
+                    )
+                elif body.startswith("data get entity "):
+                    commands.append(body)
+                    reply = (
+                        f"{body.split()[3]} has the following entity data: "
+                        '{RootVehicle: {Entity: {Pos: [0.0d, 0.0d, 0.0d], '
+                        'id: "minecraft:boat"}}, Dimension: '
+                        '"minecraft:overworld", Tags: ["a,b: c"], '
+                        "Pos: [1.5d, 64.0d, -3.25d], Health: 20.0f}"
+                    )
+                else:
+                    reply = "x" * 9000
+                for i in range(0, len(reply), 4096):
+                    writer.write(
+                        pack_packet(
+                            request_id, PACKET_RESPONSE, reply[i:i + 4096]
+                        )
+                    )
+            else:
+                writer.write(
+                    pack_packet(
+                        request_id,
+                        PACKET_RESPONSE,
+                        f"Unknown request {packet_type:x}",
+                    )
+                )
+            await writer.drain()
+    except asyncio.IncompleteReadError:
+        writer.close()
+
+
+async def with_fake_server(
+    test, password: str = PASSWORD, pool_size: int = 2
+):
+    fake = await asyncio.start_server(handle_fake_client, "127.0.0.1", 0)
+    port: int = fake.sockets[0].getsockname()[1]
+    client = AsyncRconClient("127.0.0.1", port, password, pool_size)
+    try:
+        return await test(client)
+    finally:
+        await client.close()
+        fake.close()
+
+
+def test_online_players_and_position():
+    async def test(client: AsyncRconClient):
+        assert await client.get_online_players() == ["Steve", "Alex"]
+        commands.clear()
+        position = await client.get_player_pos("Steve")
+        assert commands == ["data get entity Steve"]
+        assert position is not None
+        assert (position.point.x, position.point.y, position.point.z) == (
+            1.5,
+            64.0,
+            -3.25,
+        )
+        assert position.dimension == "minecraft:overworld"
+
+    asyncio.run(with_fake_server(test))
+
+
+def test_multi_packet_replies_are_reassembled():
+    async def test(client: AsyncRconClient):
+        return await asyncio.gather(*[client.get("big") for _ in range(8)])
+
+    replies = asyncio.run(with_fake_server(test))
+    assert [len(i) for i in replies] == [9000] * 8
+
+
+def test_wrong_password_raises():
+    async def test(client: AsyncRconClient):
+        with pytest.raises(RconAuthError):
+            await client.get("list")
+
+    asyncio.run(with_fake_server(test, "wrong"))
+
+
+def test_timeout_does_not_fail_other_requests_on_the_connection():
+    async def test(client: AsyncRconClient):
+        connection = await client._get_connection()
+        slow = asyncio.create_task(client.get_many(["slow"], 0.05))
+        await asyncio.sleep(0)
+        players = await client.get_online_players()
+        with pytest.raises(TimeoutError):
+            await slow
+        assert client.connections == [connection]
+        assert connection.connected and not connection.pending
+        return players
+
+    assert asyncio.run(with_fake_server(test, pool_size=1)) == [
+        "Steve",
+        "Alex",
+    ]
+
+
+def test_missing_player_has_no_position():
+    assert parse_player_pos("No entity was found") is None
+    assert parse_player_pos("Steve has the following entity data: {}") is None
@@ -0,0 +1,181 @@
+import asyncio
+
+import pytest
+from location_api import MCPosition, Point3D
+
+from modern_teleport import runtime
+from modern_teleport.modules.back import (
+    BackKind,
+    BacktrackManager,
+    DeathManager,
+)
+from modern_teleport.modules.rcon import RconUnavailableError
+from modern_teleport.modules.storage import DataManager
+from modern_teleport.modules.tpmanager_async import (
+    TeleportPosition,
+    teleport_with_back,
+)
+from tests.conftest import FakeServer
+
+
+def position(x: float) -> MCPosition:
+    return MCPosition(Point3D(x, 64, 0), "minecraft:overworld")
+
+
+def test_pop_removes_peeked_entry_only_while_it_is_newest():
+    backtrack = BacktrackManager(FakeServer())  # type: ignore[arg-type]
+    backtrack.record("Alice", position(1), timestamp=1)
+    entry = backtrack.peek("alice")
+    assert entry is not None and entry.position.point.x == 1
+    backtrack.record("Alice", position(2), BackKind.DEATH, timestamp=2)
+    assert backtrack.pop("Alice", entry) is None
+    assert len(backtrack.get_history("Alice")) == 2
+    newest = backtrack.peek("Alice")
+    assert newest is not None and newest.kind is BackKind.DEATH
+    popped = backtrack.pop("Alice", newest)
+    assert popped is not None and popped.position.point.x == 2
+    popped = backtrack.pop("Alice", entry)
+    assert popped is not None and popped.time == entry.time
+    assert backtrack.pop("Alice") is None
+
+
+def test_teleport_back_does_not_record_origin(config, monkeypatch):
+    server = FakeServer()
+    backtrack = BacktrackManager(server)  # type: ignore[arg-type]
+    monkeypatch.setattr(config.enable_modules, "back", True)
+    monkeypatch.setattr(runtime, "backtrack_mgr", backtrack)
+    monkeypatch.setattr(runtime, "rcon", object())
+    TeleportPosition(
+        server, "Alice", position(1)  # type: ignore[arg-type]
+    ).execute(record_back=False)
+    assert server.executed == [
+        "execute in minecraft:overworld run tp Alice 1 64 0"
+    ]
+    assert backtrack.get_history("Alice") == []
+
+
+class BatchRcon:
+    """Answers position queries batched with a teleport, or fails.
+    """
+    def __init__(self, error: Exception | None = None):
+        self.error: Exception | None = error
+        self.batches: list[list[str]] = []
+
+    def is_available(self) -> bool:
+        return True
+
+    def get_cached_position(self, player: str, max_age: float):
+        return None
+
+    async def async_get_positions_then_execute(
+        self, players: list[str], commands: list[str]
+    ):
+        if self.error:
+            raise self.error
+        self.batches.append(commands)
+        return {i: position(7) for i in players}
+
+
+class TaskServer(FakeServer):
+    def schedule_task(self, coroutine):
+        asyncio.run(coroutine)
+
+
+@pytest.mark.parametrize(
+    ("error", "executed"),
+    [
+        (None, []),
+        (RconUnavailableError("rcon.circuit_open"), ["tag A add t", "tp"]),
+        (TimeoutError("rcon.no_response"), []),
+    ],
+)
+def test_teleport_records_origin_from_the_same_batch(
+    config, monkeypatch, error, executed
+):
+    server = TaskServer()
+    backtrack = BacktrackManager(server)  # type: ignore[arg-type]
+    rcon = BatchRcon(error)
+    monkeypatch.setattr(config.enable_modules, "back", True)
+    monkeypatch.setattr(runtime, "backtrack_mgr", backtrack)
+    monkeypatch.setattr(runtime, "rcon", rcon)
+    teleport_with_back(
+        server, ["A"], "tp", before=["tag A add t"]  # type: ignore
+    )
+    # sent again only when the batch surely did not run
+    assert server.executed == executed
+    if error is None:
+        assert rcon.batches == [["tag A add t", "tp"]]
+        entry = backtrack.peek("A")
+        assert entry is not None and entry.position.point.x == 7
+    else:
+        assert backtrack.get_history("A") == []
+
+
+def test_deaths_waiting_together_are_located_with_one_query(config):
+    located: list[str] = []
+    batches: list[int] = []
+
+    def locate(player: str):
+        located.append(player)
+        return position(2)
+
+    def locate_all():
+        batches.append(1)
+        return {"alice": position(1)}
+
+    deaths = DeathManager(
+        FakeServer(),  # type: ignore[arg-type]
+        None,
+        locate,
+        locate_all=locate_all,
+    )
+    deaths._locate(["Alice", "Bob"])
+    assert batches == [1]
+    # not in the batch reply, like when rcon is off
+    assert located == ["Bob"]
+    assert deaths.get("Alice") == position(1)
+    assert deaths.get("Bob") == position(2)
+
+
+def test_capture_locates_in_one_worker(config):
+    deaths = DeathManager(
+        FakeServer(), None, lambda player: position(3)  # type: ignore
+    )
+    deaths.capture("Alice")
+    worker = deaths._worker
+    if worker is not None:
+        worker.join(5)
+    assert deaths._worker is None
+    assert deaths.get("Alice") == position(3)
+
+
+def test_offline_players_are_evicted_first(config, monkeypatch):
+    monkeypatch.setattr(runtime, "get_online_players", lambda: {"alice"})
+    deaths = DeathManager(
+        FakeServer(), None, lambda player: None, 2  # type: ignore
+    )
+    for i, name in enumerate(("Alice", "Bob", "Carol")):
+        deaths.record(name, position(i))
+    assert deaths.get("Bob") is None
+    assert deaths.get("Alice") == position(0)
+    assert deaths.get_stats()["evicted"] == 1
+
+
+def test_deaths_are_written_behind_and_reloaded(config, tmp_path):
+    data_mgr = DataManager(FakeServer(str(tmp_path)))  # type: ignore
+    deaths = DeathManager(
+        FakeServer(), data_mgr, lambda player: None, 1  # type: ignore
+    )
+    deaths.record("Alice", position(5))
+    assert data_mgr.backend.read("back", "Alice") is None
+    assert data_mgr.flush() == 1
+    assert data_mgr.backend.read("back", "Alice") == {
+        "death": {
+            "x": 5, "y": 64, "z": 0, "dimension": "minecraft:overworld"
+        }
+    }
+    deaths.record("Bob", position(6))
+    assert deaths.get("Alice", load=False) is None
+    assert deaths.get("Alice") == position(5)
+    assert deaths.get_stats()["loaded"] == 1
+    data_mgr.close()
@@ -0,0 +1,32 @@
+from modern_teleport import runtime
+from modern_teleport.mcdr.commands import suggest_online_players
+from modern_teleport.modules.players import OnlinePlayers
+from modern_teleport.utils.completion import PrefixIndex
+from tests.conftest import FakeServer
+
+
+def test_prefix_index_updates_in_place():
+    index = PrefixIndex(["bob", "Alice"])
+    keys = index._keys
+    index.add("Carol")
+    index.add("ALICE")
+    index.remove("bob")
+    index.remove("nobody")
+    assert index._keys is keys
+    assert index.suggest() == ["ALICE", "Carol"]
+    assert index.suggest("c") == ["Carol"]
+    assert index.suggest(limit=1) == ["ALICE"]
+
+
+def test_suggestions_are_filtered_by_the_typed_argument(config, monkeypatch):
+    registry = OnlinePlayers(FakeServer(), lambda: None)  # type: ignore
+    registry.seed(["Alex", "Alice", "Bob", "Carol"])
+    monkeypatch.setattr(runtime, "online_players", registry)
+    # MCDReforged parses the partial argument into the context
+    ctx = {"player": "Bob", "target": "Al"}
+    assert suggest_online_players(
+        None, ctx, "target"  # type: ignore[arg-type]
+    ) == ["Alex", "Alice"]
+    assert suggest_online_players(
+        None, {}, "player"  # type: ignore[arg-type]
+    ) == ["Alex", "Alice", "Bob", "Carol"]
@@ -0,0 +1,47 @@
+from modern_teleport.modules.dispatcher import (
+    CommandDispatcher,
+    CommandPriority,
+)
+from tests.conftest import FakeServer
+
+
+def test_queued_commands_are_dispatched_in_priority_order():
+    server = FakeServer()
+    dispatcher = CommandDispatcher(server, tick=0)  # type: ignore[arg-type]
+    with dispatcher._condition:
+        dispatcher.submit("say later", CommandPriority.DIAGNOSTIC)
+        dispatcher.submit("tp A B", CommandPriority.TELEPORT)
+        assert not dispatcher.submit("tp A B", CommandPriority.TELEPORT)
+    dispatcher.stop()
+    assert server.executed == ["tp A B", "say later"]
+    assert dispatcher.merged == 1
+
+
+def test_submit_after_stop_executes_without_restarting_worker():
+    server = FakeServer()
+    dispatcher = CommandDispatcher(server)  # type: ignore[arg-type]
+    dispatcher.submit("say a")
+    dispatcher.stop()
+    dispatcher.submit("say b")
+    assert not dispatcher.running
+    assert server.executed == ["say a", "say b"]
+
+
+def test_stop_before_start_closes_dispatcher():
+    server = FakeServer()
+    dispatcher = CommandDispatcher(server)  # type: ignore[arg-type]
+    dispatcher.stop()
+    dispatcher.submit("say a")
+    assert dispatcher._worker is None
+    assert server.executed == ["say a"]
+
+
+def test_only_the_latest_pending_copy_is_merged():
+    server = FakeServer()
+    dispatcher = CommandDispatcher(server, tick=0)  # type: ignore[arg-type]
+    with dispatcher._condition:
+        for i in ("tp A B", "tp A C", "tp A B", "tp A B"):
+            dispatcher.submit(i, CommandPriority.TELEPORT)
+    dispatcher.stop()
+    assert server.executed == ["tp A B", "tp A C", "tp A B"]
+    assert dispatcher.merged == 1
@@ -0,0 +1,71 @@
+from modern_teleport.modules.tpmanager_async import (
+    GroupTeleportRequest,
+    cancel_exported_requests,
+)
+from modern_teleport.utils import Player
+from tests.conftest import FakeServer
+
+
+def test_tell_many_sends_one_tell_per_recipient(config):
+    server = FakeServer()
+    group = GroupTeleportRequest(
+        server, "Host", ["Alice", "Bob", "Carol"]  # type: ignore[arg-type]
+    )
+    group.tell_many(["Alice", "Bob", "Carol"], "tpr.group_receive")
+    assert server.executed == []
+    assert server.told == [
+        ("Alice", "tpr.group_receive"),
+        ("Bob", "tpr.group_receive"),
+        ("Carol", "tpr.group_receive"),
+    ]
+
+
+def test_accepted_players_are_tagged_right_before_the_teleport(config):
+    server = FakeServer()
+    group = GroupTeleportRequest(
+        server, "Host", ["Alice", "Bob", "Carol"]  # type: ignore[arg-type]
+    )
+    group.respond(Player("Alice"), True)
+    group.respond(Player("Bob"), True)
+    group.remove(Player("Alice"))
+    assert server.executed == []
+    group.respond(Player("Carol"), False)
+    assert group.accepted == {Player("Bob"): "Bob"}
+    assert server.executed == [
+        f"tag Bob add {group.tag}",
+        f"tp @a[tag={group.tag}] Host",
+        f'tellraw @a[tag={group.tag}] {{"text": "tpr.accepted"}}',
+        f"tag @a[tag={group.tag}] remove {group.tag}",
+    ]
+
+
+def test_requests_left_behind_by_unload_are_cancelled(config):
+    server = FakeServer()
+    cancel_exported_requests(
+        server,  # type: ignore[arg-type]
+        {
+            "requests": [
+                {
+                    "type": "ask",
+                    "selected": "Alice",
+                    "target": "Bob",
+                    "remaining": 10,
+                },
+            ],
+            "groups": [
+                {
+                    "inviter": "Host",
+                    "invited": ["Carol"],
+                    "accepted": ["Carol"],
+                    "answered": ["Carol"],
+                    "tag": "mtp_group_1",
+                    "remaining": 10,
+                },
+            ],
+        },
+    )
+    assert ("Bob", "tpr.cancel") in server.told
+    assert ("Alice", "tpr.cancelled") in server.told
+    assert ("Carol", "tpr.cancel") in server.told
+    assert ("Host", "tpr.cancel") in server.told
+    assert not any("mtp_group_1" in i for i in server.executed)
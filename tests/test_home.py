@@ -0,0 +1,86 @@
+from contextlib import contextmanager
+
+import pytest
+from location_api import MCPosition, Point3D
+
+from modern_teleport import runtime
+from modern_teleport.mcdr.commands import (
+    _on_home_set_command,
+    suggest_homes,
+)
+from modern_teleport.modules.home import HomeManager, HomeUnavailableError
+from tests.conftest import FakeServer
+
+
+class FlakyData:
+    """A data manager whose reads fail until `broken` is cleared.
+    """
+    def __init__(self):
+        self.broken: bool = True
+        self.documents: dict[str, dict] = {
+            "Alice": {
+                "homes": {
+                    "base": {
+                        "x": 1, "y": 64, "z": 2,
+                        "dimension": "minecraft:overworld",
+                    },
+                },
+            },
+        }
+
+    def read(self, module, player: str) -> dict:
+        if self.broken:
+            raise OSError("disk unavailable")
+        return self.documents.get(player, {})
+
+    @contextmanager
+    def edit(self, module, player: str):
+        yield self.documents.setdefault(player, {})
+
+
+def test_failed_load_is_not_cached_nor_saved():
+    data = FlakyData()
+    homes = HomeManager(FakeServer(), data)  # type: ignore[arg-type]
+    position = MCPosition(Point3D(5, 70, 5), "minecraft:overworld")
+    with pytest.raises(HomeUnavailableError):
+        homes.set("Alice", "farm", position)
+    with pytest.raises(HomeUnavailableError):
+        homes.get_names("Alice")
+    assert list(data.documents["Alice"]["homes"]) == ["base"]
+    assert homes.get_stats()["cached"] == 0
+    data.broken = False
+    assert homes.get_names("Alice") == ["base"]
+    assert homes.set("Alice", "farm", position)
+    assert sorted(data.documents["Alice"]["homes"]) == ["base", "farm"]
+
+
+class PlayerSource:
+    is_player = True
+
+    def __init__(self, player: str):
+        self.player: str = player
+        self.replies: list[str] = []
+
+    def reply(self, message):
+        self.replies.append(str(message))
+
+
+@pytest.mark.parametrize("name", ["set", "Del", "LIST"])
+def test_sub_command_names_are_rejected_as_homes(name, monkeypatch):
+    homes = HomeManager(FakeServer(), None)  # type: ignore[arg-type]
+    monkeypatch.setattr(runtime, "home_mgr", homes)
+    src = PlayerSource("Alice")
+    _on_home_set_command(src, {"home": name}).join()  # type: ignore
+    assert src.replies == ["home.invalid_name"]
+    assert homes.get_names("Alice") == []
+
+
+def test_home_completion_is_filtered_by_the_typed_name(config, monkeypatch):
+    homes = HomeManager(FakeServer(), None)  # type: ignore[arg-type]
+    position = MCPosition(Point3D(0, 64, 0), "minecraft:overworld")
+    for name in ("Base", "bed", "farm"):
+        homes.set("Alice", name, position)
+    monkeypatch.setattr(runtime, "home_mgr", homes)
+    src = PlayerSource("Alice")
+    assert suggest_homes(src, {"home": "b"}) == ["Base", "bed"]  # type: ignore
+    assert suggest_homes(src, {}) == ["Base", "bed", "farm"]  # type: ignore
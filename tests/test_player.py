@@ -0,0 +1,67 @@
+from uuid import UUID
+
+import pytest
+
+from modern_teleport.utils import Player
+from modern_teleport.utils.identity import identity_cache
+
+STEVE_UUID = "00000000-0000-0000-0000-0000000000a1"
+
+
+def setup_function():
+    identity_cache.clear()
+
+
+def test_players_are_interned_by_name_ignoring_case():
+    player = Player("Steve")
+    assert Player("STEVE") is player
+    assert {player: 1}[Player("steve")] == 1
+
+
+def test_uuid_learnt_later_upgrades_the_interned_player():
+    player = Player("Steve")
+    assert player.uuid is None
+    upgraded = Player("Steve", STEVE_UUID)
+    assert upgraded is player
+    assert player.uuid == UUID(STEVE_UUID)
+    assert Player(uuid=STEVE_UUID) is player
+    assert hash(Player(uuid=STEVE_UUID)) == hash(Player("steve"))
+
+
+def test_uuid_resolved_by_identity_cache_upgrades_the_player():
+    player = Player("Alex")
+    identity_cache.remember("Alex", "00000000-0000-0000-0000-0000000000a2")
+    assert Player("alex") is player
+    assert player.uuid == UUID("00000000-0000-0000-0000-0000000000a2")
+
+
+def test_player_is_immutable():
+    player = Player("Steve")
+    with pytest.raises(AttributeError):
+        player.name = "Alex"  # type: ignore[misc]
+    with pytest.raises(AttributeError):
+        del player.uuid
+
+
+def test_complete_players_are_found_without_the_identity_cache(monkeypatch):
+    player = Player("Steve", STEVE_UUID)
+
+    def resolve(name_or_uuid: str):
+        raise AssertionError("looked up a known player")
+
+    monkeypatch.setattr(identity_cache, "resolve", resolve)
+    assert Player("steve") is player
+    assert Player(uuid=STEVE_UUID) is player
+
+
+def test_unresolved_uuid_is_a_separate_identity():
+    anonymous = Player(uuid="00000000-0000-0000-0000-0000000000a3")
+    assert anonymous.name is None
+    named = Player("Herobrine", "00000000-0000-0000-0000-0000000000a3")
+    assert named != anonymous
+    identity_cache.remember(
+        "Notch", "00000000-0000-0000-0000-0000000000a4"
+    )
+    assert Player(uuid="00000000-0000-0000-0000-0000000000a4") == Player(
+        "notch"
+    )
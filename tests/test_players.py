@@ -0,0 +1,50 @@
+from modern_teleport import runtime
+from modern_teleport.modules import init_modules, init_online_players
+from modern_teleport.modules.players import OnlinePlayers
+from tests.conftest import FakeServer
+
+
+def test_reconcile_applies_difference_and_keeps_events_during_fetch():
+    registry: OnlinePlayers
+
+    def fetch() -> list[str]:
+        # the list is taken before these events reach the registry
+        registry.add("Carol")
+        registry.remove("Bob")
+        return ["Alice", "Bob", "Dave"]
+
+    registry = OnlinePlayers(FakeServer(), fetch)  # type: ignore[arg-type]
+    registry.seed(["Alice", "Bob", "Eve"])
+    assert registry.reconcile()
+    assert sorted(registry.get_names()) == ["Alice", "Carol", "Dave"]
+    assert registry.suggest() == ["Alice", "Carol", "Dave"]
+    assert registry._journal is None
+
+
+def test_reconcile_without_source_leaves_registry_alone():
+    registry = OnlinePlayers(FakeServer(), lambda: None)  # type: ignore
+    registry.seed(["Alice"])
+    assert not registry.reconcile()
+    assert registry.get_names() == ["Alice"]
+
+
+def test_load_without_rcon_tracks_joins_and_leaves(
+    config, tmp_path, monkeypatch
+):
+    server = FakeServer(str(tmp_path))
+    monkeypatch.setattr(config, "rcon_support", True)
+    monkeypatch.setattr(config.rcon_options, "reconcile_interval", 0)
+    for name in (
+        "server", "rcon", "data_mgr", "dispatcher", "online_players",
+        "backtrack_mgr", "death_mgr", "home_mgr", "async_tp_mgr",
+    ):
+        monkeypatch.setattr(runtime, name, getattr(runtime, name))
+    runtime.set_server(server)  # type: ignore[arg-type]
+    init_modules()
+    init_online_players(server)  # type: ignore[arg-type]
+    registry = runtime.get_online_players()
+    assert registry is not None and registry.get_names() == []
+    registry.add("Alice")
+    assert "alice" in registry
+    assert runtime.data_mgr is not None
+    runtime.data_mgr.close()
@@ -0,0 +1,107 @@
+import asyncio
+
+from modern_teleport import runtime
+from modern_teleport.mcdr.commands import _testing_async_tpa_command
+from modern_teleport.modules import GetInfo
+from modern_teleport.utils import rate_limit
+from modern_teleport.utils.rate_limit import RateLimiter
+from tests.conftest import FakeServer
+
+
+class Clock:
+    def __init__(self):
+        self.now: float = 100
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def test_player_burst_refills_over_time(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    limiter = RateLimiter(rate=1, burst=2, global_rate=0)
+    assert limiter.acquire("Alice") and limiter.acquire("alice")
+    assert not limiter.acquire("Alice")
+    assert limiter.acquire("Bob")
+    clock.now += 1
+    assert limiter.acquire("Alice")
+    assert limiter.get_stats() == {"tracked": 2, "allowed": 4, "limited": 1}
+
+
+def test_global_limit_does_not_spend_player_tokens(monkeypatch):
+    monkeypatch.setattr(rate_limit, "time", Clock())
+    limiter = RateLimiter(rate=1, burst=2, global_rate=1, global_burst=1)
+    assert limiter.acquire("Alice")
+    assert not limiter.acquire("Bob")
+    assert limiter._buckets["bob"].tokens == 2
+
+
+def test_idle_players_are_dropped_first(monkeypatch):
+    monkeypatch.setattr(rate_limit, "time", Clock())
+    limiter = RateLimiter(rate=1, burst=1, global_rate=0, max_keys=2)
+    for i in ("Alice", "Bob", "Alice", "Carol"):
+        limiter.acquire(i)
+    assert list(limiter._buckets) == ["alice", "carol"]
+
+
+class Source:
+    is_player = True
+
+    def __init__(self, player: str):
+        self.player: str = player
+        self.replies: list[str] = []
+
+    def reply(self, message):
+        self.replies.append(str(message))
+
+    def get_server(self):
+        return self
+
+    def psi(self):
+        return FakeServer()
+
+
+class Context(dict):
+    command: str = "!!tpa Bob"
+
+
+class Sessions:
+    def __init__(self):
+        self.acquired: list[str | None] = []
+        self.added: list = []
+
+    def acquire(self, player: str | None) -> bool:
+        self.acquired.append(player)
+        return True
+
+    def schedule_add(self, request, limit: bool = True):
+        self.added.append(request)
+
+
+def test_requests_to_offline_players_take_no_token(config, monkeypatch):
+    sessions = Sessions()
+    monkeypatch.setattr(runtime, "async_tp_mgr", sessions)
+    online: dict[str, bool] = {"Alice": True, "Bob": False}
+
+    async def are_players_online(players: list[str]) -> dict[str, bool]:
+        return {i: online[i] for i in players}
+
+    monkeypatch.setattr(
+        GetInfo, "async_are_players_online", are_players_online
+    )
+    src = Source("Alice")
+    asyncio.run(
+        _testing_async_tpa_command(
+            src, Context(player="Bob")  # type: ignore[arg-type]
+        )
+    )
+    assert src.replies == ["player_not_online"]
+    assert sessions.acquired == []
+    online["Bob"] = True
+    asyncio.run(
+        _testing_async_tpa_command(
+            src, Context(player="Bob")  # type: ignore[arg-type]
+        )
+    )
+    assert sessions.acquired == ["Alice"]
+    assert len(sessions.added) == 1
@@ -0,0 +1,184 @@
+import asyncio
+import random
+import threading
+
+import pytest
+
+from modern_teleport.modules.rcon import RconManager
+from modern_teleport.utils.general_tools import LatencyTracker
+from tests.conftest import FakeServer
+
+
+class FakeMCDR:
+    def __init__(self):
+        self.reconnects: int = 0
+
+    def connect_rcon(self):
+        self.reconnects += 1
+
+
+class SlowRconServer(FakeServer):
+    def __init__(self):
+        super().__init__()
+        self._mcdr_server: FakeMCDR = FakeMCDR()
+        self.release: threading.Event = threading.Event()
+
+    def is_rcon_running(self) -> bool:
+        return True
+
+    def rcon_query(self, command: str) -> str:
+        self.release.wait(5)
+        return "ok"
+
+
+def test_latency_percentiles_follow_the_rolling_window():
+    tracker = LatencyTracker(size=16)
+    samples = [random.random() for _ in range(100)]
+    for i in samples:
+        tracker.record(i)
+    window = sorted(samples[-16:])
+    assert tracker.percentile(0) == window[0]
+    assert tracker.percentile(50) == window[8]
+    assert tracker.percentile(100) == window[-1]
+
+
+def test_adaptive_wait_keeps_a_floor(config):
+    rcon = RconManager(SlowRconServer())  # type: ignore[arg-type]
+    for _ in range(50):
+        rcon.latency.record(0.001)
+    wait, failed = rcon.get_timeouts()
+    assert wait == config.rcon_options.min_wait
+    assert failed >= wait
+
+
+def test_reconnect_only_after_consecutive_timeouts(config, monkeypatch):
+    # nested defaults are shared between configs, restore them afterwards
+    monkeypatch.setattr(config.timeout, "rcon_wait", 0.01)
+    monkeypatch.setattr(config.timeout, "rcon_failed", 0.01)
+    monkeypatch.setattr(config.rcon_options, "min_wait", 0.01)
+    monkeypatch.setattr(config.rcon_options, "reconnect_after", 3)
+    server = SlowRconServer()
+    rcon = RconManager(server)  # type: ignore[arg-type]
+    try:
+        for _ in range(2):
+            try:
+                rcon.get_many_from_mcdr(["list"])
+            except TimeoutError:
+                pass
+        assert server._mcdr_server.reconnects == 0
+        try:
+            rcon.get_many_from_mcdr(["list"])
+        except TimeoutError:
+            pass
+        assert server._mcdr_server.reconnects == 1
+    finally:
+        server.release.set()
+        rcon.dispatcher.stop()
+
+
+class CountingRcon(RconManager):
+    def __init__(self):
+        super().__init__(FakeServer())  # type: ignore[arg-type]
+        self.sent: list[tuple[str, ...]] = []
+        self.release: asyncio.Event | None = None
+
+    async def _async_query_many(self, commands):
+        self.sent.append(tuple(commands))
+        assert self.release is not None
+        await self.release.wait()
+        return [f"{i}: ok" for i in commands]
+
+
+def test_cancelled_caller_does_not_cancel_the_others(config):
+    rcon = CountingRcon()
+
+    async def test():
+        rcon.release = asyncio.Event()
+        first = asyncio.create_task(rcon.async_get_many(["list"]))
+        second = asyncio.create_task(rcon.async_get_many(["list"]))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        rcon.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(test()) == ["list: ok"]
+    assert rcon.sent == [("list",)]
+    assert rcon.coalesced == 1
+
+
+def test_query_is_cancelled_once_nobody_waits(config):
+    rcon = CountingRcon()
+
+    async def test():
+        rcon.release = asyncio.Event()
+        caller = asyncio.create_task(rcon.async_get_many(["list"]))
+        await asyncio.sleep(0)
+        query = rcon._async_inflight[("list",)].task
+        caller.cancel()
+        await asyncio.sleep(0)
+        return query
+
+    assert asyncio.run(test()).cancelled()
+    assert not rcon._async_inflight
+
+
+def test_only_read_only_queries_are_coalesced(config):
+    rcon = CountingRcon()
+
+    async def test():
+        rcon.release = asyncio.Event()
+        callers = [
+            asyncio.create_task(rcon.async_get_many(i))
+            for i in (["tp A B"], ["tp A B"], ["list"], ["list"])
+        ]
+        await asyncio.sleep(0)
+        rcon.release.set()
+        return await asyncio.gather(*callers)
+
+    asyncio.run(test())
+    assert sorted(rcon.sent) == [("list",), ("tp A B",), ("tp A B",)]
+
+
+def test_threads_share_read_only_queries(config):
+    rcon = RconManager(FakeServer())  # type: ignore[arg-type]
+    sent: list[tuple[str, ...]] = []
+    release = threading.Event()
+
+    def query_many(commands):
+        sent.append(tuple(commands))
+        release.wait(5)
+        return [f"{i}: ok" for i in commands]
+
+    rcon._query_many = query_many  # type: ignore[method-assign]
+    threads = [
+        threading.Thread(target=rcon.get_many, args=(i,))
+        for i in (["list"], ["list"], ["tp A B"], ["tp A B"])
+    ]
+    for i in threads:
+        i.start()
+    while len(sent) < 3 or rcon.coalesced < 1:
+        release.wait(0.01)
+    release.set()
+    for i in threads:
+        i.join(5)
+    assert sorted(sent) == [("list",), ("tp A B",), ("tp A B",)]
+    assert rcon.coalesced == 1
+
+
+def test_adaptive_wait_follows_latency_between_floor_and_ceiling(config):
+    rcon = RconManager(FakeServer())  # type: ignore[arg-type]
+    assert config.rcon_options.min_wait < config.timeout.rcon_wait
+    waits: list[float] = []
+    for latency in (0.001, 0.05, 1):
+        rcon.latency = LatencyTracker()
+        for _ in range(50):
+            rcon.latency.record(latency)
+        waits.append(rcon.get_timeouts()[0])
+    assert waits == [
+        config.rcon_options.min_wait,
+        pytest.approx(0.2),
+        config.timeout.rcon_wait,
+    ]
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import random
+import threading
+
+import pytest
+
+from modern_teleport.modules.tpmanager_async import (
+    SessionManager,
+    TeleportRequest,
+    TeleportRequestOptions,
+)
+
+
+class LoopServer:
+    """Fake server which counts calls made outside the session loop.
+    """
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop: asyncio.AbstractEventLoop = loop
+        self.loop_thread: threading.Thread | None = None
+        self.logger: logging.Logger = logging.getLogger("MTP")
+        self.off_loop_calls: int = 0
+
+    def _check(self):
+        if threading.current_thread() is not self.loop_thread:
+            self.off_loop_calls += 1
+
+    def tell(self, player: str, message):
+        self._check()
+
+    def execute(self, command: str):
+        self._check()
+
+    def is_server_running(self) -> bool:
+        return True
+
+    def schedule_task(self, coroutine):
+        asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+
+@pytest.fixture
+def loop_server():
+    loop = asyncio.new_event_loop()
+    server = LoopServer(loop)
+    server.loop_thread = threading.Thread(target=loop.run_forever, daemon=True)
+    server.loop_thread.start()
+    yield server
+    loop.call_soon_threadsafe(loop.stop)
+    server.loop_thread.join(1)
+    loop.close()
+
+
+def test_calls_from_many_threads_stay_on_the_loop(
+    config, loop_server, monkeypatch
+):
+    logging.disable(logging.ERROR)
+    monkeypatch.setattr(config.timeout, "teleport", 0.02)
+    manager = SessionManager(loop_server)  # type: ignore[arg-type]
+    players: list[str] = [f"Player{i}" for i in range(32)]
+    options: list[TeleportRequestOptions] = ["accept", "reject", "cancel"]
+
+    def hammer(seed: int):
+        rand = random.Random(seed)
+        for _ in range(2000):
+            action: int = rand.randrange(4)
+            selected, target = rand.sample(players, 2)
+            if action < 2:
+                manager.schedule_add(
+                    TeleportRequest(
+                        loop_server,  # type: ignore[arg-type]
+                        "ask",
+                        selected,
+                        target,
+                    )
+                )
+            elif action == 2:
+                manager.confirm_latest_request(target, rand.choice(options))
+            else:
+                manager.cancel_requests_of(selected)
+
+    threads: list[threading.Thread] = [
+        threading.Thread(target=hammer, args=(i,)) for i in range(8)
+    ]
+    try:
+        for i in threads:
+            i.start()
+        for i in threads:
+            i.join()
+        manager.cancel_all_requests().result(5)
+    finally:
+        logging.disable(logging.NOTSET)
+    assert loop_server.off_loop_calls == 0
+    assert not manager._by_pair
+    assert not manager._by_selected
+    assert not manager._by_target
+    assert not manager._timers
@@ -0,0 +1,137 @@
+import threading
+
+import pytest
+
+from modern_teleport.modules.storage import MTP, DataManager
+from modern_teleport.modules.storage_backend import (
+    StorageBackend,
+    is_backend_type,
+    is_layout,
+)
+from modern_teleport.utils.identity import identity_cache
+from tests.conftest import FakeServer
+
+ALICE_UUID = "8667ba71-b85a-4004-af54-457a9734eed7"
+
+
+@pytest.fixture
+def data_mgr(config, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "identity_mode", "uuid")
+    monkeypatch.setattr(
+        identity_cache,
+        "get_uuid",
+        lambda name: ALICE_UUID if name.lower() == "alice" else None,
+    )
+    mgr = DataManager(FakeServer(str(tmp_path)))  # type: ignore[arg-type]
+    yield mgr
+    mgr.close()
+
+
+def test_name_and_uuid_share_one_document(data_mgr):
+    with data_mgr.edit(MTP.HOME, "Alice") as data:
+        data["homes"] = {"base": {}}
+    assert data_mgr.read(MTP.HOME, ALICE_UUID) == {"homes": {"base": {}}}
+    assert data_mgr.get_stats()["documents"] == 1
+    assert data_mgr.flush() == 1
+    assert data_mgr.backend.read("home", ALICE_UUID) == {
+        "homes": {"base": {}}
+    }
+
+
+def test_edit_after_close_is_rejected(data_mgr):
+    with data_mgr.edit(MTP.HOME, "Alice") as data:
+        data["homes"] = {}
+    data_mgr.close()
+    with pytest.raises(RuntimeError), data_mgr.edit(
+        MTP.HOME, "Alice"
+    ) as data:
+        data["homes"] = {"late": {}}
+    assert data_mgr._flusher is None
+    assert data_mgr.backend.read("home", ALICE_UUID) == {"homes": {}}
+
+
+def test_documents_stay_pinned_until_the_player_leaves(data_mgr, monkeypatch):
+    monkeypatch.setattr(data_mgr.config.data_storage, "max_documents", 1)
+    data_mgr.preload("Alice")
+    assert data_mgr.get_stats()["documents"] == 2
+    data_mgr.release("alice")
+    assert data_mgr.get_stats()["documents"] == 1
+
+
+def test_preload_reads_player_documents_at_once(config, tmp_path, monkeypatch):
+    monkeypatch.setattr(config.data_storage, "backend", "sqlite")
+    mgr = DataManager(FakeServer(str(tmp_path)))  # type: ignore[arg-type]
+    mgr.backend.write_many(
+        [("home", "Alice", '{"homes": {}}'), ("warp", "", "{}")]
+    )
+
+    def read(module: str, owner: str):
+        raise AssertionError("read one by one")
+
+    monkeypatch.setattr(mgr.backend, "read", read)
+    mgr.preload("Alice")
+    assert mgr.read(MTP.HOME, "Alice") == {"homes": {}}
+    assert mgr.read(MTP.BACK, "Alice") == {}
+    mgr.close()
+
+
+def test_storage_backend_is_abstract():
+    with pytest.raises(TypeError):
+        StorageBackend()  # type: ignore[abstract]
+    assert is_backend_type("sqlite") and not is_backend_type("yaml")
+    assert is_layout("sharded") and not is_layout("nested")
+
+
+def test_preload_during_relayout_does_not_cache_empty_documents(
+    data_mgr, monkeypatch
+):
+    with data_mgr.edit(MTP.HOME, "Alice") as data:
+        data["homes"] = {"base": {}}
+    data_mgr.flush()
+    data_mgr._documents.clear()
+    read_owner = data_mgr.backend.read_owner
+
+    def moved_meanwhile(owner: str, modules):
+        documents: dict = read_owner(owner, modules)
+        data_mgr.relayout("sharded")
+        return documents
+
+    monkeypatch.setattr(data_mgr.backend, "read_owner", moved_meanwhile)
+    data_mgr.preload("Alice")
+    assert data_mgr.get_stats()["documents"] == 0
+    assert data_mgr.read(MTP.HOME, "Alice") == {"homes": {"base": {}}}
+
+
+def lock_is_free(lock) -> bool:
+    acquired: list[bool] = []
+
+    def try_acquire():
+        acquired.append(lock.acquire(timeout=1))
+        if acquired[0]:
+            lock.release()
+
+    thread = threading.Thread(target=try_acquire)
+    thread.start()
+    thread.join()
+    return acquired[0]
+
+
+def test_backend_reads_do_not_hold_the_cache_lock(data_mgr, monkeypatch):
+    read = data_mgr.backend.read
+    free: list[bool] = []
+
+    def checked_read(module: str, owner: str):
+        free.append(lock_is_free(data_mgr._lock))
+        return read(module, owner)
+
+    monkeypatch.setattr(data_mgr.backend, "read", checked_read)
+    assert data_mgr.read(MTP.HOME, "Alice") == {}
+    assert free == [True]
+
+
+def test_edit_does_not_block_readers(data_mgr):
+    with data_mgr.edit(MTP.HOME, "Alice") as data:
+        data["homes"] = {"base": {}}
+        assert lock_is_free(data_mgr._lock)
+        assert data_mgr.read(MTP.HOME, "Alice") == {}
+    assert data_mgr.read(MTP.HOME, "Alice") == {"homes": {"base": {}}}
@@ -0,0 +1,51 @@
+import hashlib
+import os
+
+from modern_teleport.modules.storage_backend import (
+    SHARD_FOLDER,
+    JsonFileBackend,
+    get_shard,
+)
+
+
+def owners(count: int) -> list[str]:
+    return [hashlib.md5(str(i).encode()).hexdigest() for i in range(count)]
+
+
+def test_path_resolution_does_not_touch_the_disk(tmp_path, monkeypatch):
+    backend = JsonFileBackend(str(tmp_path), "sharded")
+
+    def scan(*args, **kwargs):
+        raise AssertionError("scanned folders to resolve a path")
+
+    monkeypatch.setattr(os, "scandir", scan)
+    monkeypatch.setattr(os, "listdir", scan)
+    for i in owners(1_000):
+        path: str = backend.get_path("back", i)
+        assert path == os.path.join(
+            str(tmp_path), SHARD_FOLDER, get_shard(i), i, "back.json"
+        )
+    monkeypatch.undo()
+    assert not os.listdir(tmp_path)
+
+
+def test_shards_spread_players_evenly():
+    shards: dict[str, int] = {}
+    for i in owners(100_000):
+        shard: str = get_shard(i)
+        shards[shard] = shards.get(shard, 0) + 1
+    # 65536 shards, each holds a handful of player folders at most
+    assert len(shards) > 50_000
+    assert max(shards.values()) <= 12
+
+
+def test_relayout_keeps_folders_which_look_like_shards(tmp_path):
+    backend = JsonFileBackend(str(tmp_path))
+    backend.write_many(
+        [("home", "ab", '{"homes": {}}'), ("warp", "", "{}")]
+    )
+    assert backend.relayout("sharded") == 1
+    assert backend.read("home", "ab") == {"homes": {}}
+    assert backend.relayout("flat") == 1
+    assert sorted(os.listdir(tmp_path)) == ["ab", "warp.json"]
+    assert backend.read("home", "ab") == {"homes": {}}